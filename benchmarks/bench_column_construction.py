@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""
+Benchmark of constructing arrow columns from a (C-ordered) expression matrix.
+
+Compares the previous approach (`numpy.hsplit` then `numpy.ravel`, one strided copy per column)
+with the column-major approach of `SkyhookDataWrapper`, both per partition and with the matrix
+laid out column-major once. "Bytes copied" counts arrow column data that is not a view of the
+source matrix.
+"""
+
+import sys
+import json
+import time
+import argparse
+
+import numpy
+import pyarrow
+
+from skyhookdm import skyhook
+from skyhookdm.util import batched_indices
+from skyhookdm.dataformats import SkyhookDataWrapper
+
+from synthetic import SyntheticExpression
+
+
+def bytes_copied(arrow_tables, source_matrices):
+    source_ranges = [
+        (source_matrix.ctypes.data, source_matrix.ctypes.data + source_matrix.nbytes)
+        for source_matrix in source_matrices
+    ]
+
+    def is_view(arrow_buffer):
+        return any(
+            range_start <= arrow_buffer.address < range_end
+            for range_start, range_end in source_ranges
+        )
+
+    return sum(
+        arrow_buffer.size
+        for arrow_table in arrow_tables
+        for arrow_column in arrow_table.columns
+        for arrow_chunk in arrow_column.chunks
+        for arrow_buffer in arrow_chunk.buffers()
+        if arrow_buffer is not None and not is_view(arrow_buffer)
+    )
+
+
+def hsplit_ravel_partitions(data_wrapper, batch_size):
+    # the approach used before column-major construction
+    column_count = data_wrapper.domain_data.shape[1]
+
+    for _, start, end in batched_indices(column_count, batch_size):
+        table_schema = data_wrapper.table_schema(from_col_ndx=start, to_col_ndx=end).with_metadata(
+            data_wrapper.schema_skyhook_metadata(start, end).to_byte_coercible()
+        )
+
+        domain_data_as_array = data_wrapper.domain_data.data_as_array(from_col=start, to_col=end)
+
+        yield pyarrow.Table.from_arrays(
+            list(map(
+                numpy.ravel,
+                numpy.hsplit(domain_data_as_array, domain_data_as_array.shape[1])
+            )),
+            schema=table_schema
+        )
+
+
+def column_major_partitions(data_wrapper, batch_size):
+    for _, tbl_part in data_wrapper.batched_table_partitions(batch_size=batch_size):
+        yield tbl_part
+
+
+def run_benchmark(bench_name, partition_fn, data_wrapper, batch_size, source_matrices):
+    start_time = time.perf_counter()
+    partitions = list(partition_fn(data_wrapper, batch_size))
+    wall_time  = time.perf_counter() - start_time
+
+    return {
+        'name'        : bench_name,
+        'wall_time_s' : wall_time,
+        'bytes_copied': bytes_copied(partitions, source_matrices()),
+        'partitions'  : len(partitions),
+    }
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+
+    arg_parser.add_argument('--genes'     , dest='gene_count', type=int, default=30000)
+    arg_parser.add_argument('--cells'     , dest='cell_count', type=int, default=2000)
+    arg_parser.add_argument('--batch-size', dest='batch_size', type=int, default=100)
+    arg_parser.add_argument('--output-file', dest='output_file', type=str, default=None)
+
+    return arg_parser.parse_args()
+
+
+if __name__ == '__main__':
+    parsed_args = parse_args()
+
+    def new_wrapper():
+        return SkyhookDataWrapper(
+            'benchmark',
+            SyntheticExpression.generate(parsed_args.gene_count, parsed_args.cell_count),
+            type_for_numpy=numpy.uint16,
+            type_for_arrow=pyarrow.uint16(),
+            type_for_skyhook=skyhook.DataTypes.SDT_UINT16
+        )
+
+    data_wrapper = new_wrapper()
+
+    results = [
+        run_benchmark(
+            'hsplit-ravel', hsplit_ravel_partitions, data_wrapper, parsed_args.batch_size,
+            lambda: [data_wrapper.domain_data.expression]
+        ),
+        run_benchmark(
+            'column-major-per-partition', column_major_partitions, data_wrapper,
+            parsed_args.batch_size, lambda: [data_wrapper.domain_data.expression]
+        ),
+    ]
+
+    # time the one-time layout separately from partition construction
+    start_time = time.perf_counter()
+    data_wrapper.layout_column_major()
+    layout_time = time.perf_counter() - start_time
+
+    layout_result = run_benchmark(
+        'column-major-laid-out', column_major_partitions, data_wrapper, parsed_args.batch_size,
+        lambda: [data_wrapper._column_major_data]
+    )
+    layout_result['layout_time_s'] = layout_time
+    results.append(layout_result)
+
+    for result in results:
+        print('{:28s} wall time (s): {:8.4f} bytes copied: {:>14,d}'.format(
+            result['name'], result['wall_time_s'], result['bytes_copied']
+        ))
+
+    print('{:28s} wall time (s): {:8.4f}'.format('(one-time column-major layout)', layout_time))
+
+    if parsed_args.output_file:
+        with open(parsed_args.output_file, 'w') as output_handle:
+            json.dump({'args': vars(parsed_args), 'results': results}, output_handle, indent=2)
+
+    sys.exit(0)
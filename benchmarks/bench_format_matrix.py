@@ -0,0 +1,421 @@
+#!/usr/bin/env python
+"""
+Benchmark of every SkyhookFileWriter and SkyhookFileReader path, over synthetic expression
+matrices of each given shape, density and data layout.
+
+Writers: a single file (`write_to_arrow`, `write_to_parquet`, and `write_partition_file` of the
+whole table in each format), and partitioned output (`write_partitions`) in each format, for
+each batch size. Readers: each single file (`read_data_file_as_arrow_table`,
+`read_partition_as_arrow_table`) and each partitioned directory
+(`read_data_partitions_as_arrow_table`, `SkyhookDataset.to_table`), with and without `use_mmap`.
+
+For each case, reports the median wall and CPU time over `--repeat` runs, throughput (of the
+dense, in-memory data), peak memory of one further traced run (allocations traced by
+tracemalloc, which includes numpy, and by a dedicated arrow memory pool), and the size of the
+written or read files. Memory-mapped reads defer paging in data, so they are timed until the
+table is decoded, not until its data is touched.
+
+Results are written as JSON (`--output-file`), with the environment and git commit they were
+measured at. `--compare-to` prints the change in wall time against an earlier results file, and
+exits with status 1 if any case slowed down by more than `--regression-threshold`.
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import tracemalloc
+
+import numpy
+import pyarrow
+
+from skyhookdm import skyhook
+from skyhookdm.datasets import SkyhookDataset
+from skyhookdm.dataformats import (SkyhookDataWrapper, SkyhookFileReader, SkyhookFileWriter,
+                                   partition_file_exts)
+
+from synthetic import SyntheticExpression
+
+
+# ------------------------------
+# Module-level Variables
+
+file_formats = ('arrow', 'parquet', 'flatbuffer')
+
+data_layouts = {
+    'dense' : skyhook.DataLayouts.DENSE,
+    'sparse': skyhook.DataLayouts.SPARSE_CSC,
+}
+
+# fields that identify a case, across runs
+case_key_fields = (
+    'shape', 'density', 'data_layout', 'operation', 'method', 'written_by', 'file_format',
+    'batch_size', 'use_mmap',
+)
+
+# arrow memory pools that measured a case; buffers allocated from a pool may outlive the case,
+# so pools are never released
+measured_pools = []
+
+
+# ------------------------------
+# Functions
+def path_size(path_to_output):
+    if os.path.isfile(path_to_output): return os.path.getsize(path_to_output)
+
+    return sum(
+        os.path.getsize(os.path.join(dir_path, file_name))
+        for dir_path, _, file_names in os.walk(path_to_output)
+        for file_name in file_names
+    )
+
+
+def traced_run(bench_fn):
+    """
+    Runs `bench_fn` once, and returns the peak bytes allocated by python (and numpy) and by arrow.
+    """
+
+    gc.collect()
+
+    arrow_pool    = pyarrow.proxy_memory_pool(pyarrow.default_memory_pool())
+    previous_pool = pyarrow.default_memory_pool()
+    measured_pools.append(arrow_pool)
+
+    pyarrow.set_memory_pool(arrow_pool)
+    tracemalloc.start()
+
+    try:
+        bench_fn()
+
+    finally:
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        pyarrow.set_memory_pool(previous_pool)
+
+    return python_peak, arrow_pool.max_memory()
+
+
+def measure(bench_fn, repeat, data_bytes, setup_fn=None):
+    """
+    Times `repeat` runs of `bench_fn` (after `setup_fn`, which is not timed), then traces memory
+    of one more run. Returns a dictionary of measurements.
+    """
+
+    wall_times, cpu_times = [], []
+    for _ in range(repeat):
+        if setup_fn is not None: setup_fn()
+        gc.collect()
+
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        bench_fn()
+        wall_times.append(time.perf_counter() - start_wall)
+        cpu_times.append(time.process_time() - start_cpu)
+
+    if setup_fn is not None: setup_fn()
+    python_peak, arrow_peak = traced_run(bench_fn)
+
+    wall_time = statistics.median(wall_times)
+
+    return {
+        'wall_time_s'      : wall_time,
+        'wall_time_min_s'  : min(wall_times),
+        'cpu_time_s'       : statistics.median(cpu_times),
+        'throughput_bps'   : data_bytes / wall_time if wall_time else None,
+        'peak_python_bytes': python_peak,
+        'peak_arrow_bytes' : arrow_peak,
+    }
+
+
+def writer_cases(data_wrapper, file_format, batch_sizes):
+    """
+    Yields (method, batch size, write function) for each writer of a file format. Each write
+    function writes to the given path (a file, or a directory of partitions).
+    """
+
+    file_ext = partition_file_exts[file_format]
+
+    if file_format == 'arrow':
+        yield 'write_to_arrow', None, lambda path_to_output: SkyhookFileWriter.write_to_arrow(
+            data_wrapper, path_to_output
+        )
+
+    if file_format == 'parquet':
+        yield 'write_to_parquet', None, lambda path_to_output: SkyhookFileWriter.write_to_parquet(
+            data_wrapper, path_to_output
+        )
+
+    yield 'write_partition_file', None, lambda path_to_output: (
+        SkyhookFileWriter.write_partition_file(
+            data_wrapper.as_partitioned_arrow_table(), path_to_output, file_format
+        )
+    )
+
+    for batch_size in batch_sizes:
+        def write_partitions(path_to_output, batch_size=batch_size):
+            os.makedirs(path_to_output, exist_ok=True)
+
+            SkyhookFileWriter.write_partitions(
+                data_wrapper, path_to_output, file_format, batch_size, file_ext
+            )
+
+        yield 'write_partitions', batch_size, write_partitions
+
+
+def reader_cases(path_to_output, file_format, is_partitioned):
+    """
+    Yields (method, use_mmap, read function) for each reader of output written in a file format.
+    """
+
+    mmap_modes = (False, ) if file_format == 'parquet' else (False, True)
+
+    for use_mmap in mmap_modes:
+        if not is_partitioned and file_format == 'arrow':
+            yield 'read_data_file_as_arrow_table', use_mmap, lambda use_mmap=use_mmap: (
+                SkyhookFileReader.read_data_file_as_arrow_table(path_to_output, use_mmap)
+            )
+
+        if not is_partitioned:
+            yield 'read_partition_as_arrow_table', use_mmap, lambda use_mmap=use_mmap: (
+                SkyhookFileReader.read_partition_as_arrow_table(
+                    path_to_output, file_format, use_mmap=use_mmap
+                )
+            )
+            continue
+
+        if file_format == 'arrow':
+            yield 'read_data_partitions_as_arrow_table', use_mmap, lambda use_mmap=use_mmap: (
+                SkyhookFileReader.read_data_partitions_as_arrow_table(
+                    path_to_output, use_mmap=use_mmap
+                )
+            )
+
+        yield 'SkyhookDataset.to_table', use_mmap, lambda use_mmap=use_mmap: (
+            SkyhookDataset.from_directory(
+                path_to_output, file_format=file_format, use_mmap=use_mmap
+            ).to_table()
+        )
+
+
+def run_matrix(domain_data, data_layout, file_format, batch_sizes, repeat, work_dir):
+    """
+    Benchmarks every writer of a file format, then every reader of what each writer wrote.
+    """
+
+    data_wrapper = SkyhookDataWrapper(
+        'benchmark', domain_data,
+        type_for_numpy=numpy.uint16,
+        type_for_arrow=pyarrow.uint16(),
+        type_for_skyhook=skyhook.DataTypes.SDT_UINT16,
+        data_layout=data_layouts[data_layout]
+    )
+
+    data_bytes = domain_data.expression.nbytes
+    results    = []
+
+    for method, batch_size, write_fn in writer_cases(data_wrapper, file_format, batch_sizes):
+        path_to_output = os.path.join(work_dir, '{}-{}-{}.{}'.format(
+            method, file_format, batch_size, partition_file_exts[file_format]
+        ))
+
+        def remove_output():
+            if os.path.isdir(path_to_output): shutil.rmtree(path_to_output)
+            elif os.path.isfile(path_to_output): os.remove(path_to_output)
+
+        write_result = measure(
+            lambda: write_fn(path_to_output), repeat, data_bytes, setup_fn=remove_output
+        )
+        write_result.update({
+            'operation'  : 'write',
+            'method'     : method,
+            'written_by' : method,
+            'file_format': file_format,
+            'batch_size' : batch_size,
+            'use_mmap'   : None,
+            'byte_size'  : path_size(path_to_output),
+        })
+        results.append(write_result)
+
+        # arrow files from `write_to_arrow` use the IPC file format, which the readers do not
+        if method == 'write_to_arrow': continue
+
+        is_partitioned = batch_size is not None
+        for read_method, use_mmap, read_fn in reader_cases(
+                path_to_output, file_format, is_partitioned):
+            read_result = measure(read_fn, repeat, data_bytes)
+            read_result.update({
+                'operation'  : 'read',
+                'method'     : read_method,
+                'written_by' : method,
+                'file_format': file_format,
+                'batch_size' : batch_size,
+                'use_mmap'   : use_mmap,
+                'byte_size'  : write_result['byte_size'],
+            })
+            results.append(read_result)
+
+        remove_output()
+
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, check=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        'git_commit': git_commit(),
+        'python'    : platform.python_version(),
+        'numpy'     : numpy.__version__,
+        'pyarrow'   : pyarrow.__version__,
+        'platform'  : platform.platform(),
+        'cpu_count' : os.cpu_count(),
+    }
+
+
+def case_key(result):
+    return tuple(
+        str(result[field_name]) if field_name in ('shape', ) else result[field_name]
+        for field_name in case_key_fields
+    )
+
+
+def compare_results(results, path_to_baseline, regression_threshold):
+    """
+    Prints the change in (median) wall time of each case against a baseline results file, and
+    returns the cases that slowed down by more than `regression_threshold` (a fraction).
+    """
+
+    with open(path_to_baseline, 'r') as baseline_handle:
+        baseline_results = {
+            case_key(result): result for result in json.load(baseline_handle)['results']
+        }
+
+    regressions = []
+    for result in results:
+        baseline = baseline_results.get(case_key(result))
+        if baseline is None or not baseline['wall_time_s']: continue
+
+        time_change = result['wall_time_s'] / baseline['wall_time_s'] - 1
+        if time_change > regression_threshold: regressions.append(result)
+
+        print('{:80s} wall time: {:8.4f} -> {:8.4f} ({:+6.1%}){}'.format(
+            result_label(result), baseline['wall_time_s'], result['wall_time_s'], time_change,
+            ' REGRESSION' if time_change > regression_threshold else ''
+        ))
+
+    return regressions
+
+
+def result_label(result):
+    return '{}x{} {:.2f} {} {} {}{} {}{}'.format(
+        *result['shape'], result['density'], result['data_layout'], result['file_format'],
+        result['method'],
+        '' if result['operation'] == 'write' else f' ({result["written_by"]})',
+        '' if result['batch_size'] is None else f'batch={result["batch_size"]} ',
+        'mmap' if result['use_mmap'] else ''
+    )
+
+
+def parse_shape(shape_str):
+    gene_count, cell_count = shape_str.lower().split('x')
+
+    return int(gene_count), int(cell_count)
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+
+    arg_parser.add_argument('--shapes'      , dest='shapes'      , type=parse_shape, nargs='+',
+                            default=[(10000, 500)],
+                            help='Matrix shapes, as <genes>x<cells>')
+    arg_parser.add_argument('--densities'   , dest='densities'   , type=float, nargs='+',
+                            default=[0.1, 1.0])
+    arg_parser.add_argument('--layouts'     , dest='data_layouts', type=str  , nargs='+',
+                            default=['dense'], choices=list(data_layouts))
+    arg_parser.add_argument('--formats'     , dest='file_formats', type=str  , nargs='+',
+                            default=list(file_formats), choices=list(file_formats))
+    arg_parser.add_argument('--batch-sizes' , dest='batch_sizes' , type=int  , nargs='+',
+                            default=[10, 100])
+    arg_parser.add_argument('--repeat'      , dest='repeat'      , type=int  , default=3)
+    arg_parser.add_argument('--seed'        , dest='seed'        , type=int  , default=0)
+    arg_parser.add_argument('--work-dir'    , dest='work_dir'    , type=str  , default=None,
+                            help='Directory for written files (default: a temporary directory)')
+    arg_parser.add_argument('--output-file' , dest='output_file' , type=str  , default=None)
+    arg_parser.add_argument('--compare-to'  , dest='compare_to'  , type=str  , default=None,
+                            help='Results file (from --output-file) to compare against')
+    arg_parser.add_argument('--regression-threshold', dest='regression_threshold', type=float,
+                            default=0.1)
+
+    return arg_parser.parse_args()
+
+
+if __name__ == '__main__':
+    parsed_args = parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='skyhookdm-bench-', dir=parsed_args.work_dir)
+
+    results = []
+    try:
+        for gene_count, cell_count in parsed_args.shapes:
+            for density in parsed_args.densities:
+                domain_data = SyntheticExpression.generate(
+                    gene_count, cell_count, density=density, seed=parsed_args.seed
+                )
+
+                for data_layout in parsed_args.data_layouts:
+                    for file_format in parsed_args.file_formats:
+                        matrix_results = run_matrix(
+                            domain_data, data_layout, file_format, parsed_args.batch_sizes,
+                            parsed_args.repeat, work_dir
+                        )
+
+                        for result in matrix_results:
+                            result.update({
+                                'shape'      : [gene_count, cell_count],
+                                'density'    : density,
+                                'data_layout': data_layout,
+                            })
+
+                            print('{:80s} wall (s): {:8.4f} MB/s: {:9.1f} '
+                                  'peak MB (py/arrow): {:8.1f} / {:8.1f} bytes: {:>14,d}'.format(
+                                      result_label(result), result['wall_time_s'],
+                                      (result['throughput_bps'] or 0) / 1e6,
+                                      result['peak_python_bytes'] / 1e6,
+                                      result['peak_arrow_bytes'] / 1e6,
+                                      result['byte_size']
+                                  ))
+
+                        results.extend(matrix_results)
+
+    finally:
+        shutil.rmtree(work_dir)
+
+    if parsed_args.output_file:
+        with open(parsed_args.output_file, 'w') as output_handle:
+            json.dump(
+                {'args': vars(parsed_args), 'environment': environment(), 'results': results},
+                output_handle, indent=2
+            )
+
+    regressions = []
+    if parsed_args.compare_to:
+        regressions = compare_results(
+            results, parsed_args.compare_to, parsed_args.regression_threshold
+        )
+
+    sys.exit(1 if regressions else 0)
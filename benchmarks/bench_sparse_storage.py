@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Benchmark of the sparse (CSC) data layout against the dense layout, for partitioned output.
+
+For each density of non-zero values, reports the total size of partition files, the time to
+write them, and the time to read them back (as dense arrow tables).
+"""
+
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy
+import pyarrow
+
+from skyhookdm import skyhook
+from skyhookdm.datasets import SkyhookDataset
+from skyhookdm.dataformats import SkyhookDataWrapper, SkyhookFileWriter
+
+from synthetic import SyntheticExpression
+
+
+def run_benchmark(domain_data, data_layout, file_format, batch_size):
+    data_wrapper = SkyhookDataWrapper(
+        'benchmark', domain_data,
+        type_for_numpy=numpy.uint16,
+        type_for_arrow=pyarrow.uint16(),
+        type_for_skyhook=skyhook.DataTypes.SDT_UINT16,
+        data_layout=data_layout
+    )
+
+    output_dir = tempfile.mkdtemp(prefix='skyhookdm-bench-')
+
+    try:
+        start_time         = time.perf_counter()
+        partition_manifest = SkyhookFileWriter.write_partitions(
+            data_wrapper, output_dir, file_format=file_format, batch_size=batch_size
+        )
+        write_time         = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        SkyhookDataset.from_directory(output_dir, file_format=file_format).to_table()
+        read_time  = time.perf_counter() - start_time
+
+    finally:
+        shutil.rmtree(output_dir)
+
+    return {
+        'data_layout' : 'sparse' if data_layout == skyhook.DataLayouts.SPARSE_CSC else 'dense',
+        'file_format' : file_format,
+        'byte_size'   : partition_manifest.byte_size,
+        'write_time_s': write_time,
+        'read_time_s' : read_time,
+    }
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+
+    arg_parser.add_argument('--genes'      , dest='gene_count' , type=int  , default=20000)
+    arg_parser.add_argument('--cells'      , dest='cell_count' , type=int  , default=1000)
+    arg_parser.add_argument('--batch-size' , dest='batch_size' , type=int  , default=100)
+    arg_parser.add_argument('--densities'  , dest='densities'  , type=float, nargs='+',
+                            default=[0.01, 0.05, 0.1, 0.25])
+    arg_parser.add_argument('--file-format', dest='file_format', type=str  , default='arrow')
+    arg_parser.add_argument('--output-file', dest='output_file', type=str  , default=None)
+
+    return arg_parser.parse_args()
+
+
+if __name__ == '__main__':
+    parsed_args = parse_args()
+
+    results = []
+    for density in parsed_args.densities:
+        domain_data = SyntheticExpression.generate(
+            parsed_args.gene_count, parsed_args.cell_count, density=density
+        )
+
+        for data_layout in (skyhook.DataLayouts.DENSE, skyhook.DataLayouts.SPARSE_CSC):
+            result = run_benchmark(
+                domain_data, data_layout, parsed_args.file_format, parsed_args.batch_size
+            )
+            result['density'] = density
+
+            print('density: {:5.2f} {:6s} bytes: {:>14,d} write (s): {:7.3f} read (s): {:7.3f}'
+                  .format(density, result['data_layout'], result['byte_size'],
+                          result['write_time_s'], result['read_time_s']))
+
+            results.append(result)
+
+    if parsed_args.output_file:
+        with open(parsed_args.output_file, 'w') as output_handle:
+            json.dump({'args': vars(parsed_args), 'results': results}, output_handle, indent=2)
+
+    sys.exit(0)
@@ -0,0 +1,47 @@
+"""
+Synthetic gene expression data for benchmarks.
+
+`SyntheticExpression` provides the interface that `SkyhookDataWrapper` expects of a domain
+dataset (`shape`, `astype`, `columns`, `data_as_array`) over a dense matrix of genes (rows) by
+cells (columns).
+"""
+
+import numpy
+
+
+class SyntheticExpression(object):
+
+    @classmethod
+    def generate(cls, gene_count, cell_count, density=0.1, max_value=1000, seed=0,
+                 dtype=numpy.uint16):
+        """
+        Generates a matrix where roughly `density` of the values are non-zero.
+        """
+
+        random_gen = numpy.random.default_rng(seed)
+
+        expression = random_gen.integers(1, max_value, size=(gene_count, cell_count), dtype=dtype)
+        expression[random_gen.random(size=(gene_count, cell_count)) >= density] = 0
+
+        return cls(expression)
+
+    def __init__(self, expression, cell_names=None, **kwargs):
+        super().__init__(**kwargs)
+
+        self.expression = expression
+        self.cell_names = cell_names or [
+            f'cell_{cell_ndx:07d}' for cell_ndx in range(expression.shape[1])
+        ]
+
+    @property
+    def shape(self):
+        return self.expression.shape
+
+    def astype(self, dtype):
+        return self.__class__(self.expression.astype(dtype), self.cell_names)
+
+    def columns(self, from_col=None, to_col=None):
+        return self.cell_names[from_col:to_col]
+
+    def data_as_array(self, from_col=None, to_col=None):
+        return self.expression[:, from_col:to_col]
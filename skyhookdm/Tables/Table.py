@@ -4,6 +4,7 @@
 
 import flatbuffers
 from flatbuffers.compat import import_numpy
+from skyhookdm.Tables.Record import Record
 np = import_numpy()
 
 class Table(object):
@@ -103,7 +104,6 @@ class Table(object):
             x = self._tab.Vector(o)
             x += flatbuffers.number_types.UOffsetTFlags.py_type(j) * 4
             x = self._tab.Indirect(x)
-            from Tables.Record import Record
             obj = Record()
             obj.Init(self._tab.Bytes, x)
             return obj
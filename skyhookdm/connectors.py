@@ -7,10 +7,34 @@ can (hopefully) be agile.
 
 import os
 import sys
+import time
+import queue
+import errno
 import logging
+import functools
+import threading
+import concurrent.futures
+
+from collections import namedtuple
+
+# dependencies
+import numpy
+
+# modules from this package
+from skyhookdm import instrumentation
+
+# classes
+from skyhookdm.dataformats import SkyhookFlatbufferMeta
+from skyhookdm.localrados import LocalRados
 
 # functions
-from skyhookdm.util import try_import
+from skyhookdm.util import bounded_ordered_map, try_import
+from skyhookdm.dataformats import (all_rows_deleted, arrow_schema_from_layout,
+                                   column_stats_from_schema, merge_delete_vector,
+                                   select_row_group_partitions, skyhook_metadata_from_schema)
+
+# variables
+from skyhookdm.dataformats import fb_meta_header_size
 
 # TODO: this is temporary to see if the ubuntu package supports a decent version of librados
 sys.path.insert(0, '/usr/lib/python3/dist-packages')
@@ -18,29 +42,810 @@ sys.path.insert(0, '/usr/lib/python3/dist-packages')
 # optional, dynamic module imports
 rados = try_import('rados')
 
+# errors raised for a missing object and for a missing xattr (by librados, or by a local cluster,
+# which raises FileNotFoundError). Any other error (e.g. a timeout, EPERM or EIO) is raised, since
+# it does not mean that the object or xattr is missing
+missing_object_errors = (FileNotFoundError, ) + (() if rados is None else (rados.ObjectNotFound, ))
+missing_xattr_errors  = (FileNotFoundError, ) + (() if rados is None else (rados.NoData, ))
+
+
+# ------------------------------
+# Module-level Variables
+
+object_write_attributes = [
+    'obj_name'    ,
+    'byte_count'  ,
+    'latency_s'   ,
+    'return_value',
+]
+
+
+# objects are named `<db schema>.<table name>.<object id>` (the scheme `rados-write` uses)
+storage_obj_name_template = '{}.{}.{}'
+
+# objects written by `rados-write` start with the flatbuffer's length as 4 little-endian bytes
+storage_obj_prefix_len = 4
+
+# rows of an object are marked deleted by a delete vector (one uint8 per row, non-zero if deleted)
+# in this xattr (see `RadosIOContext.delete_object_rows`)
+delete_vector_xattr = 'delete_vector'
+
+
+# ------------------------------
+# Functions
+def storage_obj_name(table_name, obj_id, db_schema='public'):
+    return storage_obj_name_template.format(db_schema, table_name, obj_id)
+
+
+def get_xattr_if_exists(io_context, obj_name, xattr_name):
+    """
+    Returns the value of an object's xattr, or None if the object has no such xattr.
+    """
+
+    try:
+        return io_context.get_xattr(obj_name, xattr_name)
+
+    except missing_xattr_errors:
+        return None
+
+
+def delete_vector_from_xattr(delete_xattr):
+    if not delete_xattr: return None
+
+    return numpy.frombuffer(delete_xattr, dtype=numpy.uint8)
+
+
+def storage_obj_data(flatbuffer_binary):
+    """
+    Returns the data of an object for a flatbuffer: its length prefix, then the flatbuffer.
+    """
+
+    return (
+          len(flatbuffer_binary).to_bytes(storage_obj_prefix_len, byteorder='little')
+        + flatbuffer_binary
+    )
+
+
+# ------------------------------
+# Classes
+class ObjectWrite(namedtuple('ObjectWrite', object_write_attributes)):
+    """
+    The completion of a single object write (the data and its 'size' xattr). A negative
+    `return_value` is an error code from librados.
+    """
+
+    @property
+    def failed(self):
+        return self.return_value < 0
+
+
+class ObjectWriteError(IOError):
+    def __init__(self, failed_writes, **kwargs):
+        super().__init__(
+            'Failed to write {} objects: {}'.format(
+                len(failed_writes),
+                ', '.join(
+                    f'{obj_write.obj_name} ({obj_write.return_value})'
+                    for obj_write in failed_writes
+                )
+            ),
+            **kwargs
+        )
+
+        self.failed_writes = failed_writes
+
+
+class RadosBulkWriter(object):
+    """
+    Writes objects (and their 'size' xattr) with asynchronous librados operations.
+
+    At most `max_in_flight` operations are outstanding at a time: once the window is full, `write`
+    blocks until an operation completes (backpressure). Every completion is recorded, with the
+    object's latency from submission to completion, and `flush` waits for all of them.
+
+    If the librados bindings do not have `aio_setxattr` (before Octopus), the xattr is set
+    synchronously after submitting the data write, as `RadosIOContext.write_data` used to.
+    """
+
+    logger = logging.getLogger('{}.{}'.format(__module__, __name__))
+    logger.setLevel(logging.INFO)
+
+    def __init__(self, io_context, max_in_flight=64, **kwargs):
+        super().__init__(**kwargs)
+
+        self.io_context    = io_context
+        self.max_in_flight = max_in_flight
+
+        # bounds outstanding operations; released by completion callbacks
+        self._op_window    = threading.BoundedSemaphore(max_in_flight)
+
+        # writes that have outstanding operations, by write id
+        self._write_lock     = threading.Condition()
+        self._pending_writes = {}
+        self._next_write_id  = 0
+
+        self.completed_writes = []
+        self.start_time       = None
+        self.end_time         = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush(raise_on_error=exc_type is None)
+
+    def _on_complete(self, write_id, completion):
+        self._complete_ops(write_id, 1, completion.get_return_value())
+        self._op_window.release()
+
+    def _complete_ops(self, write_id, op_count, return_value):
+        """
+        Records that `op_count` operations of a write are done (completed, or never submitted),
+        and records the write once none of its operations are outstanding.
+        """
+
+        with self._write_lock:
+            pending_write = self._pending_writes[write_id]
+
+            pending_write['ops_remaining'] -= op_count
+            if return_value < 0 and pending_write['return_value'] >= 0:
+                pending_write['return_value'] = return_value
+
+            if pending_write['ops_remaining'] == 0:
+                del self._pending_writes[write_id]
+
+                self.completed_writes.append(ObjectWrite(
+                    pending_write['obj_name'],
+                    pending_write['byte_count'],
+                    time.perf_counter() - pending_write['submit_time'],
+                    pending_write['return_value']
+                ))
+
+                self.end_time = time.perf_counter()
+                self._write_lock.notify_all()
+
+    def _submit(self, write_id, aio_fn, *aio_args):
+        # blocks while the window of outstanding operations is full
+        self._op_window.acquire()
+
+        try:
+            completion = aio_fn(
+                *aio_args,
+                oncomplete=lambda completion: self._on_complete(write_id, completion)
+            )
+
+        except Exception:
+            self._op_window.release()
+            raise
+
+        # keep the completion referenced until its operation completes
+        with self._write_lock:
+            if write_id in self._pending_writes:
+                self._pending_writes[write_id]['completions'].append(completion)
+
+    def write(self, storage_obj_name, storage_obj_data):
+        size_xattr   = str(len(storage_obj_data)).encode('utf-8')
+        aio_setxattr = getattr(self.io_context, 'aio_setxattr', None)
+
+        with self._write_lock:
+            if self.start_time is None: self.start_time = time.perf_counter()
+
+            write_id             = self._next_write_id
+            self._next_write_id += 1
+
+            self._pending_writes[write_id] = {
+                'obj_name'     : storage_obj_name,
+                'byte_count'   : len(storage_obj_data),
+                'submit_time'  : time.perf_counter(),
+                'ops_remaining': 1 if aio_setxattr is None else 2,
+                'return_value' : 0,
+                'completions'  : [],
+            }
+
+        # if a submission raises, the write fails and its unsubmitted operations are not awaited
+        ops_unsubmitted = self._pending_writes[write_id]['ops_remaining']
+
+        try:
+            self._submit(
+                write_id, self.io_context.aio_write_full, storage_obj_name, storage_obj_data
+            )
+            ops_unsubmitted -= 1
+
+            instrumentation.count('rados_ops', 2)
+            instrumentation.count('bytes_written', len(storage_obj_data))
+
+            if aio_setxattr is None:
+                self.io_context.set_xattr(storage_obj_name, 'size', size_xattr)
+
+            else:
+                self._submit(write_id, aio_setxattr, storage_obj_name, 'size', size_xattr)
+                ops_unsubmitted -= 1
+
+        except Exception:
+            if ops_unsubmitted: self._complete_ops(write_id, ops_unsubmitted, -errno.EIO)
+            raise
+
+    @instrumentation.spanned('rados.flush')
+    def flush(self, raise_on_error=True):
+        """
+        Waits for every outstanding write to complete, and returns all completed writes. If any
+        write failed and `raise_on_error` is True, raises an ObjectWriteError.
+        """
+
+        with self._write_lock:
+            self._write_lock.wait_for(lambda: not self._pending_writes)
+
+        failed_writes = self.failed_writes()
+
+        for obj_write in failed_writes:
+            self.logger.error(
+                f'Write of {obj_write.obj_name} failed: {obj_write.return_value}'
+            )
+
+        if failed_writes and raise_on_error:
+            raise ObjectWriteError(failed_writes)
+
+        return self.completed_writes
+
+    def failed_writes(self):
+        return [obj_write for obj_write in self.completed_writes if obj_write.failed]
+
+    def stats(self):
+        """
+        Returns a dictionary summarizing completed writes: object and byte counts, elapsed time,
+        throughput (bytes per second), and mean and max per-object latency.
+        """
+
+        byte_count = sum(obj_write.byte_count for obj_write in self.completed_writes)
+        latencies  = [obj_write.latency_s for obj_write in self.completed_writes]
+        elapsed_s  = (
+            (self.end_time - self.start_time) if self.start_time and self.end_time else 0.0
+        )
+
+        return {
+            'objects'       : len(self.completed_writes),
+            'failed'        : len(self.failed_writes()),
+            'bytes'         : byte_count,
+            'elapsed_s'     : elapsed_s,
+            'throughput_bps': (byte_count / elapsed_s) if elapsed_s else 0.0,
+            'latency_mean_s': (sum(latencies) / len(latencies)) if latencies else 0.0,
+            'latency_max_s' : max(latencies, default=0.0),
+        }
+
+    def summary(self):
+        return '\n'.join([
+            f'\t{stat_key:16s} => {stat_val}'
+            for stat_key, stat_val in self.stats().items()
+        ])
+
+
+class ObjectReadError(IOError):
+    def __init__(self, obj_name, return_value, **kwargs):
+        super().__init__(f'Failed to read {obj_name} ({return_value})', **kwargs)
+
+        self.obj_name     = obj_name
+        self.return_value = return_value
+
+
+class RadosBulkReader(object):
+    """
+    Reads objects with asynchronous librados operations, keeping at most `max_in_flight` objects
+    outstanding, and yields each object's data as it arrives (not in request order).
+
+    Each object's length is taken from its 'size' xattr (set by `RadosBulkWriter`), so a single
+    read of exactly that length fetches the whole object. If the librados bindings do not have
+    `aio_getxattr` (before Octopus), the xattr is read synchronously before submitting the read.
+
+    If `read_delete_vectors` is True, each object's delete vector xattr (see
+    `delete_vector_xattr`) is read too, between the 'size' xattr and the data.
+    """
+
+    logger = logging.getLogger('{}.{}'.format(__module__, __name__))
+    logger.setLevel(logging.INFO)
+
+    def __init__(self, io_context, max_in_flight=64, read_delete_vectors=False, **kwargs):
+        super().__init__(**kwargs)
+
+        self.io_context          = io_context
+        self.max_in_flight       = max_in_flight
+        self.read_delete_vectors = read_delete_vectors
+
+    def _submit_read(self, obj_name, obj_size, delete_xattr, completed_reads):
+        self.io_context.aio_read(
+            obj_name,
+            obj_size,
+            0,
+            oncomplete=lambda completion, data_read: completed_reads.put(
+                (obj_name, completion.get_return_value(), data_read, delete_xattr)
+            )
+        )
+
+    def _submit(self, obj_name, completed_reads):
+        aio_getxattr = getattr(self.io_context, 'aio_getxattr', None)
+
+        # the 'size' xattr (and the delete vector xattr), then the data
+        instrumentation.count('rados_ops', 3 if self.read_delete_vectors else 2)
+
+        if aio_getxattr is None:
+            obj_size     = int(self.io_context.get_xattr(obj_name, 'size'))
+            delete_xattr = None
+
+            if self.read_delete_vectors:
+                delete_xattr = get_xattr_if_exists(self.io_context, obj_name, delete_vector_xattr)
+
+            self._submit_read(obj_name, obj_size, delete_xattr, completed_reads)
+
+            return
+
+        # exceptions raised in a callback are not propagated, so each is put as a failed read
+        # (otherwise, `read_objects` would wait for the read forever)
+        def on_deletes(obj_size, completion, delete_xattr):
+            # a missing xattr (-ENODATA) means no rows are deleted
+            if completion.get_return_value() < 0: delete_xattr = None
+
+            try:
+                self._submit_read(obj_name, obj_size, delete_xattr, completed_reads)
+
+            except Exception:
+                self.logger.exception(f'Failed to submit read of {obj_name}')
+                completed_reads.put((obj_name, -errno.EIO, None, None))
+
+        def on_size(completion, size_xattr):
+            return_value = completion.get_return_value()
+
+            try:
+                if return_value < 0:
+                    completed_reads.put((obj_name, return_value, None, None))
+
+                elif self.read_delete_vectors:
+                    aio_getxattr(
+                        obj_name,
+                        delete_vector_xattr,
+                        oncomplete=functools.partial(on_deletes, int(size_xattr))
+                    )
+
+                else:
+                    self._submit_read(obj_name, int(size_xattr), None, completed_reads)
+
+            except ValueError:
+                self.logger.error(f'Invalid size xattr of {obj_name}: {size_xattr!r}')
+                completed_reads.put((obj_name, -errno.EINVAL, None, None))
+
+            except Exception:
+                self.logger.exception(f'Failed to submit read of {obj_name}')
+                completed_reads.put((obj_name, -errno.EIO, None, None))
+
+        aio_getxattr(obj_name, 'size', oncomplete=on_size)
+
+    def read_objects(self, obj_names):
+        """
+        Generator that yields (object name, object data) pairs as reads complete (with a third
+        element, the object's delete vector or None, if `read_delete_vectors` is True). Raises an
+        ObjectReadError for the first read that fails.
+
+        If the generator is closed early (or raises), it waits for the reads still in flight, so
+        that no callback runs after the I/O context is released.
+        """
+
+        completed_reads = queue.Queue()
+        in_flight_count = 0
+
+        def next_completed():
+            nonlocal in_flight_count
+
+            with instrumentation.span('rados.wait_for_read'):
+                obj_name, return_value, data_read, delete_xattr = completed_reads.get()
+
+            in_flight_count -= 1
+            if return_value < 0: raise ObjectReadError(obj_name, return_value)
+
+            instrumentation.count('bytes_read', len(data_read))
+
+            if not self.read_delete_vectors: return obj_name, data_read
+
+            return obj_name, data_read, delete_vector_from_xattr(delete_xattr)
+
+        try:
+            for obj_name in obj_names:
+                # backpressure: wait for a completion while the window is full
+                if in_flight_count >= self.max_in_flight:
+                    yield next_completed()
+
+                self._submit(obj_name, completed_reads)
+                in_flight_count += 1
+
+            while in_flight_count:
+                yield next_completed()
+
+        finally:
+            for _ in range(in_flight_count):
+                completed_reads.get()
+
+    def read_flatbuffers(self, obj_names):
+        """
+        Generator that yields (object name, SkyhookFlatbufferMeta) pairs as reads complete (with
+        the object's delete vector, as for `read_objects`). The length prefix is skipped by
+        rooting the flatbuffer at an offset, rather than slicing (and copying) the object data.
+        """
+
+        for obj_name, obj_data, *delete_vector in self.read_objects(obj_names):
+            yield (
+                obj_name,
+                SkyhookFlatbufferMeta.from_binary_flatbuffer(
+                    obj_data, offset=storage_obj_prefix_len
+                ),
+                *delete_vector
+            )
+
 
 class RadosIOContext(object):
     @classmethod
     def for_cluster_pool(cls, cluster_conn, ceph_pool):
         return cls(cluster_conn.open_ioctx(ceph_pool))
 
-    def __init__(self, rados_io_ctx, **kwargs):
+    def __init__(self, rados_io_ctx, io_context_pool=None, **kwargs):
         super().__init__(**kwargs)
 
         self.io_context = rados_io_ctx
 
+        # if leased from a pool, the ioctx is returned to the pool instead of closed
+        self.io_context_pool = io_context_pool
+
+        # tracks writes from `write_data`, so that they complete before the ioctx is closed
+        self._default_writer = None
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        self.io_context.close()
+        try:
+            if self._default_writer is not None:
+                self._default_writer.flush(raise_on_error=exc_type is None)
+
+        finally:
+            self.close()
+
+    def close(self):
+        if self.io_context is None: return
+
+        if self.io_context_pool is None:
+            self.io_context.close()
+
+        else:
+            self.io_context_pool.release(self.io_context)
+
+        self.io_context = None
+
+    def bulk_writer(self, max_in_flight=64):
+        return RadosBulkWriter(self.io_context, max_in_flight=max_in_flight)
 
     def write_data(self, storage_obj_name, storage_obj_data):
-        self.io_context.aio_write_full(storage_obj_name, storage_obj_data)
-        self.io_context.set_xattr(
-            storage_obj_name,
-            'size',
-            str(len(storage_obj_data)).encode('utf-8')
+        """
+        Asynchronously writes an object and its 'size' xattr. Writes are awaited (and errors are
+        raised) by `flush` or when this context exits.
+        """
+
+        if self._default_writer is None: self._default_writer = self.bulk_writer()
+
+        self._default_writer.write(storage_obj_name, storage_obj_data)
+
+    def bulk_reader(self, max_in_flight=64, read_delete_vectors=False):
+        return RadosBulkReader(
+            self.io_context,
+            max_in_flight=max_in_flight,
+            read_delete_vectors=read_delete_vectors
+        )
+
+    def read_table_batches(self, table_name, start_obj=0, num_objs=1, db_schema='public',
+                           max_in_flight=64, obj_ids=None):
+        """
+        Generator that yields (object id, arrow record batch) pairs for objects
+        `<db_schema>.<table_name>.<N>`, for N in [start_obj, start_obj + num_objs) or, if given,
+        in `obj_ids` (e.g. as selected by `select_table_objects`). Objects are read concurrently
+        and their batches are yielded as each object arrives, so batches of different objects are
+        not in object id order.
+
+        Objects marked deleted (see `mark_object_deleted`), or with every row deleted, yield no
+        batches and are not decoded. Rows marked deleted (see `delete_object_rows`) are dropped.
+        """
+
+        if obj_ids is None: obj_ids = range(start_obj, start_obj + num_objs)
+
+        ids_by_name = {
+            storage_obj_name(table_name, obj_id, db_schema): obj_id
+            for obj_id in obj_ids
+        }
+
+        bulk_reader = self.bulk_reader(max_in_flight=max_in_flight, read_delete_vectors=True)
+        for obj_name, fb_meta, delete_vector in bulk_reader.read_flatbuffers(ids_by_name.keys()):
+            instrumentation.count('partitions_read')
+
+            if fb_meta.is_deleted() or all_rows_deleted(delete_vector): continue
+
+            if delete_vector is not None and delete_vector.any():
+                # decoded whole (which counts decoded rows), then filtered
+                data_table = fb_meta.get_data_as_arrow(delete_vector=delete_vector)
+
+                for record_batch in data_table.to_batches():
+                    yield ids_by_name[obj_name], record_batch
+
+                continue
+
+            for record_batch in fb_meta.get_data_as_arrow_batches():
+                instrumentation.count('batches_decoded')
+                instrumentation.count('rows_decoded', record_batch.num_rows)
+
+                yield ids_by_name[obj_name], record_batch
+
+    def peek_object(self, obj_name):
+        """
+        Returns the skyhook metadata of an object and the ColumnSchema of each of its columns,
+        reading only the object's arrow schema (see `peek_object_schema`).
+        """
+
+        return skyhook_metadata_from_schema(self.peek_object_schema(obj_name))
+
+    def peek_object_schema(self, obj_name):
+        """
+        Returns the arrow schema of an object, using partial reads of only the object's FB_Meta
+        header and arrow schema message (see `SkyhookFlatbufferMeta.read_arrow_schema`),
+        typically a few kilobytes.
+        """
+
+        def read_range(offset, length):
+            instrumentation.count('rados_ops')
+
+            data_read = self.io_context.read(obj_name, length, offset)
+            instrumentation.count('bytes_read', len(data_read))
+
+            return data_read
+
+        with instrumentation.span('rados.peek_object'):
+            arrow_schema = SkyhookFlatbufferMeta.read_arrow_schema(
+                read_range, offset=storage_obj_prefix_len
+            )
+
+        return arrow_schema_from_layout(arrow_schema)
+
+    def delete_object_rows(self, obj_name, row_ndx):
+        """
+        Marks rows of an object, by index (anything that indexes a numpy array), deleted, without
+        rewriting the object: the object's delete vector xattr is merged with the given rows.
+        Returns the merged delete vector.
+
+        Objects that hold the same rows (column partitions) must have the same rows deleted.
+        """
+
+        skyhook_metadata, _ = self.peek_object(obj_name)
+
+        instrumentation.count('rados_ops', 2)
+
+        delete_vector = merge_delete_vector(
+            delete_vector_from_xattr(
+                get_xattr_if_exists(self.io_context, obj_name, delete_vector_xattr)
+            ),
+            skyhook_metadata.num_rows,
+            row_ndx
+        )
+
+        self.io_context.set_xattr(obj_name, delete_vector_xattr, delete_vector.tobytes())
+
+        return delete_vector
+
+    def delete_vectors_for_append(self, table_name, first_obj_id, appended_schemas,
+                                  db_schema='public'):
+        """
+        Returns the delete vector (or None) of each object appended to a table of `first_obj_id`
+        objects, given the ColumnSchemas of each appended object (see `peek_object`), in order.
+
+        Appended objects whose column ids continue those of the table's last object (as
+        `SkyhookFileWriter.write_partitions(..., append=True)` numbers appended columns) hold new
+        columns of the table's last row group, so they must have the same rows deleted as that
+        group's objects, which all share a delete vector. An object whose column ids do not
+        continue starts a row group of appended rows, without deleted rows.
+
+        Only the table's last object is peeked, and only its delete vector xattr is read, so the
+        cost does not depend on the size of the table.
+        """
+
+        appended_schemas = list(appended_schemas)
+        if not first_obj_id: return [None] * len(appended_schemas)
+
+        last_obj_name   = storage_obj_name(table_name, first_obj_id - 1, db_schema)
+        _, last_schemas = self.peek_object(last_obj_name)
+
+        instrumentation.count('rados_ops')
+        delete_vector = delete_vector_from_xattr(
+            get_xattr_if_exists(self.io_context, last_obj_name, delete_vector_xattr)
+        )
+
+        delete_vectors, next_col_id = [], last_schemas[-1].col_id + 1
+        for column_schemas in appended_schemas:
+            # an object of appended rows starts a new row group, as do the objects after it
+            if column_schemas[0].col_id != next_col_id: delete_vector = None
+
+            delete_vectors.append(delete_vector)
+            next_col_id = column_schemas[-1].col_id + 1
+
+        return delete_vectors
+
+    def mark_object_deleted(self, obj_name):
+        """
+        Marks a whole object deleted, so that readers skip it, by setting the `BlobDeleted` field
+        of its FB_Meta flatbuffer in place (a partial read of the header and a one-byte write).
+        If the flatbuffer does not store the field, every row is marked deleted instead.
+        """
+
+        instrumentation.count('rados_ops')
+        fb_meta_header = self.io_context.read(
+            obj_name, storage_obj_prefix_len + fb_meta_header_size, 0
+        )
+
+        deleted_pos = SkyhookFlatbufferMeta.blob_deleted_position(
+            fb_meta_header, offset=storage_obj_prefix_len
+        )
+
+        if deleted_pos is None:
+            self.delete_object_rows(obj_name, slice(None))
+
+            return
+
+        instrumentation.count('rados_ops')
+        self.io_context.write(obj_name, b'\x01', deleted_pos)
+
+    def object_exists(self, obj_name):
+        instrumentation.count('rados_ops')
+
+        try:
+            self.io_context.stat(obj_name)
+
+        except missing_object_errors:
+            return False
+
+        return True
+
+    def next_object_id(self, table_name, db_schema='public'):
+        """
+        Returns the id of the first object of a table that does not exist yet, i.e. the number
+        of objects `<db_schema>.<table_name>.<N>` (numbered from 0, as `rados-write` writes them).
+        Objects are probed with an exponential, then a binary, search, so only a logarithmic
+        number of objects are stat'ed, and the pool is never listed.
+        """
+
+        def obj_id_exists(obj_id):
+            return self.object_exists(storage_obj_name(table_name, obj_id, db_schema))
+
+        if not obj_id_exists(0): return 0
+
+        # obj_id_exists(lower_id) and not obj_id_exists(upper_id)
+        lower_id, upper_id = 0, 1
+        while obj_id_exists(upper_id):
+            lower_id, upper_id = upper_id, 2 * upper_id
+
+        while upper_id - lower_id > 1:
+            mid_id = (lower_id + upper_id) // 2
+
+            if obj_id_exists(mid_id):
+                lower_id = mid_id
+
+            else:
+                upper_id = mid_id
+
+        return upper_id
+
+    def peek_table_objects(self, table_name, start_obj=0, num_objs=1, db_schema='public',
+                           max_workers=16):
+        """
+        Generator that yields (object id, skyhook metadata, column schemas) for objects
+        `<db_schema>.<table_name>.<N>`, for N in [start_obj, start_obj + num_objs), in object id
+        order (see `peek_object`). Objects are peeked concurrently on `max_workers` threads.
+        """
+
+        def peek_object_id(obj_id):
+            return (obj_id, *self.peek_object(storage_obj_name(table_name, obj_id, db_schema)))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            yield from bounded_ordered_map(
+                executor, peek_object_id, range(start_obj, start_obj + num_objs), 2 * max_workers
+            )
+
+    def select_table_objects(self, table_name, stats_predicate, start_obj=0, num_objs=1,
+                             db_schema='public', max_workers=16):
+        """
+        Returns the ids of objects `<db_schema>.<table_name>.<N>`, for N in [start_obj, start_obj
+        + num_objs), in row groups for which `stats_predicate(column_stats)` is True (see
+        `select_row_group_partitions`), to pass to `read_table_batches`. Only the schemas of
+        objects are read, concurrently on `max_workers` threads (see `peek_object_schema`).
+        """
+
+        def peek_object_id(obj_id):
+            return self.peek_object_schema(storage_obj_name(table_name, obj_id, db_schema))
+
+        obj_ids = range(start_obj, start_obj + num_objs)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            obj_schemas = list(bounded_ordered_map(
+                executor, peek_object_id, obj_ids, 2 * max_workers
+            ))
+
+        return [
+            obj_ids[obj_ndx]
+            for obj_ndx in select_row_group_partitions(
+                [obj_schema.names for obj_schema in obj_schemas],
+                list(map(column_stats_from_schema, obj_schemas)),
+                stats_predicate
+            )
+        ]
+
+    def flush(self):
+        if self._default_writer is None: return []
+
+        return self._default_writer.flush()
+
+
+class RadosIOContextPool(object):
+    """
+    A pool of ioctx handles for a single Ceph pool. `lease` returns a RadosIOContext that, when
+    closed (or exited), returns its ioctx to this pool for reuse rather than closing it. Up to
+    `max_idle` ioctx handles are kept open; leasing and releasing are thread-safe.
+    """
+
+    logger = logging.getLogger('{}.{}'.format(__module__, __name__))
+    logger.setLevel(logging.INFO)
+
+    def __init__(self, cluster_conn, pool_name, max_idle=8, **kwargs):
+        super().__init__(**kwargs)
+
+        self.cluster_conn = cluster_conn
+        self.pool_name    = pool_name
+        self.max_idle     = max_idle
+
+        self._pool_lock   = threading.Lock()
+        self._idle        = []
+        self.is_closed    = False
+
+        # counts of opened ioctx handles and of leases, to observe reuse
+        self.open_count   = 0
+        self.lease_count  = 0
+
+    def lease(self):
+        with self._pool_lock:
+            if self.is_closed:
+                raise ValueError(f'ioctx pool for "{self.pool_name}" has been closed')
+
+            self.lease_count += 1
+            rados_io_ctx      = self._idle.pop() if self._idle else None
+
+            if rados_io_ctx is None: self.open_count += 1
+
+        # open outside of the lock, since it is a round trip to the cluster
+        if rados_io_ctx is None:
+            rados_io_ctx = self.cluster_conn.open_ioctx(self.pool_name)
+
+        return RadosIOContext(rados_io_ctx, io_context_pool=self)
+
+    def release(self, rados_io_ctx):
+        with self._pool_lock:
+            if not self.is_closed and len(self._idle) < self.max_idle:
+                self._idle.append(rados_io_ctx)
+                return
+
+        rados_io_ctx.close()
+
+    def close(self):
+        """
+        Closes idle ioctx handles. Handles that are still leased are closed when released.
+        """
+
+        with self._pool_lock:
+            self.is_closed       = True
+            idle_io_ctxs, self._idle = self._idle, []
+
+        for rados_io_ctx in idle_io_ctxs:
+            rados_io_ctx.close()
+
+        self.logger.info(
+            f'--- closed ioctx pool "{self.pool_name}" '
+            f'({self.open_count} opened for {self.lease_count} leases)'
         )
 
 
@@ -104,12 +909,38 @@ class RadosConnector(object):
 
         return cls(cluster_conn)
 
-    def __init__(self, cluster_conn, **kwargs):
+    @classmethod
+    def connection_for_local(cls, path_to_root, latency_s=0.0, bandwidth_bps=None, **kwargs):
+        """
+        Class method to initialize a RadosConnector instance over a local, filesystem-backed
+        stand-in for a cluster (see `skyhookdm.localrados`), with optionally injected latency and
+        bandwidth. This does not require the rados library.
+        """
+
+        cls.logger.info(f'local cluster: {path_to_root}')
+
+        return cls(
+            LocalRados(path_to_root, latency_s=latency_s, bandwidth_bps=bandwidth_bps),
+            **kwargs
+        )
+
+    def __init__(self, cluster_conn, max_idle_contexts=8, **kwargs):
         super().__init__(**kwargs)
 
         self.cluster_conn = cluster_conn
         self.is_connected = False
 
+        # ioctx pools, by Ceph pool name
+        self.max_idle_contexts = max_idle_contexts
+        self._io_context_pools = {}
+        self._pools_lock       = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
     def cluster_info(self):
         if not self.is_connected:
             return 'Not yet connected to cluster'
@@ -132,8 +963,37 @@ class RadosConnector(object):
 
         return self
 
+    def io_context_pool(self, pool_name):
+        with self._pools_lock:
+            if pool_name not in self._io_context_pools:
+                self._io_context_pools[pool_name] = RadosIOContextPool(
+                    self.cluster_conn, pool_name, max_idle=self.max_idle_contexts
+                )
+
+            return self._io_context_pools[pool_name]
+
     def context_for_pool(self, pool_name):
-        return RadosIOContext.for_cluster_pool(self.cluster_conn, pool_name)
+        """
+        Leases an ioctx for the given pool. The returned RadosIOContext returns the ioctx to this
+        connector's pool when closed or exited, so repeated calls reuse open handles.
+        """
+
+        return self.io_context_pool(pool_name).lease()
+
+    def shutdown(self):
+        """
+        Closes every pooled ioctx, then shuts down the cluster handle.
+        """
+
+        with self._pools_lock:
+            io_context_pools, self._io_context_pools = self._io_context_pools, {}
+
+        for io_context_pool in io_context_pools.values():
+            io_context_pool.close()
+
+        if self.is_connected:
+            self.cluster_conn.shutdown()
+            self.is_connected = False
 
 
 if __name__ == '__main__':
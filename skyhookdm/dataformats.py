@@ -5,20 +5,31 @@ For example, serialize a GeneExpression object into Arrow format (using RecordBa
 
 # core libraries
 import os
+import copy
+import glob
+import json
+import math
 import logging
+import itertools
+import concurrent.futures
 
 # dependencies
 import numpy
 import pyarrow
+import pyarrow.compute
 import pyarrow.parquet
 import flatbuffers
 
 # modules from this package
 from skyhookdm import skyhook
+from skyhookdm import instrumentation
 from skyhookdm.Tables import FB_Meta
 
+# classes
+from skyhookdm.rowformats import SkyhookFlexRows
+
 # functions
-from skyhookdm.util import batched_indices
+from skyhookdm.util import (batched_indices, bounded_ordered_map, partition_id_from_filename)
 
 # variables from this package
 from skyhookdm import (__skyhook_version__            ,
@@ -29,45 +40,775 @@ from skyhookdm import (__skyhook_version__            ,
 # Module-level Variables
 debug = True
 
+# default file extension used by SkyhookFileWriter for each partition file format
+partition_file_exts = {
+    'arrow'     : 'arrow'  ,
+    'parquet'   : 'parquet',
+    'flatbuffer': 'skyhook',
+}
+
+# file name of each partition: '<partition id>-<first column name>.<file extension>'
+partition_filename_template = '{:05d}-{}.{}'
+
+# codecs for compressing the data blob of FB_Meta, by name
+blob_compression_types = {
+    'lz4' : skyhook.CompressionTypes.LZ4 ,
+    'zstd': skyhook.CompressionTypes.ZSTD,
+}
+
+# keys of skyhook metadata in arrow schema metadata
+data_schema_key = b'data_schema'
+data_layout_key = b'data_layout'
+num_rows_key    = b'num_rows'
+
+# per-column statistics of a partition (see `skyhook.ColumnStats`), as JSON, are stored in its
+# arrow schema metadata under this key
+column_stats_key = b'column_stats'
+
+# vtable offsets of the `BlobData` and `BlobDeleted` fields of FB_Meta (see Tables/FB_Meta.py)
+blob_data_vtable_offset    = 6
+blob_deleted_vtable_offset = 10
+
+# rows of a partition file are marked deleted by a delete vector (one uint8 per row, non-zero if
+# deleted) in a file alongside it: '<partition file>.<delete vector file extension>'
+delete_vector_file_ext = 'deletes'
+
+# upper bound on the bytes of an FB_Meta flatbuffer before its data blob: the root offset, the
+# vtable and the table of fixed-size fields
+fb_meta_header_size = 128
+
+# bytes read first when peeking at the schema of a flatbuffer: enough for the FB_Meta header and
+# (for most partitions) the arrow schema message; a larger schema message takes a second read
+schema_peek_read_size = 64 * 1024
+
+# an arrow IPC message starts with a continuation marker (0xFFFFFFFF), then its metadata length
+# (before arrow 0.15, the metadata length alone)
+ipc_continuation_marker = b'\xff\xff\xff\xff'
+
+# run-query writes each partition of a result as an 8-byte (little-endian) length, then the data
+result_prefix_len = 8
+
 
 # ------------------------------
 # Static data conversion functions
-def arrow_binary_from_table(arrow_table):
+def arrow_binary_from_table(arrow_table, ipc_compression=None):
     arrow_buffer  = pyarrow.BufferOutputStream()
-    stream_writer = pyarrow.RecordBatchStreamWriter(arrow_buffer, arrow_table.schema)
 
-    for record_batch in arrow_table.to_batches():
-        stream_writer.write_batch(record_batch)
+    if ipc_compression is None:
+        stream_writer = pyarrow.RecordBatchStreamWriter(arrow_buffer, arrow_table.schema)
 
-    stream_writer.close()
+    else:
+        # compresses record batch bodies within the IPC stream ('lz4' or 'zstd'); readers
+        # decompress transparently. NOTE: IpcWriteOptions requires pyarrow >= 2.0
+        stream_writer = pyarrow.ipc.new_stream(
+            arrow_buffer,
+            arrow_table.schema,
+            options=pyarrow.ipc.IpcWriteOptions(compression=ipc_compression)
+        )
+
+    with instrumentation.span('arrow.encode'):
+        for record_batch in arrow_table.to_batches():
+            stream_writer.write_batch(record_batch)
+
+        stream_writer.close()
 
     return arrow_buffer.getvalue()
 
 
 def arrow_batches_from_binary(data_blob):
-    stream_reader = pyarrow.ipc.open_stream(data_blob)
+    with instrumentation.span('arrow.decode'):
+        stream_reader = pyarrow.ipc.open_stream(data_blob)
+        blob_batches  = [deserialized_batch for deserialized_batch in stream_reader]
 
-    return (
-        stream_reader.schema,
-        [deserialized_batch for deserialized_batch in stream_reader]
-    )
+    instrumentation.count('batches_decoded', len(blob_batches))
+    instrumentation.count('rows_decoded', sum(batch.num_rows for batch in blob_batches))
+
+    return stream_reader.schema, blob_batches
 
 
 def arrow_table_from_binary(data_blob):
     blob_schema, blob_batches = arrow_batches_from_binary(data_blob)
 
-    return pyarrow.Table.from_batches(blob_batches, schema=blob_schema)
+    return arrow_table_from_layout(pyarrow.Table.from_batches(blob_batches, schema=blob_schema))
+
+
+def data_layout_from_schema(arrow_schema):
+    schema_metadata = arrow_schema.metadata or {}
+
+    if data_layout_key not in schema_metadata: return skyhook.DataLayouts.DENSE
+
+    return int.from_bytes(schema_metadata[data_layout_key], byteorder='little')
+
+
+def arrow_schema_from_layout(arrow_schema):
+    """
+    Returns the dense (logical) schema for an arrow schema in any data layout. For a sparse
+    layout, the dense columns are described by the skyhook metadata.
+    """
+
+    if data_layout_from_schema(arrow_schema) == skyhook.DataLayouts.DENSE: return arrow_schema
+
+    skyhook_metadata = skyhook.SkyhookMetadata.from_byte_coercible(arrow_schema.metadata)
+    value_type       = arrow_schema.field(arrow_schema.get_field_index('value')).type
+
+    dense_metadata = skyhook_metadata._replace(
+        data_layout=skyhook.DataLayouts.DENSE
+    ).to_byte_coercible()
+
+    # statistics already describe the dense columns
+    if column_stats_key in arrow_schema.metadata:
+        dense_metadata[column_stats_key] = arrow_schema.metadata[column_stats_key]
+
+    return pyarrow.schema(
+        [
+            (column_schema.col_name, value_type)
+            for column_schema in skyhook_metadata.column_schemas()
+        ],
+        metadata=dense_metadata
+    )
+
+
+def arrow_table_from_layout(arrow_table):
+    """
+    Returns the dense (logical) arrow table for an arrow table in any data layout (see
+    `skyhook.DataLayouts`). Sparse tables are expanded, with a single vectorized scatter, into a
+    column-major matrix that backs each dense column without further copies.
+    """
+
+    if data_layout_from_schema(arrow_table.schema) == skyhook.DataLayouts.DENSE:
+        return arrow_table
+
+    dense_schema = arrow_schema_from_layout(arrow_table.schema)
+    value_type   = dense_schema.field(0).type if len(dense_schema) else pyarrow.null()
+
+    skyhook_metadata = skyhook.SkyhookMetadata.from_byte_coercible(arrow_table.schema.metadata)
+    column_schemas   = skyhook_metadata.column_schemas()
+
+    dense_matrix = numpy.zeros(
+        (skyhook_metadata.num_rows, len(column_schemas)),
+        dtype=value_type.to_pandas_dtype(),
+        order='F'
+    )
+
+    if arrow_table.num_rows:
+        col_ids = arrow_table.column('col_id').to_numpy()
+        row_ids = arrow_table.column('row_id').to_numpy()
+
+        dense_matrix[row_ids, col_ids - column_schemas[0].col_id] = (
+            arrow_table.column('value').to_numpy()
+        )
+
+    return pyarrow.Table.from_arrays(
+        arrow_arrays_from_matrix(dense_matrix, value_type),
+        schema=dense_schema
+    )
+
+
+def arrow_table_from_partitions(table_partitions):
+    """
+    Assembles a list of arrow tables, in order, into a single arrow table.
+
+    Partitions that all share a schema are row partitions, and are concatenated. Otherwise, the
+    partitions are treated as column partitions (as written by `SkyhookFileWriter`): columns are
+    combined, in partition order, into a single table. The skyhook metadata of the first partition
+    is kept, with the 'data_schema' of every partition joined together.
+    """
+
+    if not table_partitions: return None
+
+    # statistics of every partition are merged
+    partition_stats = [
+        column_stats_from_schema(tbl_part.schema) for tbl_part in table_partitions
+    ]
+
+    if any(column_stats is None for column_stats in partition_stats):
+        table_stats = None
+
+    else:
+        table_stats = merge_column_stats(partition_stats)
+
+    first_schema = table_partitions[0].schema
+    if all(tbl_part.schema.equals(first_schema) for tbl_part in table_partitions[1:]):
+        data_table = pyarrow.concat_tables(table_partitions)
+
+        if len(table_partitions) == 1: return data_table
+
+        table_metadata = dict(first_schema.metadata or {})
+        if num_rows_key in table_metadata:
+            table_metadata[num_rows_key] = data_table.num_rows.to_bytes(4, byteorder='little')
+
+        if table_stats is not None:
+            table_metadata[column_stats_key] = column_stats_as_json(table_stats)
+
+        return data_table.replace_schema_metadata(table_metadata or None)
+
+    table_metadata = dict(first_schema.metadata or {})
+    if data_schema_key in table_metadata:
+        table_metadata[data_schema_key] = b';'.join(
+            tbl_part.schema.metadata[data_schema_key]
+            for tbl_part in table_partitions
+            if tbl_part.schema.metadata and data_schema_key in tbl_part.schema.metadata
+        )
+
+    table_metadata.pop(column_stats_key, None)
+    if table_stats is not None:
+        table_metadata[column_stats_key] = column_stats_as_json(table_stats)
+
+    table_schema = pyarrow.schema(
+        list(itertools.chain.from_iterable(tbl_part.schema for tbl_part in table_partitions)),
+        metadata=table_metadata or None
+    )
+
+    return pyarrow.Table.from_arrays(
+        list(itertools.chain.from_iterable(tbl_part.columns for tbl_part in table_partitions)),
+        schema=table_schema
+    )
+
+
+def row_group_ids(partition_columns):
+    """
+    Returns the row group (an index) of each partition, given the column names of each partition,
+    in partition order. Partitions with disjoint columns (column partitions) hold the same rows
+    and are in the same group; a partition that repeats a column of the current group (e.g. the
+    first partition of rows appended to a table) starts a new group.
+    """
+
+    group_ids, group_columns = [], set()
+    for column_names in partition_columns:
+        if not group_ids or group_columns.intersection(column_names):
+            group_ids.append(group_ids[-1] + 1 if group_ids else 0)
+            group_columns = set()
+
+        else:
+            group_ids.append(group_ids[-1])
+
+        group_columns.update(column_names)
+
+    return group_ids
+
+
+def select_row_group_partitions(partition_columns, partition_stats, stats_predicate):
+    """
+    Returns the indices of partitions, given the column names and column statistics of each (in
+    partition order), that are in row groups (see `row_group_ids`) for which
+    `stats_predicate(column_stats)` is True, given the merged statistics of the group's
+    partitions. Each row partition is decided separately; column partitions hold the same rows,
+    so the partitions that hold a predicate's columns decide for every partition of their group.
+    """
+
+    partition_columns = list(partition_columns)
+    group_ids         = row_group_ids(partition_columns)
+
+    group_stats = {}
+    for group_id, column_stats in zip(group_ids, partition_stats):
+        group_stats.setdefault(group_id, []).append(column_stats or {})
+
+    selected_groups = {
+        group_id
+        for group_id, stats_list in group_stats.items()
+        if stats_predicate(merge_column_stats(stats_list))
+    }
+
+    return [
+        partition_ndx
+        for partition_ndx, group_id in enumerate(group_ids)
+        if group_id in selected_groups
+    ]
+
+
+def arrow_table_from_row_groups(table_partitions, group_ids):
+    """
+    Assembles a list of arrow tables, in order, into a single arrow table, where `group_ids` is
+    the row group of each table (see `row_group_ids`). Tables of each row group are combined as
+    column partitions, and row groups are then concatenated (see `arrow_table_from_partitions`).
+    """
+
+    row_group_tables = {}
+    for tbl_part, group_id in zip(table_partitions, group_ids):
+        row_group_tables.setdefault(group_id, []).append(tbl_part)
+
+    return arrow_table_from_partitions([
+        arrow_table_from_partitions(row_group_tables[group_id])
+        for group_id in sorted(row_group_tables)
+    ])
+
+
+def project_arrow_table(arrow_table, column_names):
+    """
+    Returns an arrow table with only the given columns, in the given order. The skyhook
+    'data_schema' metadata, if present, is narrowed to the same columns.
+    """
+
+    table_schema = arrow_table.schema
+    table_fields = [
+        table_schema.field(table_schema.get_field_index(column_name))
+        for column_name in column_names
+    ]
+
+    table_metadata = dict(table_schema.metadata or {})
+    if data_schema_key in table_metadata:
+        # each column schema is: '<col_id> <type> <is_key> <is_nullable> <col_name>'
+        projected_cols = set(column_names)
+        table_metadata[data_schema_key] = b';'.join(
+            column_schema
+            for column_schema in table_metadata[data_schema_key].split(b';')
+            if column_schema.split(b' ', 4)[-1].decode('utf-8') in projected_cols
+        )
+
+    column_stats = column_stats_from_schema(table_schema)
+    if column_stats is not None:
+        table_metadata[column_stats_key] = column_stats_as_json({
+            column_name: column_stats[column_name]
+            for column_name in column_names if column_name in column_stats
+        })
+
+    return pyarrow.Table.from_arrays(
+        [arrow_table.column(column_name) for column_name in column_names],
+        schema=pyarrow.schema(table_fields, metadata=table_metadata or None)
+    )
+
+
+def partition_files_in_dir(path_to_directory, file_ext='arrow'):
+    """
+    Returns (partition id, path) pairs for partition files in a directory, sorted by the partition
+    id embedded in each filename. Files without a partition id are sorted last, by name.
+    """
+
+    partition_files = [
+        (partition_id_from_filename(partition_file), partition_file)
+        for partition_file in os.listdir(path_to_directory)
+        if partition_file.endswith(f'.{file_ext}')
+    ]
+
+    return [
+        (partition_id, os.path.join(path_to_directory, partition_file))
+        for partition_id, partition_file in sorted(
+            partition_files,
+            key=lambda file_info: (file_info[0] is None, file_info[0] or 0, file_info[1])
+        )
+    ]
+
+
+def file_format_for_ext(file_ext):
+    """
+    Returns the partition file format (a key of `partition_file_exts`) of partition files with
+    the given extension, which may be qualified (e.g. 'genes.skyhook' for flatbuffer). Unknown
+    extensions are assumed to be arrow.
+    """
+
+    ext_suffix = file_ext.rsplit('.', 1)[-1]
+
+    for file_format, format_ext in partition_file_exts.items():
+        if format_ext == ext_suffix: return file_format
+
+    return 'arrow'
+
+
+def arrow_arrays_from_matrix(column_major_matrix, arrow_type):
+    """
+    Returns a list of arrow arrays, one for each column of a 2-d ndarray. Each column of a
+    column-major (Fortran-ordered) ndarray is contiguous, so when the ndarray's dtype matches
+    `arrow_type`, each arrow array is a zero-copy view of the ndarray's memory.
+    """
+
+    return [
+        pyarrow.array(column_major_matrix[:, col_ndx], type=arrow_type)
+        for col_ndx in range(column_major_matrix.shape[1])
+    ]
+
+
+def dictionary_encoded_arrays(arrow_arrays, dictionary_threshold):
+    """
+    Dictionary-encodes each string array with low cardinality: at most `dictionary_threshold` (a
+    fraction of the array's length) distinct values. Other arrays are returned as-is.
+    """
+
+    def encode_if_low_cardinality(arrow_array):
+        if not pyarrow.types.is_string(arrow_array.type) or not len(arrow_array):
+            return arrow_array
+
+        if len(arrow_array.unique()) > dictionary_threshold * len(arrow_array):
+            return arrow_array
+
+        return arrow_array.dictionary_encode()
+
+    return [encode_if_low_cardinality(arrow_array) for arrow_array in arrow_arrays]
+
+
+def is_nan(stat_value):
+    return isinstance(stat_value, float) and math.isnan(stat_value)
+
+
+def column_stats_from_matrix(column_names, column_major_matrix):
+    """
+    Returns a dictionary of column name -> skyhook.ColumnStats for each column of a numeric 2-d
+    ndarray. Each statistic is a single vectorized reduction over every column at once.
+
+    NaN is unordered, so the minimum and maximum of a column holding NaN are NaN (a range that
+    rules out no predicate; see `engines.comparison_may_match`).
+    """
+
+    column_count = column_major_matrix.shape[1]
+
+    if not column_major_matrix.shape[0]:
+        col_mins = col_maxs = [None] * column_count
+
+    else:
+        col_mins = column_major_matrix.min(axis=0).tolist()
+        col_maxs = column_major_matrix.max(axis=0).tolist()
+
+    nonzero_counts = numpy.count_nonzero(column_major_matrix, axis=0).tolist()
+
+    return {
+        column_name: skyhook.ColumnStats(col_min, col_max, 0, nonzero_count)
+        for column_name, col_min, col_max, nonzero_count in zip(
+            column_names, col_mins, col_maxs, nonzero_counts
+        )
+    }
+
+
+def column_stats_from_arrays(column_names, arrow_arrays):
+    """
+    Returns a dictionary of column name -> skyhook.ColumnStats for arrow arrays of any type
+    (e.g. strings), using arrow compute kernels (pyarrow >= 1.0).
+    """
+
+    column_stats = {}
+    for column_name, arrow_array in zip(column_names, arrow_arrays):
+        min_max       = pyarrow.compute.min_max(arrow_array).as_py()
+        nonzero_count = None
+
+        array_type = arrow_array.type
+        if pyarrow.types.is_integer(array_type) or pyarrow.types.is_floating(array_type):
+            nonzero_count = pyarrow.compute.sum(
+                pyarrow.compute.not_equal(arrow_array, 0).cast(pyarrow.int64())
+            ).as_py() or 0
+
+        # min_max skips NaN, but (as for `column_stats_from_matrix`) NaN makes the range unknown
+        has_nan = pyarrow.types.is_floating(array_type) and pyarrow.compute.any(
+            pyarrow.compute.is_nan(arrow_array)
+        ).as_py()
+
+        if has_nan: min_max = {'min': math.nan, 'max': math.nan}
+
+        column_stats[column_name] = skyhook.ColumnStats(
+            min_max['min'], min_max['max'], arrow_array.null_count, nonzero_count
+        )
+
+    return column_stats
+
+
+def column_stats_from_sparse(column_names, col_offsets, values, num_rows):
+    """
+    Returns a dictionary of column name -> skyhook.ColumnStats for the dense columns of a sparse
+    (CSC) slice, given the column offset of each stored value (sorted by column). Values that are
+    not stored are zeros, which are included in the range of any column that has them.
+    """
+
+    column_count   = len(column_names)
+    values         = numpy.asarray(values)
+    nonzero_counts = numpy.bincount(
+        col_offsets, weights=(values != 0), minlength=column_count
+    ).astype(numpy.int64)
+
+    col_mins = numpy.zeros(column_count, dtype=values.dtype)
+    col_maxs = numpy.zeros(column_count, dtype=values.dtype)
+
+    if len(values):
+        # values of each column are contiguous, so each column is one segment of a reduceat
+        value_counts   = numpy.bincount(col_offsets, minlength=column_count)
+        stored_cols    = numpy.flatnonzero(value_counts)
+        segment_starts = numpy.concatenate(([0], numpy.cumsum(value_counts[stored_cols])[:-1]))
+
+        col_mins[stored_cols] = numpy.minimum.reduceat(values, segment_starts)
+        col_maxs[stored_cols] = numpy.maximum.reduceat(values, segment_starts)
+
+        has_zeros = value_counts < num_rows
+        col_mins[has_zeros] = numpy.minimum(col_mins[has_zeros], 0)
+        col_maxs[has_zeros] = numpy.maximum(col_maxs[has_zeros], 0)
+
+    if not num_rows:
+        col_mins = col_maxs = [None] * column_count
+
+    else:
+        col_mins, col_maxs = col_mins.tolist(), col_maxs.tolist()
+
+    return {
+        column_name: skyhook.ColumnStats(col_min, col_max, 0, nonzero_count)
+        for column_name, col_min, col_max, nonzero_count in zip(
+            column_names, col_mins, col_maxs, nonzero_counts.tolist()
+        )
+    }
+
+
+def merge_column_stats(column_stats_list):
+    """
+    Merges dictionaries of column name -> skyhook.ColumnStats, such as the statistics of row
+    partitions (which share columns) or of column partitions (which do not).
+    """
+
+    def merge_stat(merge_fn, stat_a, stat_b):
+        if stat_a is None: return stat_b
+        if stat_b is None: return stat_a
+
+        # an unknown (NaN) range stays unknown; `min` and `max` would drop NaN, or not, by order
+        if is_nan(stat_a): return stat_a
+        if is_nan(stat_b): return stat_b
+
+        return merge_fn(stat_a, stat_b)
+
+    merged_stats = {}
+    for column_stats in column_stats_list:
+        for column_name, stats_b in column_stats.items():
+            stats_a = merged_stats.get(column_name)
+
+            if stats_a is None:
+                merged_stats[column_name] = stats_b
+                continue
+
+            merged_stats[column_name] = skyhook.ColumnStats(
+                merge_stat(min, stats_a.min, stats_b.min),
+                merge_stat(max, stats_a.max, stats_b.max),
+                stats_a.null_count + stats_b.null_count,
+                merge_stat(lambda count_a, count_b: count_a + count_b,
+                           stats_a.nonzero_count, stats_b.nonzero_count)
+            )
+
+    return merged_stats
+
+
+def column_stats_as_json(column_stats):
+    return json.dumps(
+        {column_name: list(stats) for column_name, stats in column_stats.items()},
+        separators=(',', ':')
+    ).encode('utf-8')
+
+
+def column_stats_from_schema(arrow_schema):
+    """
+    Returns the column statistics stored in an arrow schema's metadata, or None if the schema has
+    none (e.g. partitions written before statistics were recorded).
+    """
+
+    schema_metadata = arrow_schema.metadata or {}
+    if column_stats_key not in schema_metadata: return None
+
+    return {
+        column_name: skyhook.ColumnStats(*stats)
+        for column_name, stats in json.loads(schema_metadata[column_stats_key]).items()
+    }
+
+
+def schema_with_column_stats(arrow_schema, column_stats):
+    schema_metadata = dict(arrow_schema.metadata or {})
+    schema_metadata[column_stats_key] = column_stats_as_json(column_stats)
+
+    return arrow_schema.with_metadata(schema_metadata)
+
+
+def skyhook_metadata_from_schema(arrow_schema):
+    """
+    Returns the skyhook metadata of an arrow schema and the ColumnSchema of each (dense) column
+    it describes.
+    """
+
+    skyhook_metadata = skyhook.SkyhookMetadata.from_byte_coercible(arrow_schema.metadata)
+
+    return skyhook_metadata, skyhook_metadata.column_schemas()
+
+
+def range_reader_for_file(input_handle):
+    """
+    Returns a function, `read_range(offset, length)`, that reads up to `length` bytes at `offset`
+    of an open (binary) file.
+    """
+
+    def read_range(offset, length):
+        input_handle.seek(offset)
+        binary_data = input_handle.read(length)
+
+        instrumentation.count('bytes_read', len(binary_data))
+
+        return binary_data
+
+    return read_range
+
+
+def path_for_delete_vector(path_to_partition):
+    return '{}.{}'.format(path_to_partition, delete_vector_file_ext)
+
+
+def read_delete_vector(path_to_partition):
+    """
+    Returns the delete vector of a partition file (see `delete_vector_file_ext`), or None if no
+    rows of the partition are marked deleted.
+    """
+
+    path_to_deletes = path_for_delete_vector(path_to_partition)
+
+    if not os.path.isfile(path_to_deletes): return None
+
+    delete_vector = numpy.fromfile(path_to_deletes, dtype=numpy.uint8)
+    instrumentation.count('bytes_read', delete_vector.nbytes)
+
+    return delete_vector
+
+
+def merge_delete_vector(delete_vector, num_rows, row_ndx):
+    """
+    Returns a copy of a delete vector (or, if None, a new one for `num_rows` rows) with the rows
+    at `row_ndx` (anything that indexes a numpy array, e.g. a list of indices or a slice) marked
+    deleted.
+    """
+
+    if delete_vector is None:
+        merged_vector = numpy.zeros(num_rows, dtype=numpy.uint8)
+
+    elif len(delete_vector) != num_rows:
+        raise ValueError(f'Delete vector has {len(delete_vector)} rows, expected {num_rows}')
+
+    else:
+        merged_vector = numpy.array(delete_vector, dtype=numpy.uint8)
+
+    merged_vector[row_ndx] = 1
+
+    return merged_vector
+
+
+def union_delete_vectors(delete_vectors):
+    """
+    Returns a delete vector that marks deleted every row that any of the given delete vectors
+    (None for data without deleted rows) marks deleted, or None if none of them mark rows deleted.
+    Delete vectors must be for the same rows, e.g. of column partitions in the same row group.
+    """
+
+    delete_vectors = [
+        delete_vector for delete_vector in delete_vectors if delete_vector is not None
+    ]
+
+    if not delete_vectors: return None
+
+    return numpy.logical_or.reduce(delete_vectors).astype(numpy.uint8)
+
+
+def all_rows_deleted(delete_vector):
+    """
+    Returns True if a delete vector marks every row deleted, in which case the data it applies to
+    need not be read or decoded at all.
+    """
+
+    return delete_vector is not None and len(delete_vector) > 0 and bool(delete_vector.all())
+
+
+def apply_delete_vector(arrow_data, delete_vector):
+    """
+    Returns an arrow table (or record batch) without the rows that a delete vector marks deleted,
+    using a single vectorized filter. Data is returned as is if no rows are deleted.
+    """
+
+    if delete_vector is None: return arrow_data
+
+    if len(delete_vector) != arrow_data.num_rows:
+        raise ValueError('Delete vector has {} rows, data has {}'.format(
+            len(delete_vector), arrow_data.num_rows
+        ))
+
+    deleted_count = int(numpy.count_nonzero(delete_vector))
+    if not deleted_count: return arrow_data
+
+    with instrumentation.span('arrow.filter_deleted'):
+        filtered_data = arrow_data.filter(pyarrow.array(delete_vector == 0))
+
+    instrumentation.count('rows_deleted', deleted_count)
+
+    return filtered_data
+
+
+def binary_from_file(path_to_infile, use_mmap=False):
+    """
+    Returns the contents of the given file. By default, the file is read into a `bytes` object.
+
+    If `use_mmap` is True, the file is memory-mapped and a `pyarrow.Buffer` over the mapping is
+    returned instead. Nothing is copied into process memory; slices of the returned buffer, and
+    any arrow data decoded from it, reference the mapped pages directly.
+    """
+
+    if use_mmap:
+        binary_data = pyarrow.memory_map(path_to_infile, 'r').read_buffer()
+        instrumentation.count('bytes_mapped', binary_data.size)
+
+        return binary_data
+
+    with instrumentation.span('file.read'), open(path_to_infile, 'rb') as input_handle:
+        binary_data = input_handle.read()
+
+    instrumentation.count('bytes_read', len(binary_data))
+
+    return binary_data
+
+
+def read_exactly(binary_stream, byte_count):
+    """
+    Reads exactly `byte_count` bytes from a binary stream (e.g. a pipe, which may return fewer
+    bytes per read) into a single preallocated `bytearray`. Returns None if the stream is at its
+    end, and raises EOFError if it ends partway.
+    """
+
+    data_blob  = bytearray(byte_count)
+    data_view  = memoryview(data_blob)
+    bytes_read = 0
+
+    while bytes_read < byte_count:
+        chunk_size = binary_stream.readinto(data_view[bytes_read:])
+
+        if not chunk_size:
+            if bytes_read == 0: return None
+
+            raise EOFError(f'Stream ended after {bytes_read} of {byte_count} bytes')
+
+        bytes_read += chunk_size
+
+    return data_blob
 
 
 # ------------------------------
 # Classes
+class DomainDataRows(object):
+    """
+    A view of rows [row_start, row_end) of the domain data wrapped by a `SkyhookDataWrapper`,
+    with the same interface (named columns, a shape, and column slices as arrays).
+    """
+
+    def __init__(self, domain_data, row_start, row_end, **kwargs):
+        super().__init__(**kwargs)
+
+        self.domain_data = domain_data
+        self.row_start   = row_start
+        self.row_end     = row_end
+
+    @property
+    def shape(self):
+        return (self.row_end - self.row_start, self.domain_data.shape[1])
+
+    def astype(self, dtype):
+        return self.__class__(self.domain_data.astype(dtype), self.row_start, self.row_end)
+
+    def columns(self, from_col=None, to_col=None):
+        return self.domain_data.columns(from_col, to_col)
+
+    def data_as_array(self, from_col=None, to_col=None):
+        return self.domain_data.data_as_array(from_col, to_col)[self.row_start:self.row_end]
+
+
 class SkyhookDataWrapper(object):
     logger = logging.getLogger('{}.{}'.format(__module__, __name__))
     logger.setLevel(logging.INFO)
 
     def __init__(self, table_name, domain_dataset,
                  type_for_numpy, type_for_arrow, type_for_skyhook,
-                 db_schema='public',**kwargs):
+                 db_schema='public', column_major=False,
+                 data_layout=skyhook.DataLayouts.DENSE, dictionary_threshold=0.5,
+                 column_offset=0, **kwargs):
 
         super().__init__(**kwargs)
 
@@ -82,6 +823,76 @@ class SkyhookDataWrapper(object):
         # Skyhook metadata
         self.db_schema      = db_schema
         self.table_name     = table_name
+        self.data_layout    = data_layout
+
+        # column ids (see `skyhook.ColumnSchema`) start after this many columns, e.g. when these
+        # columns are appended to an existing table
+        self.column_offset  = column_offset
+
+        # string columns with at most this fraction of distinct values are dictionary-encoded;
+        # None disables dictionary encoding
+        self.dictionary_threshold = dictionary_threshold
+
+        # column-major copy of the domain data (see `layout_column_major`)
+        self._column_major_data = None
+        if column_major: self.layout_column_major()
+
+    def with_column_offset(self, column_offset):
+        """
+        Returns a wrapper of the same domain data (and column-major layout, if any; nothing is
+        copied), whose column ids start after `column_offset` columns. This wrapper is unchanged.
+        """
+
+        offset_wrapper               = copy.copy(self)
+        offset_wrapper.column_offset = column_offset
+
+        return offset_wrapper
+
+    def with_rows(self, row_start, row_end):
+        """
+        Returns a wrapper of rows [row_start, row_end) of the domain data (see `DomainDataRows`),
+        with the same column ids. Rows of a column-major layout are views; nothing is copied.
+        """
+
+        rows_wrapper             = copy.copy(self)
+        rows_wrapper.domain_data = DomainDataRows(self.domain_data, row_start, row_end)
+
+        if self._column_major_data is not None:
+            rows_wrapper._column_major_data = self._column_major_data[row_start:row_end]
+
+        return rows_wrapper
+
+    def layout_column_major(self):
+        """
+        Lays out the entire domain data column-major, once. Afterwards, every arrow table (or
+        partition) is constructed from views of this layout, without copying any data. This holds
+        a second copy of the domain data in memory, which is worthwhile when the data is converted
+        more than once or when the domain data is already column-major (no copy is made).
+        """
+
+        self.logger.info('>>> laying out domain data column-major')
+        self._column_major_data = numpy.asfortranarray(self.domain_data.data_as_array())
+        self.logger.info('<<< domain data laid out')
+
+        return self
+
+    def column_major_data(self, from_col=None, to_col=None):
+        """
+        Returns a slice of columns of the domain data as a column-major ndarray. This is a view
+        if the domain data was laid out column-major (or its slice already is column-major);
+        otherwise, the slice is copied exactly once.
+        """
+
+        if self._column_major_data is not None:
+            return self._column_major_data[:, from_col:to_col]
+
+        data_slice        = self.domain_data.data_as_array(from_col=from_col, to_col=to_col)
+        column_major_data = numpy.asfortranarray(data_slice)
+
+        if not numpy.may_share_memory(column_major_data, data_slice):
+            instrumentation.count('bytes_copied', column_major_data.nbytes)
+
+        return column_major_data
 
     def table_schema(self, from_col_ndx=None, to_col_ndx=None):
         return pyarrow.schema([
@@ -92,7 +903,7 @@ class SkyhookDataWrapper(object):
     def skyhook_data_schema(self, from_col_ndx=0, to_col_ndx=None):
         col_iterator = enumerate(
             self.domain_data.columns(from_col_ndx, to_col_ndx),
-            start=from_col_ndx
+            start=self.column_offset + from_col_ndx
         )
 
         return [
@@ -127,27 +938,75 @@ class SkyhookDataWrapper(object):
             data_schema_as_str                ,
             self.db_schema                    ,
             self.table_name                   ,
-            self.domain_data.shape[0]
+            self.domain_data.shape[0]         ,
+            self.data_layout
         )
 
     def as_arrow_table(self, data_schema):
         """
         Creates an Arrow Table with the given data schema.
 
-        Using `hsplit` and `ravel`, the domain_data matrix (or ndarray) is converted into a list of
-        1-d arrays. First, `hsplit()` returns a list of ndarrays; second, `ravel()` is applied to
-        each list from `hsplit()` to list of <array_like> objects.
+        The domain_data matrix (or ndarray) is laid out column-major, so that each column is
+        contiguous, and each column is then wrapped as an arrow array without a copy (see
+        `arrow_arrays_from_matrix`).
         """
 
-        # Converts a matrix (or ndarray) into a list of 1-d arrays.
-        column_data_arrays = list(map(
-            numpy.ravel,
-            numpy.hsplit(self.domain_data.data_as_array(), self.domain_data.shape[1])
-        ))
+        column_data_arrays = arrow_arrays_from_matrix(self.column_major_data(), self.arrow_type)
 
         return pyarrow.Table.from_arrays(column_data_arrays, schema=data_schema)
 
+    def as_sparse_arrow_table(self, start=0, end=None):
+        """
+        Creates an Arrow Table in the sparse (CSC) layout (see `skyhook.DataLayouts`), containing
+        only the non-zero values of columns [start, end) of the domain data. Domain data that is
+        already sparse (scipy.sparse matrices) is never densified.
+        """
+
+        data_slice = self.domain_data.data_as_array(from_col=start, to_col=end)
+
+        if hasattr(data_slice, 'tocsc'):
+            csc_slice = data_slice.tocsc()
+            csc_slice.sort_indices()
+
+            coo_slice = csc_slice.tocoo()
+            col_offsets, row_ids, values = coo_slice.col, coo_slice.row, coo_slice.data
+
+        else:
+            # transposing a column-major slice gives a row-major view, whose non-zero indices are
+            # sorted by column then row
+            cols_by_rows         = numpy.asarray(data_slice).T
+            col_offsets, row_ids = numpy.nonzero(cols_by_rows)
+            values               = cols_by_rows[col_offsets, row_ids]
+
+        sparse_schema = schema_with_column_stats(
+            pyarrow.schema([
+                ('col_id', pyarrow.uint32()),
+                ('row_id', pyarrow.uint32()),
+                ('value' , self.arrow_type ),
+            ]).with_metadata(self.schema_skyhook_metadata(start, end).to_byte_coercible()),
+            column_stats_from_sparse(
+                self.domain_data.columns(start, end), col_offsets, values,
+                self.domain_data.shape[0]
+            )
+        )
+
+        return pyarrow.Table.from_arrays(
+            [
+                pyarrow.array(
+                    (col_offsets + self.column_offset + start).astype(numpy.uint32),
+                    type=pyarrow.uint32()
+                ),
+                pyarrow.array(row_ids.astype(numpy.uint32), type=pyarrow.uint32()),
+                pyarrow.array(numpy.asarray(values), type=self.arrow_type),
+            ],
+            schema=sparse_schema
+        )
+
+    @instrumentation.spanned('wrapper.build_partition')
     def as_partitioned_arrow_table(self, start=0, end=None):
+        if self.data_layout == skyhook.DataLayouts.SPARSE_CSC:
+            return self.as_sparse_arrow_table(start=start, end=end)
+
         # ------------------------------
         # Construct schema for table partition
         self.logger.info('>>> constructing schema for partition ({}:{})'.format(
@@ -168,7 +1027,7 @@ class SkyhookDataWrapper(object):
         # Get slice of domain data as arrays
         self.logger.info('>>> extracting cell expression slice')
 
-        domain_data_as_array = self.domain_data.data_as_array(from_col=start, to_col=end)
+        domain_data_as_array = self.column_major_data(from_col=start, to_col=end)
 
         self.logger.info('<<< cell expression slice extracted')
 
@@ -179,14 +1038,39 @@ class SkyhookDataWrapper(object):
             print(f'[ERROR]\n\t{table_schema_and_meta}')
             print(f'[ERROR]\n\t{domain_data_as_array[:5,:5]}')
 
+        column_data_arrays = arrow_arrays_from_matrix(domain_data_as_array, self.arrow_type)
+
+        # ------------------------------
+        # Compute statistics of each column (before any dictionary encoding)
+        if numpy.issubdtype(domain_data_as_array.dtype, numpy.number):
+            column_stats = column_stats_from_matrix(
+                table_schema_and_meta.names, domain_data_as_array
+            )
+
+        else:
+            column_stats = column_stats_from_arrays(
+                table_schema_and_meta.names, column_data_arrays
+            )
+
+        table_schema_and_meta = schema_with_column_stats(table_schema_and_meta, column_stats)
+
+        # repeated labels in string columns (e.g. cell types) are stored once per partition
+        if self.dictionary_threshold is not None and pyarrow.types.is_string(self.arrow_type):
+            column_data_arrays    = dictionary_encoded_arrays(
+                column_data_arrays, self.dictionary_threshold
+            )
+            table_schema_and_meta = pyarrow.schema(
+                [
+                    pyarrow.field(column_name, column_data.type)
+                    for column_name, column_data in zip(
+                        table_schema_and_meta.names, column_data_arrays
+                    )
+                ],
+                metadata=table_schema_and_meta.metadata
+            )
+
         # Create and return arrow table
-        return pyarrow.Table.from_arrays(
-            list(map(
-                numpy.ravel,
-                numpy.hsplit(domain_data_as_array, domain_data_as_array.shape[1])
-            )),
-            schema=table_schema_and_meta
-        )
+        return pyarrow.Table.from_arrays(column_data_arrays, schema=table_schema_and_meta)
 
     def batched_table_partitions(self, batch_size=1000, column_count=None):
         if column_count is None: column_count = self.domain_data.shape[1]
@@ -200,36 +1084,172 @@ class SkyhookFlatbufferMeta(object):
     logger = logging.getLogger('{}.{}'.format(__module__, __name__))
     logger.setLevel(logging.INFO)
 
+    # formats of data blobs that can be decoded into arrow
+    supported_data_formats = (
+        skyhook.FormatTypes.SFT_ARROW           ,
+        skyhook.FormatTypes.SFT_FLATBUF_FLEX_ROW,
+    )
+
     @classmethod
     def from_binary_flatbuffer(cls, flatbuffer_binary, offset=0):
         return cls(FB_Meta.FB_Meta.GetRootAsFB_Meta(flatbuffer_binary, offset))
 
     @classmethod
-    def binary_from_arrow_binary(cls, binary_arrow_table):
-        # initialize a flatbuffer builder with a count of expected contiguous bytes needed,
-        # accommodating each fixed-size field of the FB_Meta flatbuffer
-        partial_byte_count = (4 + 8 + 4 + 8 + 8 + 4)
-        builder = flatbuffers.Builder(partial_byte_count + len(binary_arrow_table))
-
-        # add the serialized data first (build flatbuffer from back to front)
-        wrapped_data_blob = builder.CreateByteVector(binary_arrow_table)
+    def binary_from_arrow_binary(cls, binary_arrow_table, compression=None):
+        """
+        Wraps serialized arrow data in an FB_Meta flatbuffer. If `compression` is given ('lz4' or
+        'zstd'), the data blob is compressed: `BlobCompression` records the codec and
+        `BlobOrigLen` records the uncompressed size.
+        """
+
+        return cls.binary_from_data_blob(
+            binary_arrow_table, skyhook.FormatTypes.SFT_ARROW, compression=compression
+        )
+
+    @classmethod
+    def binary_from_flex_rows(cls, arrow_table, compression=None):
+        """
+        Wraps the rows of an arrow table, as a SkyhookDM row-oriented `Table` flatbuffer (see
+        `SkyhookFlexRows`), in an FB_Meta flatbuffer.
+        """
+
+        return cls.binary_from_data_blob(
+            SkyhookFlexRows.binary_from_arrow_table(arrow_table_from_layout(arrow_table)),
+            skyhook.FormatTypes.SFT_FLATBUF_FLEX_ROW,
+            compression=compression
+        )
+
+    @classmethod
+    def binary_from_data_blob(cls, data_blob, data_format, compression=None, blob_deleted=False):
+        """
+        Wraps a data blob of the given format (a `skyhook.FormatTypes` value) in an FB_Meta
+        flatbuffer (see `binary_from_arrow_binary`).
 
-        # construct the remaining flatbuffer structure
-        FB_Meta.FB_MetaStart(builder)
+        `BlobDeleted` is always stored, even when False (the default value, which flatbuffers
+        would otherwise omit), so that the blob can later be marked deleted in place (see
+        `blob_deleted_position`).
+        """
+
+        orig_len = len(data_blob)
+
+        if compression is None:
+            compression_type = skyhook.CompressionTypes.NONE
+
+        else:
+            compression_type = blob_compression_types[compression]
+
+            with instrumentation.span('flatbuffer.compress'):
+                data_blob = pyarrow.compress(data_blob, codec=compression, asbytes=True)
+
+        # flatbuffers only accepts `bytes` for byte vectors (not, e.g., a `pyarrow.Buffer`)
+        if not isinstance(data_blob, bytes):
+            data_blob = memoryview(data_blob).tobytes()
+            instrumentation.count('bytes_copied', len(data_blob))
+
+        # the builder copies the blob into the flatbuffer
+        instrumentation.count('bytes_copied', len(data_blob))
 
-        FB_Meta.FB_MetaAddBlobFormat(builder, skyhook.FormatTypes.SFT_ARROW)
-        FB_Meta.FB_MetaAddBlobData(builder, wrapped_data_blob)
-        FB_Meta.FB_MetaAddBlobSize(builder, len(binary_arrow_table))
-        FB_Meta.FB_MetaAddBlobDeleted(builder, False)
-        FB_Meta.FB_MetaAddBlobOrigOff(builder, 0)
-        FB_Meta.FB_MetaAddBlobOrigLen(builder, len(binary_arrow_table))
-        FB_Meta.FB_MetaAddBlobCompression(builder, 0)
+        with instrumentation.span('flatbuffer.encode'):
+            # initialize a flatbuffer builder with a count of expected contiguous bytes needed,
+            # accommodating each fixed-size field of the FB_Meta flatbuffer
+            partial_byte_count = (4 + 8 + 4 + 8 + 8 + 4)
+            builder = flatbuffers.Builder(partial_byte_count + len(data_blob))
 
-        builder.Finish(FB_Meta.FB_MetaEnd(builder))
+            # add the serialized data first (build flatbuffer from back to front)
+            wrapped_data_blob = builder.CreateByteVector(data_blob)
 
-        # return the finished binary blob representing FBMeta(<Arrow binary>)
+            # construct the remaining flatbuffer structure
+            FB_Meta.FB_MetaStart(builder)
+
+            FB_Meta.FB_MetaAddBlobFormat(builder, data_format)
+            FB_Meta.FB_MetaAddBlobData(builder, wrapped_data_blob)
+            FB_Meta.FB_MetaAddBlobSize(builder, len(data_blob))
+            builder.PrependBool(blob_deleted)
+            builder.Slot(3)
+            FB_Meta.FB_MetaAddBlobOrigOff(builder, 0)
+            FB_Meta.FB_MetaAddBlobOrigLen(builder, orig_len)
+            FB_Meta.FB_MetaAddBlobCompression(builder, compression_type)
+
+            builder.Finish(FB_Meta.FB_MetaEnd(builder))
+
+        # return the finished binary blob representing FBMeta(<data blob>)
         return builder.Output()
 
+    @classmethod
+    def read_arrow_schema(cls, read_range, offset=0, read_size=schema_peek_read_size):
+        """
+        Returns the arrow schema of the data wrapped by an FB_Meta flatbuffer, reading only the
+        flatbuffer's header and the schema message at the start of its data blob (an arrow IPC
+        stream); record batches are neither read nor decoded. `read_range(offset, length)` reads
+        up to `length` bytes at `offset` of a file or object in which the flatbuffer starts at
+        `offset` (see `range_reader_for_file`).
+
+        A compressed blob must be decompressed to reach its schema message, so it is read whole,
+        as is a row-oriented blob (SFT_FLATBUF_FLEX_ROW), though its rows are not decoded.
+        """
+
+        binary_data = read_range(offset, max(read_size, fb_meta_header_size))
+
+        def read_through(end_ndx):
+            nonlocal binary_data
+
+            if len(binary_data) < end_ndx:
+                binary_data += read_range(offset + len(binary_data), end_ndx - len(binary_data))
+
+            if len(binary_data) < end_ndx:
+                raise EOFError(f'Flatbuffer ended after {len(binary_data)} of {end_ndx} bytes')
+
+        fb_meta     = cls.from_binary_flatbuffer(binary_data)
+        data_format = fb_meta.get_data_format()
+
+        if data_format not in cls.supported_data_formats:
+            readable_format = skyhook.FormatTypes.from_value(data_format)
+            raise ValueError(f'Data format, "{readable_format}" not yet supported')
+
+        # the blob's position and length are in the header (see `get_data_as_buffer`)
+        fb_table         = fb_meta.fb_obj._tab
+        blob_data_offset = fb_table.Offset(blob_data_vtable_offset)
+        blob_start       = fb_table.Vector(blob_data_offset)
+
+        is_compressed = fb_meta.get_compression() != skyhook.CompressionTypes.NONE
+        if is_compressed or data_format != skyhook.FormatTypes.SFT_ARROW:
+            read_through(blob_start + fb_table.VectorLen(blob_data_offset))
+
+            return cls.from_binary_flatbuffer(binary_data).get_data_schema()
+
+        read_through(blob_start + 8)
+
+        message_prefix_len = 4
+        if binary_data[blob_start:blob_start + 4] == ipc_continuation_marker:
+            message_prefix_len = 8
+
+        metadata_len = int.from_bytes(
+            binary_data[blob_start + message_prefix_len - 4:blob_start + message_prefix_len],
+            byteorder='little'
+        )
+
+        message_end = blob_start + message_prefix_len + metadata_len
+        read_through(message_end)
+
+        return pyarrow.ipc.read_schema(pyarrow.py_buffer(binary_data[blob_start:message_end]))
+
+    @classmethod
+    def blob_deleted_position(cls, flatbuffer_binary, offset=0):
+        """
+        Returns the position, in `flatbuffer_binary`, of the FB_Meta flatbuffer's `BlobDeleted`
+        byte, or None if the flatbuffer does not store the field (it was written as False by an
+        older writer). Only the flatbuffer's header (see `fb_meta_header_size`) is needed.
+
+        Writing a 1 at this position marks the whole blob deleted, without rewriting it.
+        """
+
+        fb_table     = cls.from_binary_flatbuffer(flatbuffer_binary, offset).fb_obj._tab
+        field_offset = fb_table.Offset(blob_deleted_vtable_offset)
+
+        if not field_offset: return None
+
+        return fb_table.Pos + field_offset
+
     def __init__(self, flatbuffer_obj, **kwargs):
         super().__init__(**kwargs)
 
@@ -241,57 +1261,645 @@ class SkyhookFlatbufferMeta(object):
     def get_size(self):
         return self.fb_obj.BlobDataLength() or None
 
-    def get_data_as_arrow(self):
-        data_blob = self.fb_obj.BlobDataAsNumpy()
+    def get_original_size(self):
+        return self.fb_obj.BlobOrigLen() or None
+
+    def get_compression(self):
+        return self.fb_obj.BlobCompression()
 
-        if type(data_blob) is int and data_blob == 0: return None
+    def is_deleted(self):
+        return bool(self.fb_obj.BlobDeleted())
 
-        stream_reader      = pyarrow.ipc.open_stream(data_blob.tobytes())
-        deserialized_table = pyarrow.Table.from_batches(
-            list(stream_reader),
-            schema=stream_reader.schema
+    def get_data_as_buffer(self):
+        """
+        Returns the wrapped data blob as a `pyarrow.Buffer` that is a view over the underlying
+        flatbuffer bytes. The blob's position and length are resolved from the vtable, so the
+        blob is never copied out of the flatbuffer. The blob is returned as stored (it may be
+        compressed; see `get_uncompressed_data_as_buffer`).
+        """
+
+        if self.fb_obj.BlobDataIsNone(): return None
+
+        fb_table         = self.fb_obj._tab
+        blob_data_offset = fb_table.Offset(blob_data_vtable_offset)
+
+        flatbuffer_bytes = fb_table.Bytes
+        if not isinstance(flatbuffer_bytes, pyarrow.Buffer):
+            flatbuffer_bytes = pyarrow.py_buffer(flatbuffer_bytes)
+
+        return flatbuffer_bytes.slice(
+            fb_table.Vector(blob_data_offset),
+            fb_table.VectorLen(blob_data_offset)
         )
 
-        return deserialized_table
+    def get_uncompressed_data_as_buffer(self):
+        """
+        Returns the wrapped data blob, decompressing it if it was stored compressed. Uncompressed
+        blobs are returned as a view, the same as `get_data_as_buffer`.
+        """
+
+        data_blob        = self.get_data_as_buffer()
+        compression_type = self.get_compression()
+
+        if data_blob is None or compression_type == skyhook.CompressionTypes.NONE:
+            return data_blob
+
+        compression_codecs = {
+            codec_type: codec_name for codec_name, codec_type in blob_compression_types.items()
+        }
+
+        if compression_type not in compression_codecs:
+            raise ValueError(f'Unsupported blob compression type: {compression_type}')
+
+        with instrumentation.span('flatbuffer.decompress'):
+            uncompressed_blob = pyarrow.decompress(
+                data_blob,
+                decompressed_size=self.get_original_size(),
+                codec=compression_codecs[compression_type]
+            )
+
+        instrumentation.count('bytes_copied', uncompressed_blob.size)
+
+        return uncompressed_blob
+
+    def get_data_as_flex_rows(self):
+        """
+        Returns a SkyhookFlexRows over the wrapped data blob, which must be row-oriented
+        (SFT_FLATBUF_FLEX_ROW).
+        """
+
+        data_blob = self.get_uncompressed_data_as_buffer()
+
+        if data_blob is None: return None
+
+        return SkyhookFlexRows.from_binary_flatbuffer(data_blob)
+
+    def get_data_schema(self):
+        """
+        Returns the arrow schema of the wrapped data, without decoding record batches or rows.
+        """
+
+        if self.get_data_format() == skyhook.FormatTypes.SFT_FLATBUF_FLEX_ROW:
+            return self.get_data_as_flex_rows().arrow_schema()
+
+        return self.get_data_as_arrow_batches().schema
+
+    def get_data_as_arrow_batches(self):
+        """
+        Returns a stream reader over the wrapped arrow data, which yields record batches lazily as
+        it is iterated (and has a `schema` attribute). Row-oriented data is decoded up front, into
+        a single record batch.
+        """
+
+        if self.get_data_format() == skyhook.FormatTypes.SFT_FLATBUF_FLEX_ROW:
+            data_table = self.get_data_as_arrow()
+
+            return pyarrow.RecordBatchReader.from_batches(
+                data_table.schema, data_table.to_batches()
+            )
+
+        data_blob = self.get_uncompressed_data_as_buffer()
+
+        if data_blob is None: return None
+
+        return pyarrow.ipc.open_stream(data_blob)
+
+    def get_data_as_arrow(self, delete_vector=None):
+        """
+        Returns the wrapped data as an arrow table, without rows marked deleted by `delete_vector`
+        (see `apply_delete_vector`) or, for row-oriented data, by the `Table`'s own delete vector.
+        If the blob is marked deleted, or every row is, an empty table (with the data's schema)
+        is returned and no rows are decoded.
+        """
+
+        if self.is_deleted() or all_rows_deleted(delete_vector):
+            return arrow_schema_from_layout(self.get_data_schema()).empty_table()
+
+        if self.get_data_format() == skyhook.FormatTypes.SFT_FLATBUF_FLEX_ROW:
+            flex_rows = self.get_data_as_flex_rows()
+
+            with instrumentation.span('flex_rows.decode'):
+                data_table = flex_rows.get_data_as_arrow()
+
+            instrumentation.count('rows_decoded', data_table.num_rows)
+
+            table_deletes = flex_rows.get_delete_vector()
+            if table_deletes is not None:
+                delete_vector = (
+                    table_deletes if delete_vector is None else delete_vector | table_deletes
+                )
+
+            return apply_delete_vector(data_table, delete_vector)
+
+        data_blob = self.get_uncompressed_data_as_buffer()
+
+        if data_blob is None: return None
+
+        return apply_delete_vector(arrow_table_from_binary(data_blob), delete_vector)
+
+
+class SkyhookPartitionManifest(object):
+    """
+    A compact description of a partitioned table, written alongside its partition files. For each
+    partition, the manifest records the partition id, file name and format, column range, column
+    names, row count, size in bytes and column statistics, so that readers can plan I/O (and skip
+    partitions) without opening partitions.
+    """
+
+    logger = logging.getLogger('{}.{}'.format(__module__, __name__))
+    logger.setLevel(logging.INFO)
+
+    # a directory may hold partitions of several tables, distinguished by file extension
+    manifest_filename_template = 'manifest.{}.json'
+
+    @classmethod
+    def path_for_directory(cls, path_to_directory, file_ext):
+        return os.path.join(path_to_directory, cls.manifest_filename_template.format(file_ext))
+
+    @classmethod
+    def from_file(cls, path_to_manifest):
+        with open(path_to_manifest, 'r') as manifest_handle:
+            manifest_data = json.load(manifest_handle)
+
+        partitions = [
+            skyhook.PartitionMetadata.from_dict(partition_metadata)
+            for partition_metadata in manifest_data.pop('partitions')
+        ]
+
+        return cls(partitions=partitions, **manifest_data)
+
+    @classmethod
+    def paths_in_directory(cls, path_to_directory):
+        return sorted(glob.glob(
+            cls.path_for_directory(glob.escape(path_to_directory), '*')
+        ))
+
+    @classmethod
+    def from_directory(cls, path_to_directory, file_ext):
+        """
+        Returns the manifest for partitions with the given file extension in a directory, or None
+        if there is no such manifest.
+        """
+
+        path_to_manifest = cls.path_for_directory(path_to_directory, file_ext)
+
+        if not os.path.isfile(path_to_manifest): return None
+
+        return cls.from_file(path_to_manifest)
+
+    @classmethod
+    def for_data_wrapper(cls, data_wrapper, file_format, file_ext):
+        return cls(
+            data_wrapper.db_schema, data_wrapper.table_name, file_format, file_ext
+        )
+
+    def __init__(self, db_schema, table_name, file_format, file_ext, partitions=None, **kwargs):
+        super().__init__(**kwargs)
+
+        self.db_schema   = db_schema
+        self.table_name  = table_name
+        self.file_format = file_format
+        self.file_ext    = file_ext
+        self.partitions  = partitions or []
+
+    def row_groups(self):
+        """
+        Returns lists of partition metadata that hold the same rows, in partition order (see
+        `row_group_ids`). A table has more than one row group once rows are appended to it.
+        """
+
+        partitions = sorted(self.partitions, key=lambda part: part.partition_id)
+
+        row_groups = []
+        for partition, group_id in zip(
+                partitions, row_group_ids(part.column_names for part in partitions)):
+            if group_id == len(row_groups): row_groups.append([])
+
+            row_groups[group_id].append(partition)
+
+        return row_groups
+
+    @property
+    def num_rows(self):
+        return sum(row_group[0].num_rows for row_group in self.row_groups())
+
+    @property
+    def column_names(self):
+        # rows appended to the table repeat its columns
+        return list(dict.fromkeys(itertools.chain.from_iterable(
+            partition.column_names for partition in self.partitions
+        )))
+
+    @property
+    def next_partition_id(self):
+        return max((partition.partition_id for partition in self.partitions), default=0) + 1
+
+    @property
+    def byte_size(self):
+        return sum(partition.byte_size for partition in self.partitions)
+
+    def summary(self):
+        partition_summaries = [
+            '\t{:05d} {:40s} columns [{}:{}] rows: {} bytes: {}'.format(
+                partition.partition_id, partition.file_name,
+                partition.column_start, partition.column_end,
+                partition.num_rows, partition.byte_size
+            )
+            for partition in self.partitions
+        ]
+
+        return '\n'.join([
+            f'Table: {self.db_schema}.{self.table_name} ({self.file_format})',
+            f'Shape: {self.num_rows} rows x {len(self.column_names)} columns',
+            f'Partitions: {len(self.partitions)} ({self.byte_size} bytes)',
+        ] + partition_summaries)
+
+    def add_partition(self, partition_id, path_to_partition, partition_schema, byte_size):
+        """
+        Records a partition, using the skyhook metadata stored in the partition's arrow schema.
+        """
+
+        self.partitions.append(skyhook.PartitionMetadata.from_skyhook_metadata(
+            partition_id,
+            os.path.basename(path_to_partition),
+            self.file_format,
+            skyhook.SkyhookMetadata.from_byte_coercible(partition_schema.metadata),
+            byte_size,
+            column_stats_from_schema(partition_schema)
+        ))
+
+    def write(self, path_to_directory):
+        path_to_manifest = self.path_for_directory(path_to_directory, self.file_ext)
+
+        manifest_data = {
+            'db_schema'  : self.db_schema,
+            'table_name' : self.table_name,
+            'file_format': self.file_format,
+            'file_ext'   : self.file_ext,
+            'partitions' : [
+                partition._asdict()
+                for partition in sorted(self.partitions, key=lambda part: part.partition_id)
+            ],
+        }
+
+        # the manifest is replaced atomically, so that a failed (e.g. appending) write never
+        # leaves a partial manifest, which would lose the catalog of every partition
+        path_to_tmp = f'{path_to_manifest}.tmp'
+
+        with open(path_to_tmp, 'w') as manifest_handle:
+            json.dump(manifest_data, manifest_handle, separators=(',', ':'))
+
+        os.replace(path_to_tmp, path_to_manifest)
+
+        self.logger.info(f'--- wrote manifest for {len(self.partitions)} partitions')
+
+        return path_to_manifest
+
+
+class SkyhookResultStreamReader(object):
+    """
+    Incrementally decodes query results in the format of run-query's 'SFT_PYARROW_BINARY' output:
+    a sequence of partitions, each an 8-byte length and then an arrow IPC stream. Partitions are
+    read from a binary stream (e.g. a subprocess's stdout pipe) as they arrive, each into its own
+    buffer, and arrow data references those buffers without copying.
+
+    If `debug_stream` is given, every byte read is also written to it.
+    """
+
+    logger = logging.getLogger('{}.{}'.format(__module__, __name__))
+    logger.setLevel(logging.INFO)
+
+    def __init__(self, binary_stream, debug_stream=None, **kwargs):
+        super().__init__(**kwargs)
+
+        self.binary_stream = binary_stream
+        self.debug_stream  = debug_stream
+
+    def _read(self, byte_count):
+        data_blob = read_exactly(self.binary_stream, byte_count)
+
+        if data_blob is not None and self.debug_stream is not None:
+            self.debug_stream.write(data_blob)
+
+        return data_blob
+
+    def iter_blobs(self):
+        """
+        Generator that yields each partition's arrow data as a `pyarrow.Buffer`.
+        """
+
+        while True:
+            size_prefix = self._read(result_prefix_len)
+            if size_prefix is None: return
+
+            data_size = int.from_bytes(size_prefix, byteorder='little')
+            data_blob = self._read(data_size) if data_size else bytearray()
+
+            if data_blob is None:
+                raise EOFError(f'Stream ended before a partition of {data_size} bytes')
+
+            instrumentation.count('partitions_read')
+            instrumentation.count('bytes_read', result_prefix_len + data_size)
+
+            yield pyarrow.py_buffer(data_blob)
+
+    def iter_batches(self):
+        """
+        Generator that yields (partition index, record batch) pairs as they are decoded.
+        """
+
+        for partition_ndx, data_blob in enumerate(self.iter_blobs()):
+            for record_batch in pyarrow.ipc.open_stream(data_blob):
+                yield partition_ndx, record_batch
+
+    def iter_partitions(self):
+        """
+        Generator that yields each partition as an arrow table.
+        """
+
+        for data_blob in self.iter_blobs():
+            stream_reader = pyarrow.ipc.open_stream(data_blob)
+
+            yield pyarrow.Table.from_batches(list(stream_reader), schema=stream_reader.schema)
+
+    def read_all(self):
+        """
+        Reads every partition and assembles them into a single table (see
+        `arrow_table_from_partitions`): the merged schema is built in one pass, and columns
+        reference the decoded partitions' buffers.
+        """
+
+        return arrow_table_from_partitions(list(self.iter_partitions()))
 
 
 class SkyhookFileReader(object):
+    """
+    Each reader accepts `use_mmap`, which memory-maps input files instead of reading them into
+    `bytes` objects (see `binary_from_file`). Arrow data decoded in this mode references the
+    mapped file rather than a copy of it.
+    """
 
     logger = logging.getLogger('{}.{}'.format(__module__, __name__))
     logger.setLevel(logging.INFO)
 
     @classmethod
-    def read_data_partitions_as_arrow_table(cls, path_to_directory, file_ext='arrow'):
-        cls.logger.info('>>> reading binary data partitions into an arrow table')
+    def iter_data_partitions(cls, path_to_directory, file_ext='arrow', use_mmap=False,
+                             max_workers=None, max_in_flight=None, file_format=None,
+                             stats_predicate=None):
+        """
+        Generator that yields (partition id, arrow table) pairs for each partition file in a
+        directory, in partition id order. Partition files are in `file_format` (by default, the
+        format of `file_ext`; see `file_format_for_ext`). If `stats_predicate` is given, only
+        partitions it selects are read (see `select_partition_files`).
+
+        Partitions are read and decoded concurrently on a pool of `max_workers` threads (arrow's
+        IPC decoding releases the GIL). At most `max_in_flight` partitions (by default, twice the
+        number of workers) are read ahead of the consumer, which bounds memory use for directories
+        that are larger than memory. Rows marked deleted are dropped (see
+        `read_partition_as_arrow_table`).
+        """
+
+        if max_in_flight is None:
+            max_in_flight = 2 * (max_workers or os.cpu_count() or 1)
+
+        file_format     = file_format or file_format_for_ext(file_ext)
+        partition_files = partition_files_in_dir(path_to_directory, file_ext)
+
+        if stats_predicate is not None:
+            partition_files = cls.select_partition_files(
+                partition_files, file_format, stats_predicate, max_workers=max_workers
+            )
 
-        # initialize these variables, just in case there are no files in path_to_directory
-        table_partitions = []
+        def read_partition(partition_file):
+            partition_id, path_to_partition = partition_file
 
-        for partition_file in os.listdir(path_to_directory):
-            if not partition_file.endswith(f'.{file_ext}'): continue
+            return (
+                partition_id,
+                cls.read_partition_as_arrow_table(
+                    path_to_partition, file_format, use_mmap=use_mmap
+                )
+            )
 
-            with open(os.path.join(path_to_directory, partition_file), 'rb') as input_handle:
-                table_partitions.append(arrow_table_from_binary(input_handle.read()))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            yield from bounded_ordered_map(
+                executor, read_partition, partition_files, max_in_flight
+            )
+
+    @classmethod
+    def select_partition_files(cls, partition_files, file_format, stats_predicate,
+                               max_workers=None):
+        """
+        Returns the (partition id, path) pairs of partition files in row groups for which
+        `stats_predicate(column_stats)` is True (see `select_row_group_partitions`). Only the
+        schemas of partitions are read, concurrently, on a pool of `max_workers` threads.
+        """
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            partition_schemas = list(executor.map(
+                lambda partition_file: cls.read_partition_schema(partition_file[1], file_format),
+                partition_files
+            ))
+
+        selected_files = [
+            partition_files[partition_ndx]
+            for partition_ndx in select_row_group_partitions(
+                [partition_schema.names for partition_schema in partition_schemas],
+                list(map(column_stats_from_schema, partition_schemas)),
+                stats_predicate
+            )
+        ]
+
+        cls.logger.info('--- pruned {} of {} partitions using column statistics'.format(
+            len(partition_files) - len(selected_files), len(partition_files)
+        ))
+
+        return selected_files
+
+    @classmethod
+    def read_data_partitions_as_arrow_table(cls, path_to_directory, file_ext='arrow',
+                                            use_mmap=False, max_workers=None, file_format=None,
+                                            stats_predicate=None):
+        """
+        Reads the partition files of a directory into a single arrow table (see
+        `iter_data_partitions`), combining column partitions of each row group and concatenating
+        row groups (see `arrow_table_from_row_groups`). Returns None if no partition is read.
+        """
+
+        cls.logger.info('>>> reading binary data partitions into an arrow table')
+
+        table_partitions = [
+            tbl_part
+            for _, tbl_part in cls.iter_data_partitions(
+                path_to_directory, file_ext, use_mmap=use_mmap, max_workers=max_workers,
+                file_format=file_format, stats_predicate=stats_predicate
+            )
+        ]
 
         cls.logger.info(f'<<< read {len(table_partitions)} partitions')
-        return pyarrow.concat_tables(table_partitions)
+        return arrow_table_from_row_groups(
+            table_partitions,
+            row_group_ids(tbl_part.schema.names for tbl_part in table_partitions)
+        )
 
     @classmethod
-    def read_data_file_as_arrow_table(cls, path_to_infile):
-        cls.logger.info('>>> reading binary data file into an arrow table')
+    @instrumentation.spanned('reader.read_schema')
+    def read_partition_schema(cls, path_to_partition, file_format='arrow'):
+        """
+        Returns the arrow schema of a partition file written by `SkyhookFileWriter`, in any of the
+        formats in `partition_file_exts`. Only the schema is read and decoded (for parquet, the
+        footer), so record batches are never read.
+        """
+
+        if file_format == 'parquet':
+            return arrow_schema_from_layout(pyarrow.parquet.read_schema(path_to_partition))
+
+        if file_format == 'flatbuffer':
+            with open(path_to_partition, 'rb') as input_handle:
+                return arrow_schema_from_layout(SkyhookFlatbufferMeta.read_arrow_schema(
+                    range_reader_for_file(input_handle)
+                ))
+
+        binary_data = binary_from_file(path_to_partition, use_mmap=True)
+
+        return arrow_schema_from_layout(pyarrow.ipc.open_stream(binary_data).schema)
+
+    @classmethod
+    def count_partition_rows(cls, path_to_partition, file_format='arrow', num_rows=None):
+        """
+        Returns the number of rows of a partition file that are not marked deleted, given the
+        number of rows it stores (e.g. from a partition manifest; by default, from its schema).
+        Only the partition's delete vector, and the FB_Meta header of a flatbuffer partition (see
+        `SkyhookFileWriter.delete_partition`), are read.
+        """
+
+        if file_format == 'flatbuffer':
+            with open(path_to_partition, 'rb') as partition_handle:
+                fb_meta_header = partition_handle.read(fb_meta_header_size)
+
+            instrumentation.count('bytes_read', len(fb_meta_header))
+
+            if SkyhookFlatbufferMeta.from_binary_flatbuffer(fb_meta_header).is_deleted():
+                return 0
+
+        if num_rows is None:
+            num_rows = cls.peek_partition(path_to_partition, file_format)[0].num_rows
+
+        delete_vector = read_delete_vector(path_to_partition)
+        if delete_vector is None: return num_rows
+
+        return num_rows - int(numpy.count_nonzero(delete_vector))
+
+    @classmethod
+    def peek_partition(cls, path_to_partition, file_format='arrow'):
+        """
+        Returns the skyhook metadata of a partition file and the ColumnSchema of each of its
+        columns, reading only its schema (see `read_partition_schema`).
+        """
+
+        return skyhook_metadata_from_schema(
+            cls.read_partition_schema(path_to_partition, file_format)
+        )
+
+    @classmethod
+    @instrumentation.spanned('reader.peek_skyhook_file')
+    def peek_skyhook_file(cls, path_to_infile):
+        """
+        Like `peek_partition`, but for a skyhook file that starts with the flatbuffer's size (see
+        `read_skyhook_file`). Returns the flatbuffer size, the skyhook metadata, and the
+        ColumnSchema of each column.
+        """
 
         with open(path_to_infile, 'rb') as input_handle:
-            data_table = arrow_table_from_binary(input_handle.read())
+            read_range      = range_reader_for_file(input_handle)
+            flatbuffer_size = int.from_bytes(read_range(0, 4), byteorder='little')
+            arrow_schema    = SkyhookFlatbufferMeta.read_arrow_schema(read_range, offset=4)
+
+        skyhook_metadata, column_schemas = skyhook_metadata_from_schema(
+            arrow_schema_from_layout(arrow_schema)
+        )
+
+        return flatbuffer_size, skyhook_metadata, column_schemas
+
+    @classmethod
+    def read_partition_column_stats(cls, path_to_partition, file_format='arrow'):
+        """
+        Returns the column statistics of a partition file (see `column_stats_from_schema`),
+        reading only its schema.
+        """
+
+        return column_stats_from_schema(cls.read_partition_schema(path_to_partition, file_format))
+
+    @classmethod
+    @instrumentation.spanned('reader.read_partition')
+    def read_partition_as_arrow_table(cls, path_to_partition, file_format='arrow',
+                                      columns=None, use_mmap=False):
+        """
+        Returns the contents of a partition file written by `SkyhookFileWriter` as an arrow table,
+        with only the given columns (all columns, by default).
+
+        Parquet partitions only read the requested column chunks. If `use_mmap` is True, arrow and
+        flatbuffer partitions are memory-mapped, so buffers of unrequested columns are never paged
+        in (`SkyhookDataset` does this by default).
+
+        Rows marked deleted (see `SkyhookFileWriter.delete_partition_rows`) are dropped. If every
+        row, or the whole blob of a flatbuffer partition, is marked deleted, only the partition's
+        schema is read, and an empty table is returned.
+        """
+
+        delete_vector = read_delete_vector(path_to_partition)
+
+        if all_rows_deleted(delete_vector):
+            data_table = cls.read_partition_schema(path_to_partition, file_format).empty_table()
+
+        elif file_format == 'parquet':
+            # column chunks can only be projected for dense layouts
+            parquet_schema = pyarrow.parquet.read_schema(path_to_partition)
+            parquet_cols   = (
+                columns
+                if data_layout_from_schema(parquet_schema) == skyhook.DataLayouts.DENSE
+                else None
+            )
+
+            data_table = apply_delete_vector(
+                arrow_table_from_layout(
+                    pyarrow.parquet.read_table(path_to_partition, columns=parquet_cols)
+                ),
+                delete_vector
+            )
+
+        elif file_format == 'flatbuffer':
+            fb_meta    = SkyhookFlatbufferMeta.from_binary_flatbuffer(
+                binary_from_file(path_to_partition, use_mmap)
+            )
+            data_table = fb_meta.get_data_as_arrow(delete_vector=delete_vector)
+
+        else:
+            data_table = apply_delete_vector(
+                arrow_table_from_binary(binary_from_file(path_to_partition, use_mmap)),
+                delete_vector
+            )
+
+        instrumentation.count('partitions_read')
+
+        if columns is None: return data_table
+
+        return project_arrow_table(data_table, columns)
+
+    @classmethod
+    @instrumentation.spanned('reader.read_data_file')
+    def read_data_file_as_arrow_table(cls, path_to_infile, use_mmap=False):
+        cls.logger.info('>>> reading binary data file into an arrow table')
+
+        data_table = arrow_table_from_binary(binary_from_file(path_to_infile, use_mmap))
 
         cls.logger.info('<<< data read into arrow table')
 
         return data_table
 
     @classmethod
-    def read_data_file_as_flatbuffer(cls, path_to_infile):
+    def read_data_file_as_flatbuffer(cls, path_to_infile, use_mmap=False):
         cls.logger.info('>>> reading binary data file into a flatbuffer')
-        with open(path_to_infile, 'rb') as input_handle:
-            binary_data = input_handle.read()
+        binary_data = binary_from_file(path_to_infile, use_mmap)
 
         flatbuffer_obj = SkyhookFlatbufferMeta.from_binary_flatbuffer(binary_data)
         cls.logger.info('<<< data read into arrow table')
@@ -299,23 +1907,24 @@ class SkyhookFileReader(object):
         return flatbuffer_obj
 
     @classmethod
-    def read_skyhook_file(cls, path_to_infile):
+    @instrumentation.spanned('reader.read_skyhook_file')
+    def read_skyhook_file(cls, path_to_infile, use_mmap=False):
         cls.logger.info('>>> reading skyhook file into a flatbuffer')
-        with open(path_to_infile, 'rb') as input_handle:
-            binary_data = input_handle.read()
+        binary_data = binary_from_file(path_to_infile, use_mmap)
 
+        # the first 4 bytes are the flatbuffer size; rather than slicing them off (a copy of the
+        # whole file), the flatbuffer is rooted at an offset into the binary data
         flatbuffer_size = int.from_bytes(binary_data[:4], byteorder='little')
-        flatbuffer_obj  = SkyhookFlatbufferMeta.from_binary_flatbuffer(binary_data[4:])
+        flatbuffer_obj  = SkyhookFlatbufferMeta.from_binary_flatbuffer(binary_data, offset=4)
 
         cls.logger.info('<<< data read into arrow table')
 
         return flatbuffer_size, flatbuffer_obj
 
     @classmethod
-    def read_data_file_as_binary(cls, path_to_infile):
+    def read_data_file_as_binary(cls, path_to_infile, use_mmap=False):
         cls.logger.info('>>> reading binary data file')
-        with open(path_to_infile, 'rb') as input_handle:
-            binary_data = input_handle.read()
+        binary_data = binary_from_file(path_to_infile, use_mmap)
 
         cls.logger.info('<<< data read as binary')
         return binary_data
@@ -339,93 +1948,363 @@ class SkyhookFileWriter(object):
         cls.logger.info('<<< data written')
 
     @classmethod
-    def write_to_arrow(cls, data_wrapper, path_to_outfile):
+    def single_file_table(cls, data_wrapper):
+        """
+        Returns the arrow table of all columns that single-file writers write. Dense data keeps
+        the plain schema of single files (no column statistics or dictionary encoding, which are
+        only for partitions); data in the sparse layout is written in that layout.
+        """
+
+        if data_wrapper.data_layout == skyhook.DataLayouts.SPARSE_CSC:
+            return data_wrapper.as_sparse_arrow_table()
+
         data_schema = data_wrapper.table_schema().with_metadata(
             data_wrapper.schema_skyhook_metadata().to_byte_coercible()
         )
 
+        return data_wrapper.as_arrow_table(data_schema)
+
+    @classmethod
+    @instrumentation.spanned('writer.write_to_arrow')
+    def write_to_arrow(cls, data_wrapper, path_to_outfile):
+        data_table = cls.single_file_table(data_wrapper)
+
         cls.logger.info('>>> writing data in single arrow file')
         with open(path_to_outfile, 'wb') as arrow_handle:
-            batch_writer = pyarrow.RecordBatchFileWriter(arrow_handle, data_schema)
+            batch_writer = pyarrow.RecordBatchFileWriter(arrow_handle, data_table.schema)
 
-            for record_batch in data_wrapper.as_arrow_table(data_schema).to_batches():
+            for record_batch in data_table.to_batches():
                 batch_writer.write_batch(record_batch)
 
+            # writes the file footer, without which the file cannot be opened
+            batch_writer.close()
+
+        instrumentation.count('bytes_written', os.path.getsize(path_to_outfile))
+
         cls.logger.info('<<< data written')
 
     @classmethod
+    @instrumentation.spanned('writer.write_to_parquet')
     def write_to_parquet(cls, data_wrapper, path_to_outfile):
-        data_schema = data_wrapper.table_schema().with_metadata(
-            data_wrapper.schema_skyhook_metadata().to_byte_coercible()
-        )
+        data_table = cls.single_file_table(data_wrapper)
 
         cls.logger.info('>>> writing data in single parquet file')
-        pyarrow.parquet.write_table(data_wrapper.as_arrow_table(data_schema), path_to_outfile)
+        pyarrow.parquet.write_table(data_table, path_to_outfile)
+        instrumentation.count('bytes_written', os.path.getsize(path_to_outfile))
 
         cls.logger.info('<<< data written')
 
     @classmethod
-    def write_partitions_to_flatbuffer(cls, data_wrapper, output_dir,
-                                       batch_size=100, file_ext='skyhook'):
-        # tbl_part is table partition
-        for ndx, tbl_part in data_wrapper.batched_table_partitions(batch_size):
-            # Generate path to binary file based on table partition metadata
-            path_to_blob = os.path.join(
-                output_dir,
-                '{:05d}-{}.{}'.format(
-                    ndx,
-                    tbl_part.column_names[0],
-                    file_ext
+    @instrumentation.spanned('writer.write_partition_file')
+    def write_partition_file(cls, tbl_part, path_to_partition, file_format='arrow',
+                             compression=None, ipc_compression=None):
+        """
+        Serializes a table partition to a file in the given format (one of `partition_file_exts`)
+        and returns the number of bytes written.
+
+        `compression` ('lz4' or 'zstd') compresses the FB_Meta data blob of flatbuffer partitions,
+        or is used as the parquet codec of parquet partitions. `ipc_compression` compresses record
+        batch bodies of the arrow IPC stream (arrow and flatbuffer partitions).
+        """
+
+        if file_format == 'arrow' and compression is not None:
+            raise ValueError('Blob compression requires the flatbuffer format; '
+                             'for arrow partitions, use ipc_compression')
+
+        if file_format == 'parquet':
+            parquet_options = {}
+            if compression is not None: parquet_options['compression'] = compression
+
+            pyarrow.parquet.write_table(tbl_part, path_to_partition, **parquet_options)
+
+            byte_size = os.path.getsize(path_to_partition)
+            instrumentation.count('partitions_written')
+            instrumentation.count('bytes_written', byte_size)
+
+            return byte_size
+
+        binary_data = arrow_binary_from_table(tbl_part, ipc_compression=ipc_compression)
+
+        if file_format == 'flatbuffer':
+            binary_data = SkyhookFlatbufferMeta.binary_from_arrow_binary(
+                binary_data, compression=compression
+            )
+
+        with open(path_to_partition, 'wb') as blob_handle:
+            blob_handle.write(binary_data)
+
+        instrumentation.count('partitions_written')
+        instrumentation.count('bytes_written', len(binary_data))
+
+        return len(binary_data)
+
+    @classmethod
+    def delete_partition_rows(cls, path_to_partition, row_ndx, file_format='arrow'):
+        """
+        Marks rows of a partition file, by index (anything that indexes a numpy array), deleted.
+        The partition itself is not rewritten: its delete vector (see `read_delete_vector`) is
+        merged with the given rows and replaced atomically. Returns the merged delete vector.
+
+        Column partitions that hold the same rows must have the same rows deleted (see
+        `SkyhookDataset.delete_rows`).
+        """
+
+        skyhook_metadata, _ = SkyhookFileReader.peek_partition(path_to_partition, file_format)
+
+        delete_vector = merge_delete_vector(
+            read_delete_vector(path_to_partition), skyhook_metadata.num_rows, row_ndx
+        )
+
+        cls.write_delete_vector(path_to_partition, delete_vector)
+
+        return delete_vector
+
+    @classmethod
+    def write_delete_vector(cls, path_to_partition, delete_vector):
+        """
+        Replaces the delete vector of a partition file (see `read_delete_vector`) atomically.
+        """
+
+        # write to a temporary file first, so that concurrent readers never see a partial vector
+        path_to_deletes = path_for_delete_vector(path_to_partition)
+        path_to_tmp     = f'{path_to_deletes}.tmp'
+
+        delete_vector.tofile(path_to_tmp)
+        os.replace(path_to_tmp, path_to_deletes)
+
+        instrumentation.count('bytes_written', delete_vector.nbytes)
+
+    @classmethod
+    def delete_partition(cls, path_to_partition, file_format='arrow'):
+        """
+        Marks a whole partition file deleted, so that readers skip its data. For a flatbuffer
+        partition, the `BlobDeleted` field of FB_Meta is set in place (a single byte is written);
+        otherwise (or if the flatbuffer does not store the field), every row is marked deleted.
+        """
+
+        if file_format == 'flatbuffer':
+            with open(path_to_partition, 'r+b') as partition_handle:
+                deleted_pos = SkyhookFlatbufferMeta.blob_deleted_position(
+                    partition_handle.read(fb_meta_header_size)
                 )
+
+                if deleted_pos is not None:
+                    partition_handle.seek(deleted_pos)
+                    partition_handle.write(b'\x01')
+
+                    instrumentation.count('bytes_written', 1)
+
+                    return
+
+        cls.delete_partition_rows(path_to_partition, slice(None), file_format)
+
+    @classmethod
+    @instrumentation.spanned('writer.write_partitions')
+    def write_partitions(cls, data_wrapper, output_dir, file_format='arrow', batch_size=100,
+                         file_ext=None, max_workers=None, max_in_flight=None,
+                         compression=None, ipc_compression=None, append=False,
+                         row_batch_size=None):
+        """
+        Writes `data_wrapper` as a directory of partition files (plus a partition manifest), where
+        each partition holds `batch_size` columns. If `append` is True, `data_wrapper` is appended
+        to the table already in the directory instead (see `partition_manifest_for_append`);
+        appended columns get the delete vector of the table's rows.
+
+        If `row_batch_size` is given, each batch of that many rows is written as its own column
+        partitions (a row group, see `row_group_ids`), so that the column statistics of each
+        batch prune it separately (see `select_row_group_partitions`). Appended columns must
+        have the table's rows in a single row group, so they cannot be written in row batches.
+
+        Partitions are written by a pool of `max_workers` threads; each worker constructs,
+        serializes and writes one partition at a time, so these stages overlap across partitions
+        (arrow and parquet serialization release the GIL). At most `max_in_flight` partitions
+        (by default, twice the number of workers) are in memory at once. Partition file names and
+        the manifest do not depend on the order in which workers finish.
+
+        For `compression` and `ipc_compression`, see `write_partition_file`.
+        """
+
+        file_ext = file_ext or partition_file_exts[file_format]
+
+        if max_in_flight is None:
+            max_in_flight = 2 * (max_workers or os.cpu_count() or 1)
+
+        delete_vector = None
+
+        if append:
+            partition_manifest, column_offset, delete_vector = cls.partition_manifest_for_append(
+                data_wrapper, output_dir, file_format, file_ext
             )
 
-            # Serialize flatbuffer structure to disk
-            fb_meta_wrapped_binary = SkyhookFlatbufferMeta.binary_from_arrow_binary(
-                arrow_binary_from_table(tbl_part)
+            # appended columns continue the table's column ids; the caller's wrapper is unchanged
+            data_wrapper = data_wrapper.with_column_offset(column_offset)
+
+            appends_columns = bool(partition_manifest.partitions) and set(
+                data_wrapper.domain_data.columns()
+            ).isdisjoint(partition_manifest.column_names)
+
+            if appends_columns and row_batch_size is not None:
+                raise ValueError('Appended columns cannot be written in batches of rows')
+
+        else:
+            partition_manifest = SkyhookPartitionManifest.for_data_wrapper(
+                data_wrapper, file_format, file_ext
             )
-            with open(path_to_blob, 'wb') as blob_handle:
-                blob_handle.write(fb_meta_wrapped_binary)
 
-    @classmethod
-    def write_partitions_to_arrow(cls, data_wrapper, output_dir,
-                                  batch_size=100, file_ext='arrow'):
-        cls.logger.info('>>> writing data partitions into directory of arrow files')
+        # each batch of rows is written as the same column partitions, with consecutive ids
+        row_wrappers = [data_wrapper]
+        if row_batch_size is not None:
+            row_wrappers = [
+                data_wrapper.with_rows(row_start, row_end)
+                for _, row_start, row_end in batched_indices(
+                    data_wrapper.domain_data.shape[0], row_batch_size
+                )
+            ] or row_wrappers
 
-        # tbl_part is table partition
-        for ndx, tbl_part in data_wrapper.batched_table_partitions(batch_size=batch_size):
-            # Generate path to binary file based on table partition metadata
-            path_to_blob = os.path.join(
+        def write_partition(batch_indices):
+            ndx, rows_wrapper, start, end = batch_indices
+
+            # tbl_part is table partition
+            tbl_part = rows_wrapper.as_partitioned_arrow_table(start=start, end=end)
+
+            # Generate path to binary file based on the partition's first (dense) column
+            path_to_partition = os.path.join(
                 output_dir,
-                '{:05d}-{}.{}'.format(
-                    ndx,
-                    tbl_part.column_names[0],
-                    file_ext
+                partition_filename_template.format(
+                    ndx, data_wrapper.domain_data.columns(start, end)[0], file_ext
                 )
             )
 
-            # Serialize arrow table to binary and write to file
-            arrow_binary_data = arrow_binary_from_table(tbl_part)
-            with open(path_to_blob, 'wb') as blob_handle:
-                blob_handle.write(arrow_binary_data)
+            byte_size = cls.write_partition_file(
+                tbl_part, path_to_partition, file_format, compression, ipc_compression
+            )
+
+            if delete_vector is not None:
+                cls.write_delete_vector(path_to_partition, delete_vector)
+
+            return ndx, path_to_partition, tbl_part.schema, byte_size
+
+        column_batches    = list(batched_indices(data_wrapper.domain_data.shape[1], batch_size))
+        partition_indices = (
+            (ndx, rows_wrapper, start, end)
+            for ndx, (rows_wrapper, (_, start, end)) in enumerate(
+                itertools.product(row_wrappers, column_batches),
+                start=partition_manifest.next_partition_id
+            )
+        )
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            written_partitions = bounded_ordered_map(
+                executor, write_partition, partition_indices, max_in_flight
+            )
+
+            for ndx, path_to_partition, partition_schema, byte_size in written_partitions:
+                partition_manifest.add_partition(
+                    ndx, path_to_partition, partition_schema, byte_size
+                )
+
+        partition_manifest.write(output_dir)
+
+        return partition_manifest
+
+    @classmethod
+    def partition_manifest_for_append(cls, data_wrapper, output_dir, file_format, file_ext):
+        """
+        Returns the manifest of the table in `output_dir` that `data_wrapper` is appended to, the
+        column offset of appended columns (see `SkyhookDataWrapper.with_column_offset`), so that
+        they continue the table's column ids, and the delete vector of appended partitions (or
+        None). `data_wrapper` is not modified. Appended partitions continue the table's partition
+        ids, so only they are written, and existing partitions are never read (only their delete
+        vectors). If there is no table yet, an empty manifest is returned (the table is written
+        from scratch).
+
+        `data_wrapper` holds either new rows of the table (the same columns, in the same order),
+        which are appended as a new row group, or new columns for every row of the table (column
+        names that are not yet in the table). Appended columns must have the same rows deleted as
+        the table's columns (see `delete_partition_rows`), so they get the union of the delete
+        vectors of the table's partitions.
+        """
+
+        partition_manifest = SkyhookPartitionManifest.from_directory(output_dir, file_ext)
+        if partition_manifest is None:
+            return (
+                SkyhookPartitionManifest.for_data_wrapper(data_wrapper, file_format, file_ext),
+                data_wrapper.column_offset,
+                None
+            )
+
+        if partition_manifest.file_format != file_format:
+            raise ValueError('Cannot append {} partitions to a table of {} partitions'.format(
+                file_format, partition_manifest.file_format
+            ))
+
+        table_columns    = partition_manifest.column_names
+        appended_columns = data_wrapper.domain_data.columns()
+
+        if appended_columns == table_columns:
+            cls.logger.info('--- appending {} rows to {} rows'.format(
+                data_wrapper.domain_data.shape[0], partition_manifest.num_rows
+            ))
+
+            return partition_manifest, 0, None
+
+        if set(appended_columns).isdisjoint(table_columns):
+            # columns of a table with appended rows would span several row groups
+            has_row_groups = len(partition_manifest.row_groups()) > 1
+
+            if has_row_groups or data_wrapper.domain_data.shape[0] != partition_manifest.num_rows:
+                raise ValueError('Appended columns must have the {} rows of the table{}'.format(
+                    partition_manifest.num_rows,
+                    ', which must not have appended rows' if has_row_groups else ''
+                ))
+
+            cls.logger.info('--- appending {} columns to {} columns'.format(
+                len(appended_columns), len(table_columns)
+            ))
+
+            return partition_manifest, len(table_columns), union_delete_vectors(
+                read_delete_vector(os.path.join(output_dir, partition_metadata.file_name))
+                for partition_metadata in partition_manifest.partitions
+            )
+
+        raise ValueError('Appended data must have either all columns of the table (to append '
+                         'rows) or only new columns (to append columns)')
+
+    @classmethod
+    def write_partitions_to_flatbuffer(cls, data_wrapper, output_dir,
+                                       batch_size=100, file_ext='skyhook', **kwargs):
+        cls.logger.info('>>> writing data partitions into directory of flatbuffer files')
+
+        partition_manifest = cls.write_partitions(
+            data_wrapper, output_dir, 'flatbuffer', batch_size, file_ext, **kwargs
+        )
 
         cls.logger.info('<<< data written')
 
+        return partition_manifest
+
+    @classmethod
+    def write_partitions_to_arrow(cls, data_wrapper, output_dir,
+                                  batch_size=100, file_ext='arrow', **kwargs):
+        cls.logger.info('>>> writing data partitions into directory of arrow files')
+
+        partition_manifest = cls.write_partitions(
+            data_wrapper, output_dir, 'arrow', batch_size, file_ext, **kwargs
+        )
+
+        cls.logger.info('<<< data written')
+
+        return partition_manifest
+
     @classmethod
     def write_partitions_to_parquet(cls, data_wrapper, path_to_directory,
-                                    batch_size=1000, file_ext='parquet'):
+                                    batch_size=1000, file_ext='parquet', **kwargs):
         cls.logger.info('>>> writing data partitions into directory of parquet files')
 
-        # tbl_part is table partition
-        for ndx, tbl_part in data_wrapper.batched_table_partitions(batch_size=batch_size):
-            path_to_parquet_file = os.path.join(
-                path_to_directory,
-                '{:05d}-{}.{}'.format(
-                    ndx,
-                    tbl_part.column_names[0],
-                    file_ext
-                )
-            )
-
-            pyarrow.parquet.write_table(tbl_part, path_to_parquet_file)
+        partition_manifest = cls.write_partitions(
+            data_wrapper, path_to_directory, 'parquet', batch_size, file_ext, **kwargs
+        )
 
         cls.logger.info('<<< data written')
+
+        return partition_manifest
@@ -0,0 +1,429 @@
+"""
+Sub-module that contains code for lazily reading partitioned tables, as written by the
+`write_partitions_to_*` functions of `SkyhookFileWriter`.
+
+Each partition holds a contiguous batch of columns (see
+`SkyhookDataWrapper.batched_table_partitions`), so a projection onto a few columns only needs to
+read the few partitions that hold them. Partitions also record statistics of each column, so
+row groups whose values cannot satisfy a predicate need not be read at all (see
+`SkyhookDataset.select_row_groups`). Each row partition is pruned separately: a table is split
+into row groups when written in batches of rows (`SkyhookFileWriter.write_partitions(...,
+row_batch_size=...)`) or when rows are appended to it.
+"""
+
+# core libraries
+import os
+import logging
+import concurrent.futures
+
+# dependencies
+import numpy
+
+# classes
+from skyhookdm.dataformats import SkyhookFileReader, SkyhookFileWriter, SkyhookPartitionManifest
+
+# functions
+from skyhookdm.util import bounded_ordered_map
+from skyhookdm.dataformats import (arrow_table_from_partitions, column_stats_from_schema,
+                                   partition_files_in_dir, project_arrow_table,
+                                   row_group_ids, select_row_group_partitions,
+                                   skyhook_metadata_from_schema)
+
+# variables
+from skyhookdm.dataformats import partition_file_exts
+
+
+# ------------------------------
+# Classes
+class DatasetPartition(object):
+    """
+    A single partition file of a `SkyhookDataset`. Unless provided, the partition's column names,
+    column statistics and row count are only read (from the partition's schema) when first needed.
+    """
+
+    def __init__(self, partition_id, path_to_partition, file_format='arrow',
+                 column_names=None, column_stats=None, num_rows=None, **kwargs):
+        super().__init__(**kwargs)
+
+        self.partition_id      = partition_id
+        self.path_to_partition = path_to_partition
+        self.file_format       = file_format
+
+        self._column_names     = column_names
+        self._column_stats     = column_stats
+        self._num_rows         = num_rows
+
+    def _read_schema(self):
+        partition_schema = SkyhookFileReader.read_partition_schema(
+            self.path_to_partition, self.file_format
+        )
+
+        if self._column_names is None: self._column_names = partition_schema.names
+        if self._column_stats is None:
+            self._column_stats = column_stats_from_schema(partition_schema) or {}
+
+        if self._num_rows is None:
+            self._num_rows = skyhook_metadata_from_schema(partition_schema)[0].num_rows
+
+    @property
+    def column_names(self):
+        if self._column_names is None: self._read_schema()
+
+        return self._column_names
+
+    @property
+    def column_stats(self):
+        """
+        The partition's column statistics (column name -> skyhook.ColumnStats), which are empty
+        if the partition was written without them.
+        """
+
+        if self._column_stats is None: self._read_schema()
+
+        return self._column_stats
+
+    @property
+    def num_rows(self):
+        """
+        The number of rows stored in the partition, including rows marked deleted.
+        """
+
+        if self._num_rows is None: self._read_schema()
+
+        return self._num_rows
+
+    def count_rows(self):
+        """
+        The number of rows of the partition that are not marked deleted, without reading its data
+        (see `SkyhookFileReader.count_partition_rows`).
+        """
+
+        return SkyhookFileReader.count_partition_rows(
+            self.path_to_partition, self.file_format, self.num_rows
+        )
+
+    def read(self, columns=None, use_mmap=False):
+        return SkyhookFileReader.read_partition_as_arrow_table(
+            self.path_to_partition, self.file_format, columns=columns, use_mmap=use_mmap
+        )
+
+    def delete_rows(self, row_ndx):
+        return SkyhookFileWriter.delete_partition_rows(
+            self.path_to_partition, row_ndx, self.file_format
+        )
+
+
+class SkyhookDataset(object):
+    """
+    A lazily opened, partitioned table. Opening a dataset only lists its partition files; data is
+    read when requested, and a projection (`columns=[...]`) only reads the partitions that hold
+    the projected columns.
+    """
+
+    logger = logging.getLogger('{}.{}'.format(__module__, __name__))
+    logger.setLevel(logging.INFO)
+
+    @classmethod
+    def from_manifest(cls, partition_manifest, path_to_directory, **kwargs):
+        """
+        Opens a dataset from a partition manifest. Column names of every partition are known from
+        the manifest, so no partition file is opened until its data is read.
+        """
+
+        return cls(
+            [
+                DatasetPartition(
+                    partition_metadata.partition_id,
+                    os.path.join(path_to_directory, partition_metadata.file_name),
+                    partition_metadata.file_format,
+                    column_names=partition_metadata.column_names,
+                    column_stats=partition_metadata.column_stats,
+                    num_rows=partition_metadata.num_rows
+                )
+                for partition_metadata in partition_manifest.partitions
+            ],
+            **kwargs
+        )
+
+    @classmethod
+    def from_directory(cls, path_to_directory, file_format='arrow', file_ext=None, **kwargs):
+        """
+        Opens a dataset from a directory of partition files. If the directory has a partition
+        manifest for these files, it is used; otherwise, the directory is listed.
+        """
+
+        file_ext = file_ext or partition_file_exts[file_format]
+
+        partition_manifest = SkyhookPartitionManifest.from_directory(path_to_directory, file_ext)
+        if partition_manifest is not None:
+            return cls.from_manifest(partition_manifest, path_to_directory, **kwargs)
+
+        return cls(
+            [
+                DatasetPartition(partition_id, path_to_partition, file_format)
+                for partition_id, path_to_partition in partition_files_in_dir(
+                    path_to_directory, file_ext
+                )
+            ],
+            **kwargs
+        )
+
+    def __init__(self, partitions, use_mmap=True, max_workers=None, max_in_flight=None,
+                 **kwargs):
+        super().__init__(**kwargs)
+
+        self.logger        = self.__class__.logger
+        self.partitions    = partitions
+
+        # I/O configuration
+        self.use_mmap      = use_mmap
+        self.max_workers   = max_workers
+        self.max_in_flight = max_in_flight or 2 * (max_workers or os.cpu_count() or 1)
+
+        # lazily constructed mapping of column name -> partitions (one per row group)
+        self._column_index = None
+
+    def _map_partitions(self, map_fn, partitions):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            yield from bounded_ordered_map(executor, map_fn, partitions, self.max_in_flight)
+
+    def column_index(self):
+        if self._column_index is None:
+            # resolve column names of each partition concurrently (only reads schemas)
+            partition_columns = self._map_partitions(
+                lambda partition: partition.column_names,
+                self.partitions
+            )
+
+            self._column_index = {}
+            for partition, column_names in zip(self.partitions, partition_columns):
+                for column_name in column_names:
+                    self._column_index.setdefault(column_name, []).append(partition)
+
+        return self._column_index
+
+    @property
+    def column_names(self):
+        return list(self.column_index().keys())
+
+    def partitions_for_columns(self, columns):
+        """
+        Returns a list of (partition, columns in partition) pairs, in partition order, for only
+        the partitions that hold any of the given columns.
+        """
+
+        column_index = self.column_index()
+
+        missing_columns = [
+            column_name for column_name in columns if column_name not in column_index
+        ]
+
+        if missing_columns:
+            raise KeyError('Columns not found in dataset: {}'.format(missing_columns))
+
+        columns_by_partition = {}
+        for column_name in columns:
+            for partition in column_index[column_name]:
+                columns_by_partition.setdefault(partition, []).append(column_name)
+
+        return [
+            (partition, columns_by_partition[partition])
+            for partition in self.partitions
+            if partition in columns_by_partition
+        ]
+
+    def row_groups(self):
+        """
+        Returns lists of partitions that hold the same rows, in partition order. Partitions with
+        disjoint columns (column partitions) are in the same group, and a partition that repeats
+        a column of the current group (e.g. the first of rows appended to the table) starts a new
+        group.
+        """
+
+        row_groups = []
+        for partition, group_id in zip(self.partitions, self.row_group_ids()):
+            if group_id == len(row_groups): row_groups.append([])
+
+            row_groups[group_id].append(partition)
+
+        return row_groups
+
+    def row_group_ids(self):
+        """
+        Returns the row group (an index into `row_groups`) of each partition, in partition order.
+        """
+
+        # resolve column names of each partition concurrently (only reads schemas)
+        self.column_index()
+
+        return row_group_ids(partition.column_names for partition in self.partitions)
+
+    def select_row_groups(self, stats_predicate):
+        """
+        Returns a dataset of only the row groups (see `row_groups`) for which
+        `stats_predicate(column_stats)` is True, given the merged statistics of the group's
+        partitions (see `select_row_group_partitions`). Pruned partitions are never read; when a
+        predicate only references some column partitions, their statistics decide for every
+        partition with the same rows.
+        """
+
+        # read column names and statistics of partitions concurrently (only reads schemas)
+        partition_stats = list(self._map_partitions(
+            lambda partition: partition.column_stats, self.partitions
+        ))
+
+        selected_partitions = [
+            self.partitions[partition_ndx]
+            for partition_ndx in select_row_group_partitions(
+                (partition.column_names for partition in self.partitions),
+                partition_stats,
+                stats_predicate
+            )
+        ]
+
+        self.logger.info('--- pruned {} of {} partitions using column statistics'.format(
+            len(self.partitions) - len(selected_partitions), len(self.partitions)
+        ))
+
+        return self.__class__(
+            selected_partitions,
+            use_mmap=self.use_mmap,
+            max_workers=self.max_workers,
+            max_in_flight=self.max_in_flight
+        )
+
+    def count_rows(self):
+        """
+        Returns the number of rows of the dataset that are not marked deleted, from the row count
+        and delete vector of the first partition of each row group; no data is read.
+        """
+
+        return sum(self._map_partitions(
+            lambda partition: partition.count_rows(),
+            [row_group[0] for row_group in self.row_groups()]
+        ))
+
+    def delete_rows(self, row_ndx):
+        """
+        Marks rows of the dataset deleted, by their (0-based) index in the whole table, without
+        rewriting any partition (see `SkyhookFileWriter.delete_partition_rows`). Rows are deleted
+        from every column partition of their row group (see `row_groups`), so that partitions
+        with the same rows still align when read. Returns the number of rows marked deleted.
+        """
+
+        row_ndx = numpy.unique(numpy.asarray(row_ndx, dtype=numpy.int64))
+
+        # resolve row counts of partitions concurrently (only reads schemas)
+        list(self._map_partitions(lambda partition: partition.num_rows, self.partitions))
+
+        row_groups = self.row_groups()
+        num_rows   = sum(row_group[0].num_rows for row_group in row_groups)
+
+        if len(row_ndx) and (row_ndx[0] < 0 or row_ndx[-1] >= num_rows):
+            raise IndexError(f'Row indices must be in [0, {num_rows})')
+
+        group_start, deleted_count = 0, 0
+        for row_group in row_groups:
+            group_end = group_start + row_group[0].num_rows
+
+            group_rows = row_ndx[(row_ndx >= group_start) & (row_ndx < group_end)] - group_start
+            if len(group_rows):
+                list(self._map_partitions(
+                    lambda partition: partition.delete_rows(group_rows), row_group
+                ))
+
+                deleted_count += len(group_rows)
+
+            group_start = group_end
+
+        self.logger.info('--- marked {} rows deleted'.format(deleted_count))
+
+        return deleted_count
+
+    def iter_partitions(self, columns=None):
+        """
+        Generator that yields (partition id, arrow table) pairs, in partition order. If `columns`
+        is given, only partitions holding those columns are read, and each yielded table only
+        contains the requested columns it holds.
+        """
+
+        yield from self.map_partitions(
+            lambda partition_id, tbl_part: (partition_id, tbl_part), columns
+        )
+
+    def map_partitions(self, map_fn, columns=None):
+        """
+        Generator that reads partitions, as `iter_partitions` does, and yields
+        `map_fn(partition id, arrow table)` for each, in partition order. `map_fn` runs on the
+        worker thread that read the partition, so only its result is kept, not the partition.
+        """
+
+        if columns is None:
+            partition_reads = [(partition, None) for partition in self.partitions]
+
+        else:
+            partition_reads = self.partitions_for_columns(columns)
+
+        self.logger.info('--- reading {} of {} partitions'.format(
+            len(partition_reads), len(self.partitions)
+        ))
+
+        def read_partition(partition_read):
+            partition, partition_columns = partition_read
+
+            return map_fn(
+                partition.partition_id,
+                partition.read(columns=partition_columns, use_mmap=self.use_mmap)
+            )
+
+        yield from self._map_partitions(read_partition, partition_reads)
+
+    def iter_row_group_tables(self, columns=None):
+        """
+        Generator that yields an arrow table for each row group (see `row_groups`), in order, with
+        the columns of the group's partitions (only those holding `columns`, if given) combined.
+        Partitions are read ahead as `map_partitions` does, but only one row group is assembled at
+        a time, and combining columns does not copy them.
+        """
+
+        group_ids = dict(zip(self.partitions, self.row_group_ids()))
+
+        if columns is None:
+            read_partitions = self.partitions
+
+        else:
+            read_partitions = [partition for partition, _ in self.partitions_for_columns(columns)]
+
+        group_tables, group_id = [], None
+        for partition, (_, tbl_part) in zip(read_partitions, self.iter_partitions(columns)):
+            if group_tables and group_ids[partition] != group_id:
+                yield arrow_table_from_partitions(group_tables)
+                group_tables = []
+
+            group_tables.append(tbl_part)
+            group_id = group_ids[partition]
+
+        if group_tables: yield arrow_table_from_partitions(group_tables)
+
+    def iter_batches(self, columns=None, batch_rows=None):
+        """
+        Generator that yields the dataset (or a projection onto `columns`, in the given order) as
+        record batches of at most `batch_rows` rows, in row order. Each batch is a (zero-copy)
+        slice of the aligned columns of a single row group, so the table is never assembled.
+        """
+
+        for group_table in self.iter_row_group_tables(columns):
+            if columns is not None: group_table = project_arrow_table(group_table, columns)
+
+            yield from group_table.to_batches(max_chunksize=batch_rows)
+
+    def to_table(self, columns=None):
+        """
+        Returns the dataset (or a projection onto `columns`, in the given order) as an arrow table.
+        """
+
+        data_table = arrow_table_from_partitions(list(self.iter_row_group_tables(columns)))
+
+        if columns is None or data_table is None: return data_table
+
+        return project_arrow_table(data_table, columns)
@@ -0,0 +1,984 @@
+"""
+Sub-module that contains query engines: code that executes a parsed query (see
+`skyhookdm.parsers.QueryParser`) over skyhook data.
+
+`LocalQueryEngine` evaluates queries on the client, over partitions read from local files (a
+`SkyhookDataset`) or fetched from Ceph objects, using `pyarrow.compute` (pyarrow >= 1.0).
+Row groups of a dataset whose column statistics rule out a query's predicates are skipped (a
+table written in one pass is a single row group, so it is only skipped as a whole).
+
+`QueryPlanner` and `FanOutQueryEngine` follow the query lifetime sketched in
+`examples/interfaces/query-lifetime`: a query is planned as run-query invocations over shards of
+a table's objects, which are executed concurrently and merged in object order.
+"""
+
+# core libraries
+import time
+import logging
+import subprocess
+import concurrent.futures
+
+from collections import namedtuple
+
+# dependencies
+import numpy
+import pyarrow
+import pyarrow.compute
+
+# modules from this package
+from skyhookdm import skyhook
+
+# classes
+from skyhookdm.dataformats import SkyhookResultStreamReader
+from skyhookdm.parsers import (Attribute, Between, BooleanOp, Comparison, InList, IsNull,
+                               Literal, Not, QueryParser)
+
+# functions
+from skyhookdm.util import bounded_ordered_map
+from skyhookdm.parsers import predicate_attributes
+from skyhookdm.dataformats import (arrow_table_from_partitions, arrow_table_from_row_groups,
+                                   is_nan, project_arrow_table, row_group_ids)
+
+
+# ------------------------------
+# Module-level Variables
+comparison_functions = {
+    '=' : pyarrow.compute.equal,
+    '!=': pyarrow.compute.not_equal,
+    '<' : pyarrow.compute.less,
+    '<=': pyarrow.compute.less_equal,
+    '>' : pyarrow.compute.greater,
+    '>=': pyarrow.compute.greater_equal,
+}
+
+# the comparison with its operands swapped, e.g. `5 < a` is `a > 5`
+flipped_comparisons = {
+    '<' : '>' ,
+    '<=': '>=',
+    '>' : '<' ,
+    '>=': '<=',
+}
+
+# default number of rows in each batch that predicates are evaluated over
+default_batch_rows = 65536
+
+# the state of an aggregate over part of a table; only the fields an aggregate function needs
+# are computed (see `aggregate_fields`), and others are None
+PartialAggregate = namedtuple('PartialAggregate', ['count', 'sum', 'min', 'max', 'nonzero'])
+
+aggregate_fields = {
+    'SUM'          : ('sum', )         ,
+    'COUNT'        : ('count', )       ,
+    'MIN'          : ('min', )         ,
+    'MAX'          : ('max', )         ,
+    'AVG'          : ('sum', 'count')  ,
+    'COUNT_NONZERO': ('nonzero', )     ,
+}
+
+# how each field of partial aggregates is merged
+aggregate_field_merges = {
+    'count'  : lambda val_a, val_b: val_a + val_b,
+    'sum'    : lambda val_a, val_b: val_a + val_b,
+    'min'    : min,
+    'max'    : max,
+    'nonzero': lambda val_a, val_b: val_a + val_b,
+}
+
+# names of hash aggregate functions (see `pyarrow.Table.group_by`) for each field
+aggregate_field_kernels = {
+    'count'  : 'count',
+    'sum'    : 'sum'  ,
+    'min'    : 'min'  ,
+    'max'    : 'max'  ,
+    'nonzero': 'sum'  ,
+}
+
+# a run-query invocation over objects [start_obj, start_obj + num_objs)
+QueryShard  = namedtuple('QueryShard' , ['shard_id', 'start_obj', 'num_objs', 'command_args'])
+
+# how long a shard took (from launching run-query until its output was decoded), and its output
+ShardTiming = namedtuple('ShardTiming', ['shard_id', 'start_obj', 'num_objs', 'elapsed_s',
+                                         'partition_count', 'byte_count'])
+
+
+# ------------------------------
+# Functions
+def evaluate_operand(operand, record_batch):
+    """
+    Returns an arrow array for an attribute (dictionary-encoded columns are decoded, since
+    compute kernels compare plain values), or a python value for a literal.
+    """
+
+    if isinstance(operand, Literal): return operand.value
+
+    arrow_column = record_batch.column(record_batch.schema.get_field_index(operand.name))
+    if pyarrow.types.is_dictionary(arrow_column.type):
+        arrow_column = arrow_column.dictionary_decode()
+
+    return arrow_column
+
+
+def evaluate_predicate(predicate, record_batch):
+    """
+    Evaluates a predicate expression tree over a record batch, returning a boolean array (or a
+    boolean scalar, if the predicate only contains literals). Comparisons with nulls are null,
+    which a filter treats as false.
+    """
+
+    if isinstance(predicate, (Attribute, Literal)):
+        return evaluate_operand(predicate, record_batch)
+
+    if isinstance(predicate, Comparison):
+        return comparison_functions[predicate.op](
+            evaluate_operand(predicate.left, record_batch),
+            evaluate_operand(predicate.right, record_batch)
+        )
+
+    if isinstance(predicate, BooleanOp):
+        boolean_fn = (
+            pyarrow.compute.and_kleene if predicate.op == 'AND' else pyarrow.compute.or_kleene
+        )
+
+        boolean_mask = evaluate_predicate(predicate.operands[0], record_batch)
+        for operand in predicate.operands[1:]:
+            boolean_mask = boolean_fn(boolean_mask, evaluate_predicate(operand, record_batch))
+
+        return boolean_mask
+
+    if isinstance(predicate, Not):
+        return pyarrow.compute.invert(evaluate_predicate(predicate.operand, record_batch))
+
+    if isinstance(predicate, Between):
+        operand_vals = evaluate_operand(predicate.operand, record_batch)
+        boolean_mask = pyarrow.compute.and_kleene(
+            pyarrow.compute.greater_equal(
+                operand_vals, evaluate_operand(predicate.low, record_batch)
+            ),
+            pyarrow.compute.less_equal(
+                operand_vals, evaluate_operand(predicate.high, record_batch)
+            )
+        )
+
+    elif isinstance(predicate, InList):
+        operand_vals = evaluate_operand(predicate.operand, record_batch)
+        boolean_mask = pyarrow.compute.is_in(
+            operand_vals,
+            value_set=pyarrow.array(
+                [value_literal.value for value_literal in predicate.values]
+            ).cast(operand_vals.type)
+        )
+
+    elif isinstance(predicate, IsNull):
+        boolean_mask = pyarrow.compute.is_null(evaluate_operand(predicate.operand, record_batch))
+
+    else:
+        raise TypeError(f'Unsupported predicate node: {predicate}')
+
+    return pyarrow.compute.invert(boolean_mask) if predicate.negated else boolean_mask
+
+
+def comparison_may_match(op, column_stats, value):
+    """
+    Returns False if no value in the range of a column's statistics satisfies `<column> <op>
+    <value>`.
+    """
+
+    # comparisons with null are never true, and a column without a minimum only holds nulls
+    if value is None or column_stats.min is None: return False
+
+    # the range of a column holding NaN is unknown (and NaN != <value> is true)
+    if is_nan(column_stats.min) or is_nan(column_stats.max): return True
+
+    if op == '=' : return column_stats.min <= value <= column_stats.max
+    if op == '!=': return not (column_stats.min == column_stats.max == value)
+    if op == '<' : return column_stats.min < value
+    if op == '<=': return column_stats.min <= value
+    if op == '>' : return column_stats.max > value
+    if op == '>=': return column_stats.max >= value
+
+    return True
+
+
+def predicate_may_match(predicate, column_stats):
+    """
+    Returns False only if no row of a partition (or group of partitions) with the given column
+    statistics (column name -> skyhook.ColumnStats) can satisfy a predicate. Attributes without
+    statistics, and predicate nodes that statistics cannot decide, may always match.
+    """
+
+    if isinstance(predicate, BooleanOp):
+        operand_matches = [
+            predicate_may_match(operand, column_stats) for operand in predicate.operands
+        ]
+
+        return all(operand_matches) if predicate.op == 'AND' else any(operand_matches)
+
+    if isinstance(predicate, Comparison) and isinstance(predicate.left, Literal):
+        predicate = Comparison(
+            flipped_comparisons.get(predicate.op, predicate.op), predicate.right, predicate.left
+        )
+
+    # statistics only decide tests of an attribute against literals
+    if isinstance(predicate, Comparison): operand = predicate.left
+    else:                                 operand = getattr(predicate, 'operand', None)
+
+    if not isinstance(operand, Attribute) or operand.name not in column_stats: return True
+
+    operand_stats = column_stats[operand.name]
+
+    try:
+        if isinstance(predicate, Comparison) and isinstance(predicate.right, Literal):
+            return comparison_may_match(predicate.op, operand_stats, predicate.right.value)
+
+        if isinstance(predicate, Between) and not predicate.negated:
+            if not isinstance(predicate.low, Literal) or not isinstance(predicate.high, Literal):
+                return True
+
+            return (
+                comparison_may_match('>=', operand_stats, predicate.low.value)
+                and comparison_may_match('<=', operand_stats, predicate.high.value)
+            )
+
+        if isinstance(predicate, InList) and not predicate.negated:
+            return any(
+                not isinstance(value, Literal)
+                or comparison_may_match('=', operand_stats, value.value)
+                for value in predicate.values
+            )
+
+        if isinstance(predicate, IsNull):
+            if predicate.negated: return operand_stats.min is not None
+
+            return operand_stats.null_count > 0
+
+    # e.g. a string literal compared to a numeric column; evaluation decides
+    except TypeError:
+        return True
+
+    return True
+
+
+def partial_aggregate(arrow_array, field_names):
+    """
+    Computes the given fields of a PartialAggregate over an arrow array.
+    """
+
+    field_values = dict.fromkeys(PartialAggregate._fields)
+
+    if 'count' in field_names:
+        field_values['count'] = pyarrow.compute.count(arrow_array).as_py()
+
+    if 'sum' in field_names:
+        field_values['sum'] = pyarrow.compute.sum(arrow_array).as_py()
+
+    if 'min' in field_names or 'max' in field_names:
+        min_max = pyarrow.compute.min_max(arrow_array).as_py()
+        field_values['min'], field_values['max'] = min_max['min'], min_max['max']
+
+    if 'nonzero' in field_names:
+        field_values['nonzero'] = pyarrow.compute.sum(
+            pyarrow.compute.not_equal(arrow_array, 0).cast(pyarrow.int64())
+        ).as_py() or 0
+
+    return PartialAggregate(**field_values)
+
+
+def merge_partial_aggregates(partial_a, partial_b):
+    """
+    Merges two PartialAggregates. Fields that are None (e.g. the sum of only nulls) are ignored.
+    """
+
+    if partial_a is None: return partial_b
+
+    return PartialAggregate(*[
+        field_b if field_a is None else (
+            field_a if field_b is None else aggregate_field_merges[field_name](field_a, field_b)
+        )
+        for field_name, field_a, field_b in zip(PartialAggregate._fields, partial_a, partial_b)
+    ])
+
+
+def finalize_aggregate(function_name, partial):
+    if function_name == 'AVG':
+        return partial.sum / partial.count if partial.count else None
+
+    if function_name in ('COUNT', 'COUNT_NONZERO'):
+        return getattr(partial, aggregate_fields[function_name][0]) or 0
+
+    return getattr(partial, aggregate_fields[function_name][0])
+
+
+def aggregate_column_name(function_name, attr_name):
+    return f'{function_name.lower()}({attr_name})'
+
+
+# ------------------------------
+# Classes
+class LocalQueryEngine(object):
+    """
+    Executes a parsed query on the client. Only the partitions holding projected or filtered
+    attributes are read (projection before decode), and predicates are evaluated one record
+    batch at a time.
+
+    Over a SkyhookDataset, partitions are read (with bounded read-ahead) and assembled one row
+    group at a time, and batches are slices of a row group's aligned columns, so the unfiltered
+    table is never assembled. Each partition of the current row group is still read whole:
+    memory-mapped arrow and flatbuffer partitions are only paged in as batches are evaluated,
+    but parquet partitions are decoded. Over Ceph objects, which arrive out of order, the
+    required columns of every object are assembled before predicates are evaluated.
+    """
+
+    logger = logging.getLogger('{}.{}'.format(__module__, __name__))
+    logger.setLevel(logging.INFO)
+
+    @classmethod
+    def for_query_str(cls, query_str, **kwargs):
+        return cls(QueryParser.parse(query_str), **kwargs)
+
+    def __init__(self, query_representation, batch_rows=default_batch_rows, **kwargs):
+        super().__init__(**kwargs)
+
+        self.projection = query_representation.get('projection') or []
+        self.predicates = query_representation.get('predicates') or None
+        self.aggregates = query_representation.get('aggregates') or []
+        self.group_by   = query_representation.get('group_by') or []
+        self.batch_rows = batch_rows
+
+    def required_attributes(self):
+        """
+        Returns the attributes to read: projected (or grouping and aggregated) attributes, then
+        any other attributes that predicates reference. Returns None if every attribute is needed.
+        """
+
+        if self.aggregates:
+            if any(agg.attribute == '*' and agg.function != 'COUNT' for agg in self.aggregates):
+                return None
+
+            query_attrs = self.group_by + [
+                agg.attribute for agg in self.aggregates if agg.attribute != '*'
+            ]
+
+        elif self.projection:
+            query_attrs = self.projection
+
+        else:
+            return None
+
+        required_attrs = []
+        for attr_name in query_attrs + predicate_attributes(self.predicates):
+            if attr_name not in required_attrs: required_attrs.append(attr_name)
+
+        return required_attrs or None
+
+    def filter_batches(self, record_batches, apply_projection=True):
+        """
+        Generator that applies predicates and then (unless `apply_projection` is False) the
+        projection to each record batch.
+        """
+
+        for record_batch in record_batches:
+            if self.predicates is not None:
+                record_batch = record_batch.filter(
+                    evaluate_predicate(self.predicates, record_batch)
+                )
+
+            if self.projection and apply_projection:
+                record_batch = pyarrow.RecordBatch.from_arrays(
+                    [
+                        record_batch.column(record_batch.schema.get_field_index(attr_name))
+                        for attr_name in self.projection
+                    ],
+                    names=self.projection
+                )
+
+            yield record_batch
+
+    def batches_for_table(self, arrow_table, apply_projection=True):
+        """
+        Generator that yields filtered and projected record batches of an arrow table, whose
+        columns may have been assembled from separate column partitions.
+        """
+
+        required_attrs = self.required_attributes()
+        if required_attrs is not None:
+            arrow_table = project_arrow_table(arrow_table, required_attrs)
+
+        yield from self.filter_batches(
+            arrow_table.to_batches(max_chunksize=self.batch_rows), apply_projection
+        )
+
+    # ------------------------------
+    # Aggregation
+    def aggregate_targets(self, attr_names, count_rows=True):
+        """
+        Returns (function, attribute) pairs to aggregate over data with the given attributes.
+        Aggregates over '*' are expanded to each (non-grouping) attribute, and aggregates over
+        attributes that are not in the data are skipped, since they are in another partition.
+        """
+
+        aggregate_targets = []
+        for agg in self.aggregates:
+            if agg.attribute == '*' and agg.function == 'COUNT':
+                if count_rows: aggregate_targets.append((agg.function, '*'))
+
+            elif agg.attribute == '*':
+                aggregate_targets.extend(
+                    (agg.function, attr_name)
+                    for attr_name in attr_names if attr_name not in self.group_by
+                )
+
+            elif agg.attribute in attr_names:
+                aggregate_targets.append((agg.function, agg.attribute))
+
+        return aggregate_targets
+
+    def partial_aggregates(self, record_batches, count_rows=True):
+        """
+        Computes partial aggregates over record batches (with predicates already applied), and
+        returns a dictionary of group key -> {(function, attribute): PartialAggregate}. Without
+        a GROUP BY clause, the only group key is (). COUNT(*) is only computed if `count_rows`.
+        """
+
+        group_partials = {}
+
+        for record_batch in record_batches:
+            aggregate_targets = self.aggregate_targets(record_batch.schema.names, count_rows)
+
+            if self.group_by:
+                batch_partials = self.grouped_partial_aggregates(record_batch, aggregate_targets)
+
+            else:
+                batch_partials = {(): {
+                    (function_name, attr_name): (
+                        PartialAggregate(record_batch.num_rows, None, None, None, None)
+                        if attr_name == '*' else
+                        partial_aggregate(
+                            record_batch.column(record_batch.schema.get_field_index(attr_name)),
+                            aggregate_fields[function_name]
+                        )
+                    )
+                    for function_name, attr_name in aggregate_targets
+                }}
+
+            self.merge_group_partials(group_partials, batch_partials)
+
+        return group_partials
+
+    def row_count_partials(self, row_count):
+        """
+        Returns partial aggregates, as `partial_aggregates` does without a GROUP BY clause, of
+        only COUNT(*) (if the query has it), for `row_count` rows.
+        """
+
+        count_targets = self.aggregate_targets([], count_rows=True)
+        if not count_targets: return {}
+
+        return {(): {
+            count_target: PartialAggregate(row_count, None, None, None, None)
+            for count_target in count_targets
+        }}
+
+    def grouped_partial_aggregates(self, record_batch, aggregate_targets):
+        """
+        Computes partial aggregates for each group of a record batch, with hash aggregation
+        (`pyarrow.Table.group_by`, pyarrow >= 7.0).
+        """
+
+        # group keys are compared by value, so dictionary-encoded keys are decoded
+        batch_table = pyarrow.Table.from_arrays(
+            [
+                evaluate_operand(Attribute(attr_name), record_batch)
+                if attr_name in self.group_by else record_batch.column(attr_ndx)
+                for attr_ndx, attr_name in enumerate(record_batch.schema.names)
+            ],
+            names=record_batch.schema.names
+        )
+
+        # rows and non-zero values are counted by summing indicator columns
+        kernel_inputs, hash_aggregations = {}, []
+        for function_name, attr_name in aggregate_targets:
+            for field_name in aggregate_fields[function_name]:
+                if attr_name == '*':
+                    input_name, input_vals = '__rows', pyarrow.array(
+                        numpy.ones(batch_table.num_rows, dtype=numpy.int64)
+                    )
+
+                elif field_name == 'nonzero':
+                    input_name, input_vals = f'__nonzero_{attr_name}', pyarrow.compute.not_equal(
+                        batch_table.column(attr_name), 0
+                    ).cast(pyarrow.int64())
+
+                else:
+                    input_name, input_vals = attr_name, None
+
+                kernel_name = 'sum' if attr_name == '*' else aggregate_field_kernels[field_name]
+                if (input_name, kernel_name) in hash_aggregations: continue
+
+                if input_vals is not None and input_name not in kernel_inputs:
+                    kernel_inputs[input_name] = input_vals
+
+                hash_aggregations.append((input_name, kernel_name))
+
+        for input_name, input_vals in kernel_inputs.items():
+            batch_table = batch_table.append_column(input_name, input_vals)
+
+        grouped_table = batch_table.group_by(self.group_by).aggregate(hash_aggregations)
+        grouped_vals  = grouped_table.to_pydict()
+
+        batch_partials = {}
+        for row_ndx in range(grouped_table.num_rows):
+            group_key = tuple(grouped_vals[group_attr][row_ndx] for group_attr in self.group_by)
+
+            batch_partials[group_key] = {}
+            for function_name, attr_name in aggregate_targets:
+                field_values = dict.fromkeys(PartialAggregate._fields)
+
+                for field_name in aggregate_fields[function_name]:
+                    if attr_name == '*':
+                        field_values[field_name] = grouped_vals['__rows_sum'][row_ndx]
+
+                    elif field_name == 'nonzero':
+                        field_values[field_name] = grouped_vals[
+                            f'__nonzero_{attr_name}_sum'
+                        ][row_ndx]
+
+                    else:
+                        field_values[field_name] = grouped_vals[
+                            f'{attr_name}_{aggregate_field_kernels[field_name]}'
+                        ][row_ndx]
+
+                batch_partials[group_key][(function_name, attr_name)] = PartialAggregate(
+                    **field_values
+                )
+
+        return batch_partials
+
+    def merge_group_partials(self, group_partials, other_partials):
+        """
+        Merges partial aggregates (as returned by `partial_aggregates`) into `group_partials`.
+        """
+
+        for group_key, target_partials in other_partials.items():
+            merged_partials = group_partials.setdefault(group_key, {})
+
+            for aggregate_target, partial in target_partials.items():
+                merged_partials[aggregate_target] = merge_partial_aggregates(
+                    merged_partials.get(aggregate_target), partial
+                )
+
+        return group_partials
+
+    def finalize_aggregates(self, group_partials):
+        """
+        Returns an arrow table with a row for each group: grouping attributes, then the final
+        value of each aggregate (e.g. 'sum(cell_000)').
+        """
+
+        # without a GROUP BY clause, there is one result row, even over no rows
+        if not self.group_by and not group_partials:
+            group_partials = {(): {}}
+
+        aggregate_targets = []
+        for target_partials in group_partials.values():
+            for aggregate_target in target_partials:
+                if aggregate_target not in aggregate_targets:
+                    aggregate_targets.append(aggregate_target)
+
+        result_columns = {
+            group_attr: [group_key[group_ndx] for group_key in group_partials]
+            for group_ndx, group_attr in enumerate(self.group_by)
+        }
+
+        for function_name, attr_name in aggregate_targets:
+            result_columns[aggregate_column_name(function_name, attr_name)] = [
+                finalize_aggregate(
+                    function_name,
+                    target_partials.get(
+                        (function_name, attr_name), PartialAggregate(0, None, None, None, 0)
+                    )
+                )
+                for target_partials in group_partials.values()
+            ]
+
+        return pyarrow.Table.from_pydict(result_columns)
+
+    def aggregate_table(self, arrow_table):
+        return self.finalize_aggregates(self.partial_aggregates(
+            self.batches_for_table(arrow_table, apply_projection=False)
+        ))
+
+    def prune_dataset(self, skyhook_dataset):
+        """
+        Returns the dataset without the row groups (e.g. row partitions) whose column statistics
+        cannot satisfy the query's predicates (see `predicate_may_match` and
+        `SkyhookDataset.select_row_groups`).
+        """
+
+        if self.predicates is None: return skyhook_dataset
+
+        return skyhook_dataset.select_row_groups(
+            lambda column_stats: predicate_may_match(self.predicates, column_stats)
+        )
+
+    def execute_aggregates(self, skyhook_dataset):
+        """
+        Returns the result of an aggregate query over a SkyhookDataset as an arrow table.
+
+        If the query has no predicates or GROUP BY clause, each column partition is aggregated
+        independently, on the worker that reads it, and only partial aggregates are merged; if
+        it only has COUNT(*), rows are counted without reading any data (see
+        `SkyhookDataset.count_rows`). Otherwise, rows span partitions, so batches of the needed
+        attributes are assembled from each row group's partitions (see
+        `SkyhookDataset.iter_batches`).
+        """
+
+        if self.predicates is not None or self.group_by:
+            skyhook_dataset = self.prune_dataset(skyhook_dataset)
+            if not skyhook_dataset.partitions: return self.finalize_aggregates({})
+
+            return self.finalize_aggregates(self.partial_aggregates(
+                self.filter_batches(
+                    skyhook_dataset.iter_batches(self.required_attributes(), self.batch_rows),
+                    apply_projection=False
+                )
+            ))
+
+        if all(agg.function == 'COUNT' and agg.attribute == '*' for agg in self.aggregates):
+            return self.finalize_aggregates(
+                self.row_count_partials(skyhook_dataset.count_rows())
+            )
+
+        read_partitions = skyhook_dataset.partitions_for_columns(
+            self.required_attributes() or skyhook_dataset.column_names
+        )
+
+        group_ids = dict(zip(skyhook_dataset.partitions, skyhook_dataset.row_group_ids()))
+
+        partition_results = skyhook_dataset.map_partitions(
+            lambda partition_id, tbl_part: (
+                self.partial_aggregates(
+                    tbl_part.to_batches(max_chunksize=self.batch_rows), count_rows=False
+                ),
+                tbl_part.num_rows
+            ),
+            columns=self.required_attributes()
+        )
+
+        group_partials, counted_groups = {}, set()
+        for read_partition, partition_result in zip(read_partitions, partition_results):
+            partition_partials, row_count = partition_result
+            self.merge_group_partials(group_partials, partition_partials)
+
+            # rows are counted once per row group, by the first of its partitions that is read
+            group_id = group_ids[read_partition[0]]
+            if group_id not in counted_groups:
+                counted_groups.add(group_id)
+                self.merge_group_partials(group_partials, self.row_count_partials(row_count))
+
+        return self.finalize_aggregates(group_partials)
+
+    def execute_batches(self, skyhook_dataset):
+        """
+        Generator that yields the query's result, as record batches, over a SkyhookDataset.
+        Partitions that the query's predicates rule out are not read, and the others are read one
+        row group at a time (see `SkyhookDataset.iter_batches`).
+        """
+
+        skyhook_dataset = self.prune_dataset(skyhook_dataset)
+        if not skyhook_dataset.partitions: return
+
+        yield from self.filter_batches(
+            skyhook_dataset.iter_batches(self.required_attributes(), self.batch_rows)
+        )
+
+    def execute_object_batches(self, pool_context, table_name, start_obj=0, num_objs=1,
+                               db_schema='public', max_in_flight=64):
+        """
+        Generator that yields the query's result, as record batches, over objects fetched from a
+        Ceph pool (see `read_object_batches`). Objects hold column partitions, so each object's
+        batches are assembled, in object order, before predicates are evaluated.
+        """
+
+        data_table = self.object_table(self.read_object_batches(
+            pool_context, table_name, start_obj, num_objs, db_schema, max_in_flight
+        ))
+
+        if data_table is None: return
+
+        yield from self.batches_for_table(data_table)
+
+    def execute_object_aggregates(self, pool_context, table_name, start_obj=0, num_objs=1,
+                                  db_schema='public', max_in_flight=64):
+        """
+        Returns the result of an aggregate query over objects fetched from a Ceph pool as an
+        arrow table. As for `execute_aggregates`, if the query has no predicates or GROUP BY
+        clause, each object's batches are aggregated as they arrive, and are not kept.
+        """
+
+        object_batches = self.read_object_batches(
+            pool_context, table_name, start_obj, num_objs, db_schema, max_in_flight
+        )
+
+        if self.predicates is not None or self.group_by:
+            data_table = self.object_table(object_batches)
+            if data_table is None: return self.finalize_aggregates({})
+
+            return self.aggregate_table(data_table)
+
+        # rows of each object, and its columns, so that rows are counted once per row group
+        group_partials, object_rows = {}, {}
+        for obj_id, record_batch in object_batches:
+            self.merge_group_partials(
+                group_partials, self.partial_aggregates([record_batch], count_rows=False)
+            )
+
+            row_count, column_names = object_rows.get(obj_id, (0, record_batch.schema.names))
+            object_rows[obj_id]     = (row_count + record_batch.num_rows, column_names)
+
+        # rows are counted once per row group (objects that hold the same rows)
+        obj_ids   = sorted(object_rows)
+        group_ids = row_group_ids(object_rows[obj_id][1] for obj_id in obj_ids)
+
+        group_rows = {}
+        for obj_id, group_id in zip(obj_ids, group_ids):
+            group_rows.setdefault(group_id, object_rows[obj_id][0])
+
+        if group_rows:
+            self.merge_group_partials(
+                group_partials, self.row_count_partials(sum(group_rows.values()))
+            )
+
+        return self.finalize_aggregates(group_partials)
+
+    def read_object_batches(self, pool_context, table_name, start_obj, num_objs, db_schema,
+                            max_in_flight):
+        """
+        Returns (object id, record batch) pairs of objects fetched from a Ceph pool (see
+        `RadosIOContext.read_table_batches`). Objects whose column statistics cannot satisfy the
+        query's predicates are not read (see `RadosIOContext.select_table_objects`).
+        """
+
+        obj_ids = None
+        if self.predicates is not None:
+            obj_ids = pool_context.select_table_objects(
+                table_name,
+                lambda column_stats: predicate_may_match(self.predicates, column_stats),
+                start_obj, num_objs, db_schema
+            )
+
+        return pool_context.read_table_batches(
+            table_name, start_obj, num_objs, db_schema,
+            max_in_flight=max_in_flight, obj_ids=obj_ids
+        )
+
+    def object_table(self, object_batches):
+        """
+        Assembles (object id, record batch) pairs into a table, with columns in object order.
+        Objects that repeat columns of earlier objects hold appended rows (see `row_group_ids`).
+        """
+
+        batches_by_obj = {}
+        for obj_id, record_batch in object_batches:
+            batches_by_obj.setdefault(obj_id, []).append(record_batch)
+
+        obj_tables = [
+            pyarrow.Table.from_batches(batches_by_obj[obj_id])
+            for obj_id in sorted(batches_by_obj)
+        ]
+
+        return arrow_table_from_row_groups(
+            obj_tables, row_group_ids(obj_table.column_names for obj_table in obj_tables)
+        )
+
+    def execute(self, skyhook_dataset):
+        """
+        Returns the query's result over a SkyhookDataset as an arrow table.
+        """
+
+        if self.aggregates: return self.execute_aggregates(skyhook_dataset)
+
+        return self.table_from_batches(self.execute_batches(skyhook_dataset))
+
+    def table_from_batches(self, result_batches):
+        result_batches = list(result_batches)
+
+        if not result_batches: return None
+
+        return pyarrow.Table.from_batches(result_batches)
+
+
+class QueryPlanner(object):
+    """
+    Plans a query representation as argument lists for the run-query binary: the table's object
+    range is split into shards of at most `shard_size` objects, with one invocation per shard.
+    """
+
+    logger = logging.getLogger('{}.{}'.format(__module__, __name__))
+    logger.setLevel(logging.INFO)
+
+    @classmethod
+    def shard_ranges(cls, start_obj, num_objs, shard_size):
+        """
+        Returns (start object, object count) pairs that cover the object range, in order.
+        """
+
+        return [
+            (shard_start, min(shard_size, start_obj + num_objs - shard_start))
+            for shard_start in range(start_obj, start_obj + num_objs, shard_size)
+        ]
+
+    @classmethod
+    def plan(cls, query_representation, path_to_query_bin, ceph_pool, table_name=None,
+             start_obj=0, num_objs=1, shard_size=None, db_schema='public', extra_args=()):
+        """
+        Returns a list of QueryShards. If `table_name` is not given, the query's (first) relation
+        is used. If `shard_size` is not given, a single shard covers every object.
+
+        `path_to_query_bin` may also be a list, to prefix arguments (e.g. an interpreter).
+        """
+
+        query_bin_args = (
+            [path_to_query_bin] if isinstance(path_to_query_bin, str) else list(path_to_query_bin)
+        )
+
+        table_name = table_name or query_representation['relations'][0]
+        shard_size = shard_size or num_objs
+
+        # predicates are evaluated on the client, so attributes they reference are also projected
+        required_attrs  = LocalQueryEngine(query_representation).required_attributes()
+        projection_args = ['--project', ','.join(required_attrs)] if required_attrs else []
+
+        return [
+            QueryShard(
+                shard_id,
+                shard_start,
+                shard_objs,
+                query_bin_args + [
+                    '--start-obj'    , str(shard_start)                    ,
+                    '--num-objs'     , str(shard_objs)                     ,
+                    '--oid-prefix'   , db_schema                           ,
+                    '--pool'         , ceph_pool                           ,
+                    '--table-name'   , table_name                          ,
+                    '--result-format', str(skyhook.FormatTypes.SFT_ARROW)  ,
+                    '--output-format', 'SFT_PYARROW_BINARY'                ,
+                ] + projection_args + list(extra_args)
+            )
+            for shard_id, (shard_start, shard_objs) in enumerate(
+                cls.shard_ranges(start_obj, num_objs, shard_size)
+            )
+        ]
+
+
+class FanOutQueryEngine(object):
+    """
+    Executes QueryShards as concurrent run-query subprocesses, at most `max_parallel` at a time,
+    and merges their results in object order. The timing of each executed shard is recorded in
+    `shard_timings`.
+
+    If `debug_output_prefix` is given, each shard's raw output is also written to
+    '<debug_output_prefix>.<shard id>'.
+    """
+
+    logger = logging.getLogger('{}.{}'.format(__module__, __name__))
+    logger.setLevel(logging.INFO)
+
+    def __init__(self, max_parallel=4, debug_output_prefix=None, **kwargs):
+        super().__init__(**kwargs)
+
+        self.max_parallel        = max_parallel
+        self.debug_output_prefix = debug_output_prefix
+        self.shard_timings       = []
+
+    def run_shard(self, query_shard):
+        """
+        Runs a single shard, and returns its result partitions (as arrow tables) and timing.
+        """
+
+        start_time   = time.perf_counter()
+        debug_handle = None
+
+        if self.debug_output_prefix is not None:
+            debug_handle = open(f'{self.debug_output_prefix}.{query_shard.shard_id:05d}', 'wb')
+
+        try:
+            with subprocess.Popen(query_shard.command_args, stdout=subprocess.PIPE) as query_proc:
+                shard_partitions = list(
+                    SkyhookResultStreamReader(
+                        query_proc.stdout, debug_stream=debug_handle
+                    ).iter_partitions()
+                )
+
+        finally:
+            if debug_handle is not None: debug_handle.close()
+
+        if query_proc.returncode:
+            raise subprocess.CalledProcessError(query_proc.returncode, query_shard.command_args)
+
+        shard_timing = ShardTiming(
+            query_shard.shard_id,
+            query_shard.start_obj,
+            query_shard.num_objs,
+            time.perf_counter() - start_time,
+            len(shard_partitions),
+            sum(tbl_part.nbytes for tbl_part in shard_partitions)
+        )
+
+        self.logger.info(
+            f'--- shard {shard_timing.shard_id} (objects {shard_timing.start_obj} to '
+            f'{shard_timing.start_obj + shard_timing.num_objs - 1}): '
+            f'{shard_timing.elapsed_s:.3f}s'
+        )
+
+        return shard_partitions, shard_timing
+
+    def iter_shard_partitions(self, query_shards):
+        """
+        Generator that yields each shard's result partitions, in shard (and so object) order.
+        """
+
+        self.shard_timings = []
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            for shard_partitions, shard_timing in bounded_ordered_map(
+                    executor, self.run_shard, query_shards, self.max_parallel):
+                self.shard_timings.append(shard_timing)
+
+                yield shard_partitions
+
+    def execute(self, query_shards, query_representation=None):
+        """
+        Runs every shard and returns the merged result as an arrow table. If the query
+        representation has predicates, they are evaluated on the merged result (see
+        `LocalQueryEngine`), since run-query is only given the projection.
+        """
+
+        result_table = arrow_table_from_partitions([
+            tbl_part
+            for shard_partitions in self.iter_shard_partitions(query_shards)
+            for tbl_part in shard_partitions
+        ])
+
+        query_representation = query_representation or {}
+        if result_table is None: return None
+
+        local_engine = LocalQueryEngine(query_representation)
+
+        if query_representation.get('aggregates'):
+            return local_engine.aggregate_table(result_table)
+
+        if not query_representation.get('predicates'): return result_table
+
+        return local_engine.table_from_batches(local_engine.batches_for_table(result_table))
+
+    def timing_summary(self):
+        return '\n'.join([
+            '\tshard {:4d} => objects [{}, {}) in {:.3f}s ({} partitions, {} bytes)'.format(
+                shard_timing.shard_id,
+                shard_timing.start_obj,
+                shard_timing.start_obj + shard_timing.num_objs,
+                shard_timing.elapsed_s,
+                shard_timing.partition_count,
+                shard_timing.byte_count
+            )
+            for shard_timing in self.shard_timings
+        ])
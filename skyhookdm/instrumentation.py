@@ -0,0 +1,250 @@
+"""
+Sub-module that contains lightweight instrumentation of hot paths: named spans, which accumulate
+wall and CPU time, and named counters (e.g. bytes read, rows decoded, RADOS operations).
+
+Instrumentation is disabled by default. While disabled, `span` returns a shared no-op context
+manager and `count` returns immediately, so instrumented code only pays for a function call and
+a flag check. When enabled (see `enable`, or the `--instrument` flag of each toolbox program),
+spans and counters are aggregated, across threads, into a per-run summary that can be printed
+(`summary`) or exported as JSON (`write_json`).
+
+Counters recorded by this package:
+    bytes_read, bytes_mapped, bytes_written: file and object data read, memory-mapped or written
+    bytes_copied: data copied between buffers (e.g. into a flatbuffer, or by decompression)
+    partitions_read, partitions_written, batches_decoded, rows_decoded
+    rows_deleted: rows dropped by delete vectors when read
+    rados_ops: RADOS operations submitted (reads, writes and xattr operations)
+"""
+
+# core libraries
+import sys
+import json
+import time
+import atexit
+import functools
+import threading
+import collections
+
+
+# ------------------------------
+# Module-level Variables
+
+# guards the accumulated spans and counters, which are updated from worker threads
+_lock     = threading.Lock()
+_enabled  = False
+
+# span name -> SpanStats, and counter name -> value
+_spans    = {}
+_counters = collections.Counter()
+
+# wall and CPU time at which instrumentation was (last) enabled or reset
+_run_start = None
+
+
+# ------------------------------
+# Classes
+class SpanStats(object):
+    """
+    Accumulated measurements of every completed span with the same name. CPU time is that of the
+    thread the span ran on.
+    """
+
+    __slots__ = ('count', 'wall_s', 'cpu_s', 'max_wall_s')
+
+    def __init__(self):
+        self.count      = 0
+        self.wall_s     = 0.0
+        self.cpu_s      = 0.0
+        self.max_wall_s = 0.0
+
+    def as_dict(self):
+        return {
+            'count'     : self.count,
+            'wall_s'    : self.wall_s,
+            'cpu_s'     : self.cpu_s,
+            'max_wall_s': self.max_wall_s,
+        }
+
+
+class Span(object):
+    __slots__ = ('name', 'start_wall', 'start_cpu')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start_wall = time.perf_counter()
+        self.start_cpu  = time.thread_time()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall_s = time.perf_counter() - self.start_wall
+        cpu_s  = time.thread_time() - self.start_cpu
+
+        with _lock:
+            span_stats = _spans.get(self.name)
+            if span_stats is None: span_stats = _spans[self.name] = SpanStats()
+
+            span_stats.count      += 1
+            span_stats.wall_s     += wall_s
+            span_stats.cpu_s      += cpu_s
+            span_stats.max_wall_s  = max(span_stats.max_wall_s, wall_s)
+
+        return False
+
+
+class NullSpan(object):
+    """
+    The span returned while instrumentation is disabled; it records nothing.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+null_span = NullSpan()
+
+
+# ------------------------------
+# Functions
+def span(name):
+    """
+    Returns a context manager that measures the code it wraps as the span `name`.
+    """
+
+    if not _enabled: return null_span
+
+    return Span(name)
+
+
+def spanned(name):
+    """
+    Decorator that measures each call of a function as the span `name`.
+    """
+
+    def decorator(span_fn):
+        @functools.wraps(span_fn)
+        def spanned_fn(*args, **kwargs):
+            if not _enabled: return span_fn(*args, **kwargs)
+
+            with Span(name):
+                return span_fn(*args, **kwargs)
+
+        return spanned_fn
+
+    return decorator
+
+
+def count(name, value=1):
+    if not _enabled: return
+
+    with _lock:
+        _counters[name] += value
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable():
+    global _enabled
+
+    if not _enabled: reset()
+    _enabled = True
+
+
+def disable():
+    global _enabled
+
+    _enabled = False
+
+
+def reset():
+    global _run_start
+
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+        _run_start = (time.perf_counter(), time.process_time())
+
+
+def as_dict():
+    """
+    Returns the run's measurements: wall and (process) CPU time since instrumentation was
+    enabled, each span's SpanStats, and each counter.
+    """
+
+    run_wall_s, run_cpu_s = None, None
+    if _run_start is not None:
+        run_wall_s = time.perf_counter() - _run_start[0]
+        run_cpu_s  = time.process_time() - _run_start[1]
+
+    with _lock:
+        return {
+            'wall_s'  : run_wall_s,
+            'cpu_s'   : run_cpu_s,
+            'spans'   : {
+                span_name: span_stats.as_dict()
+                for span_name, span_stats in sorted(_spans.items())
+            },
+            'counters': dict(sorted(_counters.items())),
+        }
+
+
+def summary():
+    run_data = as_dict()
+
+    summary_lines = ['Instrumentation: wall (s): {:.4f} cpu (s): {:.4f}'.format(
+        run_data['wall_s'] or 0, run_data['cpu_s'] or 0
+    )]
+
+    for span_name, span_stats in run_data['spans'].items():
+        summary_lines.append(
+            '\t{:40s} count: {:>8d} wall (s): {:10.4f} cpu (s): {:10.4f} max (s): {:8.4f}'.format(
+                span_name, span_stats['count'], span_stats['wall_s'], span_stats['cpu_s'],
+                span_stats['max_wall_s']
+            )
+        )
+
+    for counter_name, counter_val in run_data['counters'].items():
+        summary_lines.append('\t{:40s} {:>16,}'.format(counter_name, counter_val))
+
+    return '\n'.join(summary_lines)
+
+
+def write_json(path_to_output):
+    with open(path_to_output, 'w') as output_handle:
+        json.dump(as_dict(), output_handle, indent=2)
+
+
+def report_at_exit(path_to_json=None, stream=None):
+    """
+    Enables instrumentation, and registers a handler that prints the summary (to stderr, by
+    default) and, if `path_to_json` is given, exports the measurements as JSON when the program
+    exits.
+    """
+
+    def report():
+        print(summary(), file=stream or sys.stderr)
+
+        if path_to_json: write_json(path_to_json)
+
+    enable()
+    atexit.register(report)
+
+
+def report_for_args(parsed_args):
+    """
+    Sets up instrumentation for a toolbox program, if requested by its arguments (see
+    `ArgparseBuilder.add_instrumentation_args`).
+    """
+
+    if parsed_args.instrument or parsed_args.instrument_output:
+        report_at_exit(parsed_args.instrument_output)
@@ -0,0 +1,373 @@
+"""
+Module that contains a local, filesystem-backed stand-in for a RADOS cluster.
+
+`LocalRados` and `LocalIoctx` implement the subset of the `rados.Rados` and `rados.Ioctx`
+interfaces that `skyhookdm.connectors` uses, storing each pool as a directory of object files.
+Operations can be slowed with an injected latency (per operation) and bandwidth (shared by all
+operations of a cluster), so that I/O code paths can be tested and benchmarked without a Ceph
+cluster. To use it, see `RadosConnector.connection_for_local`.
+"""
+
+# core libraries
+import os
+import time
+import uuid
+import errno
+import shutil
+import logging
+import threading
+import urllib.parse
+import concurrent.futures
+
+from collections import namedtuple
+
+
+# ------------------------------
+# Module-level Variables
+
+# sub-directory of a pool directory that holds object xattrs
+xattr_dirname = '.xattrs'
+
+# default length of a synchronous read, the same as the rados library
+default_read_length = 8192
+
+
+# ------------------------------
+# Functions
+def filename_for_key(obj_name):
+    """
+    Returns a filename for an object name or xattr key (which may contain, e.g., '/').
+    """
+
+    return urllib.parse.quote(obj_name, safe='')
+
+
+def key_for_filename(filename):
+    return urllib.parse.unquote(filename)
+
+
+def errno_for_exception(os_err):
+    return -(os_err.errno or errno.EIO)
+
+
+# ------------------------------
+# Classes
+class LocalObject(namedtuple('LocalObject', ['key', 'nspace'])):
+    """
+    An object listed by `LocalIoctx.list_objects` (like `rados.Object`, without data access).
+    """
+
+
+class LocalCompletion(object):
+    """
+    The completion of an asynchronous operation, like `rados.Completion`. A negative return value
+    is an errno code.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.return_value = 0
+        self._is_complete = threading.Event()
+
+    def _complete(self, return_value):
+        self.return_value = return_value
+        self._is_complete.set()
+
+    def is_complete(self):
+        return self._is_complete.is_set()
+
+    def is_safe(self):
+        return self.is_complete()
+
+    def wait_for_complete(self):
+        self._is_complete.wait()
+
+    def wait_for_safe(self):
+        self.wait_for_complete()
+
+    def wait_for_complete_and_cb(self):
+        self.wait_for_complete()
+
+    def get_return_value(self):
+        return self.return_value
+
+
+class LocalRados(object):
+    """
+    Stand-in for a `rados.Rados` cluster handle: each pool is a directory under
+    `path_to_root`.
+
+    `latency_s` is added to every operation. If `bandwidth_bps` is given, the data of every read
+    and write is transferred over a single simulated link at that many bytes per second, so
+    concurrent operations share the bandwidth. Asynchronous operations run on a pool of
+    `max_workers` threads.
+    """
+
+    logger = logging.getLogger('{}.{}'.format(__module__, __name__))
+    logger.setLevel(logging.INFO)
+
+    def __init__(self, path_to_root, latency_s=0.0, bandwidth_bps=None, max_workers=32,
+                 **kwargs):
+        super().__init__(**kwargs)
+
+        self.path_to_root  = path_to_root
+        self.latency_s     = latency_s
+        self.bandwidth_bps = bandwidth_bps
+        self.max_workers   = max_workers
+
+        self.fsid          = str(uuid.uuid5(uuid.NAMESPACE_URL, os.path.abspath(path_to_root)))
+
+        # the simulated link, shared by all operations on this cluster
+        self._link_lock    = threading.Lock()
+        self._executor     = None
+
+    def version(self):
+        return 'local'
+
+    def conf_get(self, option):
+        return f'local ({self.path_to_root})' if option == 'mon initial members' else None
+
+    def connect(self):
+        os.makedirs(self.path_to_root, exist_ok=True)
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def get_fsid(self):
+        return self.fsid
+
+    def get_cluster_stats(self):
+        obj_count, byte_count = 0, 0
+
+        for dir_path, dir_names, file_names in os.walk(self.path_to_root):
+            dir_names[:] = [dir_name for dir_name in dir_names if dir_name != xattr_dirname]
+
+            obj_count  += len(file_names)
+            byte_count += sum(
+                os.path.getsize(os.path.join(dir_path, file_name)) for file_name in file_names
+            )
+
+        return {'kb_used': byte_count // 1024, 'num_objects': obj_count}
+
+    def list_pools(self):
+        return sorted(os.listdir(self.path_to_root))
+
+    def pool_exists(self, pool_name):
+        return os.path.isdir(os.path.join(self.path_to_root, pool_name))
+
+    def create_pool(self, pool_name):
+        os.makedirs(os.path.join(self.path_to_root, pool_name, xattr_dirname), exist_ok=True)
+
+    def delete_pool(self, pool_name):
+        shutil.rmtree(os.path.join(self.path_to_root, pool_name))
+
+    def open_ioctx(self, pool_name):
+        if self._executor is None:
+            raise ValueError('Not connected; call connect() first')
+
+        # like `rados-write`'s target pools, pools are created on first use
+        self.create_pool(pool_name)
+
+        return LocalIoctx(self, os.path.join(self.path_to_root, pool_name))
+
+    def simulate_transfer(self, byte_count):
+        """
+        Sleeps for the injected latency, then for the time the given bytes occupy the link.
+        """
+
+        if self.latency_s: time.sleep(self.latency_s)
+
+        if self.bandwidth_bps and byte_count:
+            with self._link_lock:
+                time.sleep(byte_count / self.bandwidth_bps)
+
+    def submit(self, op_fn, oncomplete=None):
+        """
+        Runs `op_fn` (which returns a return value and any extra callback arguments)
+        asynchronously, and returns a LocalCompletion.
+        """
+
+        completion = LocalCompletion()
+
+        def run_op():
+            try:
+                return_value, *cb_args = op_fn()
+
+            except OSError as os_err:
+                return_value, cb_args = errno_for_exception(os_err), [None]
+
+            # any other error must still complete the operation, or its waiters hang
+            except Exception:
+                self.logger.exception('Asynchronous operation raised an exception')
+                return_value, cb_args = -errno.EIO, [None]
+
+            completion._complete(return_value)
+
+            if oncomplete is not None:
+                try:
+                    oncomplete(completion, *cb_args)
+
+                except Exception:
+                    self.logger.exception('Completion callback raised an exception')
+
+        self._executor.submit(run_op)
+
+        return completion
+
+
+class LocalIoctx(object):
+    """
+    Stand-in for a `rados.Ioctx`: objects are files in the pool directory, and each xattr is a
+    file in `.xattrs/<object>/`.
+    """
+
+    def __init__(self, local_cluster, path_to_pool, **kwargs):
+        super().__init__(**kwargs)
+
+        self.local_cluster = local_cluster
+        self.path_to_pool  = path_to_pool
+        self.is_closed     = False
+
+    def _path_for_obj(self, obj_name):
+        return os.path.join(self.path_to_pool, filename_for_key(obj_name))
+
+    def _path_for_xattr(self, obj_name, xattr_name):
+        return os.path.join(
+            self.path_to_pool,
+            xattr_dirname,
+            filename_for_key(obj_name),
+            filename_for_key(xattr_name)
+        )
+
+    def _require_open(self):
+        if self.is_closed: raise ValueError('Ioctx is closed')
+
+    def close(self):
+        self.is_closed = True
+
+    # ------------------------------
+    # Synchronous operations
+    def write_full(self, obj_name, data):
+        self._require_open()
+        self.local_cluster.simulate_transfer(len(data))
+
+        # write to a temporary file first, so that concurrent readers never see partial data
+        path_to_obj = self._path_for_obj(obj_name)
+        path_to_tmp = f'{path_to_obj}.{threading.get_ident()}.tmp'
+
+        with open(path_to_tmp, 'wb') as obj_handle:
+            obj_handle.write(data)
+
+        os.replace(path_to_tmp, path_to_obj)
+
+        return 0
+
+    def write(self, obj_name, data, offset=0):
+        """
+        Writes data at an offset of an existing object, in place (as `rados.Ioctx.write`).
+        """
+
+        self._require_open()
+        self.local_cluster.simulate_transfer(len(data))
+
+        with open(self._path_for_obj(obj_name), 'r+b') as obj_handle:
+            obj_handle.seek(offset)
+            obj_handle.write(data)
+
+        return 0
+
+    def read(self, obj_name, length=default_read_length, offset=0):
+        self._require_open()
+
+        with open(self._path_for_obj(obj_name), 'rb') as obj_handle:
+            obj_handle.seek(offset)
+            data_read = obj_handle.read(length)
+
+        self.local_cluster.simulate_transfer(len(data_read))
+
+        return data_read
+
+    def stat(self, obj_name):
+        self._require_open()
+        self.local_cluster.simulate_transfer(0)
+
+        obj_stat = os.stat(self._path_for_obj(obj_name))
+
+        return obj_stat.st_size, time.localtime(obj_stat.st_mtime)
+
+    def remove_object(self, obj_name):
+        self._require_open()
+        self.local_cluster.simulate_transfer(0)
+
+        os.remove(self._path_for_obj(obj_name))
+        shutil.rmtree(os.path.dirname(self._path_for_xattr(obj_name, '')), ignore_errors=True)
+
+        return True
+
+    def set_xattr(self, obj_name, xattr_name, xattr_value):
+        self._require_open()
+        self.local_cluster.simulate_transfer(0)
+
+        path_to_xattr = self._path_for_xattr(obj_name, xattr_name)
+        os.makedirs(os.path.dirname(path_to_xattr), exist_ok=True)
+
+        with open(path_to_xattr, 'wb') as xattr_handle:
+            xattr_handle.write(xattr_value)
+
+        return True
+
+    def get_xattr(self, obj_name, xattr_name):
+        self._require_open()
+        self.local_cluster.simulate_transfer(0)
+
+        with open(self._path_for_xattr(obj_name, xattr_name), 'rb') as xattr_handle:
+            return xattr_handle.read()
+
+    def list_objects(self):
+        self._require_open()
+
+        for filename in sorted(os.listdir(self.path_to_pool)):
+            if filename == xattr_dirname or filename.endswith('.tmp'): continue
+
+            yield LocalObject(key_for_filename(filename), '')
+
+    # ------------------------------
+    # Asynchronous operations
+    def aio_write_full(self, obj_name, data, oncomplete=None, onsafe=None):
+        self._require_open()
+
+        return self.local_cluster.submit(
+            lambda: (self.write_full(obj_name, data), ),
+            oncomplete=oncomplete or onsafe
+        )
+
+    def aio_setxattr(self, obj_name, xattr_name, xattr_value, oncomplete=None):
+        self._require_open()
+
+        return self.local_cluster.submit(
+            lambda: (self.set_xattr(obj_name, xattr_name, xattr_value) and 0, ),
+            oncomplete=oncomplete
+        )
+
+    def aio_getxattr(self, obj_name, xattr_name, oncomplete=None):
+        self._require_open()
+
+        def getxattr_op():
+            xattr_value = self.get_xattr(obj_name, xattr_name)
+            return len(xattr_value), xattr_value
+
+        return self.local_cluster.submit(getxattr_op, oncomplete=oncomplete)
+
+    def aio_read(self, obj_name, length, offset, oncomplete=None):
+        self._require_open()
+
+        def read_op():
+            data_read = self.read(obj_name, length, offset)
+            return len(data_read), data_read
+
+        return self.local_cluster.submit(read_op, oncomplete=oncomplete)
@@ -1,15 +1,262 @@
 import re
 
+from collections import namedtuple
+
+
+# ------------------------------
+# Predicate Expression Trees
+
+# leaves: a column reference, or a constant (number, string, TRUE/FALSE, or NULL)
+Attribute  = namedtuple('Attribute' , ['name'])
+Literal    = namedtuple('Literal'   , ['value'])
+
+# comparison operators: =, !=, <, <=, >, >=  (`<>` is normalized to `!=`)
+Comparison = namedtuple('Comparison', ['op', 'left', 'right'])
+
+# range, set membership, and null tests, each of which may be negated (e.g. NOT BETWEEN)
+Between    = namedtuple('Between'   , ['operand', 'low', 'high', 'negated'])
+InList     = namedtuple('InList'    , ['operand', 'values', 'negated'])
+IsNull     = namedtuple('IsNull'    , ['operand', 'negated'])
+
+# boolean connectives: op is 'AND' or 'OR', over 2 or more operands
+BooleanOp  = namedtuple('BooleanOp' , ['op', 'operands'])
+Not        = namedtuple('Not'       , ['operand'])
+
+
+# ------------------------------
+# Aggregates
+
+# an aggregate function over an attribute, or over '*': COUNT(*) counts rows, and any other
+# function over '*' is applied to every (non-grouping) attribute
+Aggregate  = namedtuple('Aggregate' , ['function', 'attribute'])
+
+# COUNT counts non-null values; COUNT_NONZERO counts non-null, non-zero values (e.g. the number
+# of genes detected in a cell)
+aggregate_functions = ('SUM', 'COUNT', 'MIN', 'MAX', 'AVG', 'COUNT_NONZERO')
+
+
+def predicate_attributes(predicate):
+    """
+    Returns the names of all attributes referenced by a predicate expression tree, in the order
+    they first appear.
+    """
+
+    if predicate is None: return []
+
+    if isinstance(predicate, Attribute): return [predicate.name]
+    if isinstance(predicate, Literal): return []
+
+    if isinstance(predicate, BooleanOp): child_nodes = predicate.operands
+    elif isinstance(predicate, InList):  child_nodes = [predicate.operand, *predicate.values]
+
+    # otherwise, child nodes are the fields that are themselves nodes (not operators or flags)
+    else:
+        child_nodes = [child_node for child_node in predicate if isinstance(child_node, tuple)]
+
+    attr_names = []
+    for child_node in child_nodes:
+        for attr_name in predicate_attributes(child_node):
+            if attr_name not in attr_names: attr_names.append(attr_name)
+
+    return attr_names
+
+
+# ------------------------------
+# Predicate Parser
+
+class PredicateParser(object):
+    """
+    Recursive descent parser for the predicates of a WHERE clause. Precedence, from loosest to
+    tightest: OR, AND, NOT, then comparisons (`=`, `!=`, `<>`, `<`, `<=`, `>`, `>=`), `BETWEEN`,
+    `IN (...)`, and `IS [NOT] NULL`. Parentheses group sub-expressions.
+    """
+
+    token_template = re.compile(
+        r'\s*(?:'
+        r"(?P<string>'(?:[^']|'')*')"
+        r'|(?P<number>-?\d+(?:\.\d*)?(?:[eE][+-]?\d+)?)'
+        r'|(?P<op><=|>=|<>|!=|=|<|>)'
+        r'|(?P<punct>[(),])'
+        r'|(?P<name>[A-Za-z_][\w.]*|"[^"]+")'
+        r')'
+    )
+
+    keywords = {'AND', 'OR', 'NOT', 'BETWEEN', 'IN', 'IS', 'NULL', 'TRUE', 'FALSE'}
+    literals = {'NULL': None, 'TRUE': True, 'FALSE': False}
+
+    @classmethod
+    def tokenize(cls, predicate_str):
+        tokens, str_ndx = [], 0
+
+        predicate_str = predicate_str.rstrip()
+        while str_ndx < len(predicate_str):
+            token_match = cls.token_template.match(predicate_str, str_ndx)
+
+            if token_match is None or token_match.end() == str_ndx:
+                raise ValueError(f'Unexpected input in predicate at: "{predicate_str[str_ndx:]}"')
+
+            token_type = token_match.lastgroup
+            token_val  = token_match.group(token_type)
+
+            if token_type == 'name' and token_val.upper() in cls.keywords:
+                token_type, token_val = 'keyword', token_val.upper()
+
+            tokens.append((token_type, token_val))
+            str_ndx = token_match.end()
+
+        return tokens
+
+    @classmethod
+    def parse(cls, predicate_str):
+        return cls(cls.tokenize(predicate_str)).parse_predicate()
+
+    def __init__(self, tokens, **kwargs):
+        super().__init__(**kwargs)
+
+        self.tokens    = tokens
+        self.token_ndx = 0
+
+    def peek(self, token_val=None):
+        if self.token_ndx >= len(self.tokens): return None
+
+        next_token = self.tokens[self.token_ndx]
+        if token_val is not None and next_token[1] != token_val: return None
+
+        return next_token
+
+    def advance(self, token_val=None):
+        next_token = self.peek(token_val)
+
+        if next_token is None:
+            raise ValueError('Expected {} at position {} of predicate'.format(
+                f'"{token_val}"' if token_val else 'more input', self.token_ndx
+            ))
+
+        self.token_ndx += 1
+        return next_token
+
+    def parse_predicate(self):
+        predicate = self.parse_or()
+
+        if self.peek() is not None:
+            raise ValueError(f'Unexpected token in predicate: "{self.peek()[1]}"')
+
+        return predicate
+
+    def parse_or(self):
+        operands = [self.parse_and()]
+        while self.peek('OR'):
+            self.advance()
+            operands.append(self.parse_and())
+
+        return operands[0] if len(operands) == 1 else BooleanOp('OR', operands)
+
+    def parse_and(self):
+        operands = [self.parse_not()]
+        while self.peek('AND'):
+            self.advance()
+            operands.append(self.parse_not())
+
+        return operands[0] if len(operands) == 1 else BooleanOp('AND', operands)
+
+    def parse_not(self):
+        if self.peek('NOT'):
+            self.advance()
+            return Not(self.parse_not())
+
+        return self.parse_test()
+
+    def parse_test(self):
+        if self.peek('('):
+            self.advance()
+            predicate = self.parse_or()
+            self.advance(')')
+
+            return predicate
+
+        operand = self.parse_operand()
+
+        next_token = self.peek()
+        if next_token is None: return operand
+
+        if next_token[0] == 'op':
+            self.advance()
+            comparison_op = '!=' if next_token[1] == '<>' else next_token[1]
+
+            return Comparison(comparison_op, operand, self.parse_operand())
+
+        if next_token[1] == 'IS':
+            self.advance()
+            negated = self.peek('NOT') is not None
+            if negated: self.advance()
+            self.advance('NULL')
+
+            return IsNull(operand, negated)
+
+        negated = self.peek('NOT') is not None
+        if negated: self.advance()
+
+        if self.peek('BETWEEN'):
+            self.advance()
+            low_operand = self.parse_operand()
+            self.advance('AND')
+
+            return Between(operand, low_operand, self.parse_operand(), negated)
+
+        if self.peek('IN'):
+            self.advance()
+            self.advance('(')
+
+            values = [self.parse_operand()]
+            while self.peek(','):
+                self.advance()
+                values.append(self.parse_operand())
+
+            self.advance(')')
+
+            return InList(operand, values, negated)
+
+        if negated: raise ValueError('Expected BETWEEN or IN after NOT')
+
+        return operand
+
+    def parse_operand(self):
+        token_type, token_val = self.advance()
+
+        if token_type == 'number':
+            is_float = any(float_char in token_val for float_char in '.eE')
+            return Literal(float(token_val) if is_float else int(token_val))
+
+        if token_type == 'string':
+            return Literal(token_val[1:-1].replace("''", "'"))
+
+        if token_type == 'keyword' and token_val in self.literals:
+            return Literal(self.literals[token_val])
+
+        if token_type == 'name':
+            return Attribute(token_val.strip('"'))
+
+        raise ValueError(f'Expected an attribute or literal, found: "{token_val}"')
+
 
 # ------------------------------
 # Query Parsers
 
 class QueryParser(object):
 
-    query_structure_template = r'SELECT\s+(.*)\s+FROM\s+(.*)'
+    query_structure_template = (
+        r'SELECT\s+(.*?)\s+FROM\s+(.*?)'
+        r'(?:\s+WHERE\s+(.*?))?'
+        r'(?:\s+GROUP\s+BY\s+(.*?))?'
+        r'\s*;?\s*$'
+    )
 
-    group_ndx_select = 1
-    group_ndx_from   = 2
+    aggregate_template = r'^(\w+)\s*\(\s*(\*|[^()\s]+)\s*\)$'
+
+    group_ndx_select   = 1
+    group_ndx_from     = 2
+    group_ndx_where    = 3
+    group_ndx_group_by = 4
 
     @classmethod
     def parse_clause_select(cls, select_clause):
@@ -23,6 +270,22 @@ class QueryParser(object):
 
         return projection_attrs
 
+    @classmethod
+    def parse_aggregate(cls, select_item):
+        """
+        Returns an Aggregate if the select item is an aggregate function call (e.g. 'SUM(a)'), or
+        None otherwise.
+        """
+
+        matched_aggregate = re.match(cls.aggregate_template, select_item)
+        if matched_aggregate is None: return None
+
+        function_name = matched_aggregate.group(1).upper()
+        if function_name not in aggregate_functions:
+            raise ValueError(f'Unsupported aggregate function: "{function_name}"')
+
+        return Aggregate(function_name, matched_aggregate.group(2).strip('"'))
+
     @classmethod
     def parse_clause_from(cls, from_clause):
         return [
@@ -32,18 +295,61 @@ class QueryParser(object):
 
     @classmethod
     def parse_clause_where(cls, where_clause):
-        pass
+        """
+        Parses the predicates of a WHERE clause into an expression tree (see PredicateParser), or
+        returns None if there is no WHERE clause.
+        """
+
+        if not where_clause: return None
+
+        return PredicateParser.parse(where_clause)
+
+    @classmethod
+    def parse_clause_group_by(cls, group_by_clause):
+        if not group_by_clause: return []
+
+        return [group_attr.strip() for group_attr in group_by_clause.strip().split(',')]
 
     @classmethod
     def parse(cls, query_string):
-        matched_query = re.search(cls.query_structure_template, query_string)
+        matched_query = re.search(
+            cls.query_structure_template, query_string, flags=re.IGNORECASE | re.DOTALL
+        )
+
+        if matched_query is None:
+            raise ValueError(f'Unable to parse query: "{query_string}"')
 
-        projection_attrs = cls.parse_clause_select(matched_query.group(cls.group_ndx_select))
+        select_items     = cls.parse_clause_select(matched_query.group(cls.group_ndx_select))
         query_relations  = cls.parse_clause_from(matched_query.group(cls.group_ndx_from))
+        query_predicates = cls.parse_clause_where(matched_query.group(cls.group_ndx_where))
+        group_attrs      = cls.parse_clause_group_by(matched_query.group(cls.group_ndx_group_by))
+
+        # separate aggregate function calls from projected attributes
+        query_aggregates, projection_attrs = [], []
+        for select_item in select_items:
+            query_aggregate = cls.parse_aggregate(select_item)
+
+            if query_aggregate is None: projection_attrs.append(select_item)
+            else:                       query_aggregates.append(query_aggregate)
+
+        if group_attrs and not query_aggregates:
+            raise ValueError('GROUP BY requires at least one aggregate')
+
+        if query_aggregates:
+            ungrouped_attrs = [
+                projection_attr for projection_attr in projection_attrs
+                if projection_attr not in group_attrs
+            ]
+
+            if ungrouped_attrs:
+                raise ValueError(
+                    f'Attributes must be aggregated or in the GROUP BY clause: {ungrouped_attrs}'
+                )
 
         return {
             'projection': projection_attrs,
             'relations' : query_relations,
-            'predicates': '',
-            'aggregates': '',
+            'predicates': query_predicates,
+            'aggregates': query_aggregates,
+            'group_by'  : group_attrs,
         }
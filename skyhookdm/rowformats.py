@@ -0,0 +1,633 @@
+"""
+Sub-module that contains code related to SkyhookDM's row-oriented flatbuffer format
+(SFT_FLATBUF_FLEX_ROW): a `Table` flatbuffer (see Tables/Table.py) whose rows are `Record`
+flatbuffers, each holding a row id (RID), null bits, and the row's values as a FlexBuffer vector.
+
+Rows are encoded and decoded in bulk, with numpy, rather than one flatbuffer call per value: every
+row written by `SkyhookFlexRows` has the same layout, so all rows are laid out as a single 2-d
+array of bytes; and rows are decoded by gathering the same field from every row at once, then
+converting the gathered values to a columnar arrow table.
+"""
+
+# core libraries
+import logging
+
+# dependencies
+import numpy
+import pyarrow
+
+# modules from this package
+from skyhookdm import skyhook
+from skyhookdm.Tables import Table
+
+# variables from this package
+from skyhookdm import (__skyhook_version__            ,
+                       __skyhook_data_schema_version__,
+                       __skyhook_data_struct_version__,)
+
+
+# ------------------------------
+# Module-level Variables
+
+# arrow type of each skyhook data type that can be stored in a FlexBuffer row
+arrow_types_for_skyhook = {
+    skyhook.DataTypes.SDT_INT8  : pyarrow.int8()   ,
+    skyhook.DataTypes.SDT_INT16 : pyarrow.int16()  ,
+    skyhook.DataTypes.SDT_INT32 : pyarrow.int32()  ,
+    skyhook.DataTypes.SDT_INT64 : pyarrow.int64()  ,
+    skyhook.DataTypes.SDT_UINT8 : pyarrow.uint8()  ,
+    skyhook.DataTypes.SDT_UINT16: pyarrow.uint16() ,
+    skyhook.DataTypes.SDT_UINT32: pyarrow.uint32() ,
+    skyhook.DataTypes.SDT_UINT64: pyarrow.uint64() ,
+    skyhook.DataTypes.SDT_CHAR  : pyarrow.int8()   ,
+    skyhook.DataTypes.SDT_UCHAR : pyarrow.uint8()  ,
+    skyhook.DataTypes.SDT_BOOL  : pyarrow.bool_()  ,
+    skyhook.DataTypes.SDT_FLOAT : pyarrow.float32(),
+    skyhook.DataTypes.SDT_DOUBLE: pyarrow.float64(),
+}
+
+# FlexBuffer types (see flexbuffers.h) of scalars and vectors; a typed vector's elements all have
+# the same type, whereas an untyped vector stores a type for each element after its elements
+flex_type_int         = 1
+flex_type_uint        = 2
+flex_type_float       = 3
+flex_type_bool        = 26
+flex_type_vector      = 10
+flex_typed_vectors    = {
+    11: flex_type_int  ,
+    12: flex_type_uint ,
+    13: flex_type_float,
+    36: flex_type_bool ,
+}
+
+# FlexBuffer type of the values of each numpy dtype kind, and numpy dtype kind of each type
+flex_types_for_kind   = {'i': flex_type_int, 'u': flex_type_uint, 'f': flex_type_float,
+                         'b': flex_type_bool}
+kinds_for_flex_type   = {flex_type_int: 'i', flex_type_uint: 'u', flex_type_float: 'f',
+                         flex_type_bool: 'u'}
+
+# vtable offsets of the fields of Record (see Tables/Record.py)
+record_field_vtable_offsets = (4, 6, 8)
+
+# layout of each Record written by `SkyhookFlexRows` (offsets from the start of the record): the
+# table (soffset to the shared vtable, RID, and offsets to the Nullbits and Data vectors), then
+# the Nullbits vector, then the Data vector (a FlexBuffer)
+record_rid_offset      = 8
+record_nullbits_offset = 16
+record_data_offset     = 20
+record_table_size      = 24
+record_nullbits_start  = 32
+
+
+# ------------------------------
+# Functions
+def byte_width_for(max_val):
+    """
+    Returns the smallest byte width (1, 2, 4 or 8) of an unsigned integer that can hold `max_val`.
+    """
+
+    for byte_width in (1, 2, 4):
+        if max_val < (1 << (8 * byte_width)): return byte_width
+
+    return 8
+
+
+def aligned(byte_offset, alignment):
+    return -(-byte_offset // alignment) * alignment
+
+
+def gather_values(binary_data, byte_positions, dtype):
+    """
+    Returns the values of type `dtype` at each of `byte_positions` (an ndarray of any shape) of a
+    uint8 ndarray, reading every value in a single fancy-indexing operation.
+    """
+
+    dtype      = numpy.dtype(dtype)
+    byte_index = numpy.asarray(byte_positions)[..., None] + numpy.arange(dtype.itemsize)
+
+    return binary_data[byte_index].view(dtype)[..., 0]
+
+
+def gather_rows(binary_data, row_starts, row_width, max_index_size=1 << 23):
+    """
+    Returns the `row_width` bytes at each of `row_starts` of a uint8 ndarray, as an array of shape
+    (rows, row_width). If rows are equally spaced (e.g. each Record has the same size), the result
+    is a strided view of `binary_data`; otherwise, rows are gathered (and copied) in chunks, so
+    that index arrays stay small.
+    """
+
+    row_starts = numpy.asarray(row_starts, dtype=numpy.int64)
+    row_stride = numpy.diff(row_starts)
+
+    if len(row_starts) and (len(row_stride) == 0 or (row_stride == row_stride[0]).all()):
+        return numpy.lib.stride_tricks.as_strided(
+            binary_data[row_starts[0]:],
+            shape=(len(row_starts), row_width),
+            strides=(int(row_stride[0]) if len(row_stride) else 0, 1),
+            writeable=False
+        )
+
+    gathered_rows = numpy.empty((len(row_starts), row_width), dtype=numpy.uint8)
+    chunk_size    = max(1, max_index_size // max(row_width, 1))
+
+    for chunk_start in range(0, len(row_starts), chunk_size):
+        chunk_starts = row_starts[chunk_start:chunk_start + chunk_size]
+        gathered_rows[chunk_start:chunk_start + chunk_size] = binary_data[
+            chunk_starts[:, None] + numpy.arange(row_width)
+        ]
+
+    return gathered_rows
+
+
+# ------------------------------
+# Classes
+class SkyhookFlexRows(object):
+    """
+    Reads and writes SkyhookDM row-oriented tables (SFT_FLATBUF_FLEX_ROW). The data blob of an
+    FB_Meta flatbuffer with this format is a `Table` flatbuffer.
+
+    Null bits of a row are 64-bit words, in which bit (i % 64) of word (i // 64) is set if column i
+    is null. Null values are stored as 0.
+    """
+
+    logger = logging.getLogger('{}.{}'.format(__module__, __name__))
+    logger.setLevel(logging.INFO)
+
+    @classmethod
+    def from_binary_flatbuffer(cls, flatbuffer_binary, offset=0):
+        return cls(Table.Table.GetRootAsTable(flatbuffer_binary, offset), flatbuffer_binary)
+
+    @classmethod
+    def binary_from_arrow_table(cls, arrow_table, rids=None):
+        """
+        Returns a `Table` flatbuffer (as a `pyarrow.Buffer`) containing the rows of a (dense)
+        arrow table that has skyhook metadata. Each row's RID is its index, unless `rids` (an
+        array of uint64, one for each row) is given.
+
+        The flatbuffer is laid out front to back, with a single vtable shared by every Record.
+        Every value is stored with the same byte width (the widest column's), so every Record has
+        the same size and the rows are written as a single (rows x record size) array.
+        """
+
+        skyhook_metadata = skyhook.SkyhookMetadata.from_byte_coercible(arrow_table.schema.metadata)
+        column_schemas   = skyhook_metadata.column_schemas()
+
+        if len(column_schemas) != arrow_table.num_columns:
+            raise ValueError('Skyhook metadata does not describe each column of the table')
+
+        unsupported_types = [
+            col_schema.col_name for col_schema in column_schemas
+            if col_schema.type not in arrow_types_for_skyhook
+        ]
+
+        if unsupported_types:
+            raise ValueError(f'Columns with types unsupported in flex rows: {unsupported_types}')
+
+        num_rows  = arrow_table.num_rows
+        num_cols  = arrow_table.num_columns
+        col_kinds = [
+            numpy.dtype(arrow_types_for_skyhook[col_schema.type].to_pandas_dtype()).kind
+            for col_schema in column_schemas
+        ]
+
+        # each value is stored with the byte width of the widest type (and wide enough for the
+        # number of columns, which is stored with the same width)
+        value_width = max(
+            [byte_width_for(num_cols)] + [
+                arrow_types_for_skyhook[col_schema.type].bit_width // 8 or 1
+                for col_schema in column_schemas
+            ]
+        )
+
+        if value_width < 4 and 'f' in col_kinds: value_width = 4
+
+        # ------------------------------
+        # layout of a Record's FlexBuffer: the vector's length, its elements, and the type of each
+        # element; then the root (an offset back to the vector's elements), its type and its byte
+        # width. The root is aligned to its width, which (at most 8) is chosen to fit the offset
+        types_start     = value_width * (num_cols + 1)
+        root_width      = byte_width_for(aligned(types_start + num_cols, 8) - value_width)
+        root_start      = aligned(types_start + num_cols, root_width)
+        root_offset_val = root_start - value_width
+        flex_len        = root_start + root_width + 2
+
+        num_nullbits     = max(1, aligned(num_cols, 64) // 64)
+        nullbits_end     = record_nullbits_start + 8 * num_nullbits
+        data_len_offset  = nullbits_end + 4
+        flex_start       = nullbits_end + 8
+        record_size      = aligned(flex_start + flex_len, 8)
+
+        # ------------------------------
+        # layout of the Table: root offset, Table vtable and table, strings, delete vector, the
+        # Rows vector, and the Record vtable; then the Records (8-byte aligned)
+        header_data = bytearray(4)
+
+        def append_bytes(binary_data, alignment=1):
+            data_start = aligned(len(header_data), alignment)
+            header_data.extend(bytes(data_start - len(header_data)) + binary_data)
+
+            return data_start
+
+        def append_vector(binary_data, elem_count, alignment=4):
+            vector_start = aligned(len(header_data) + 4, alignment) - 4
+            append_bytes(bytes(vector_start - len(header_data)))
+            append_bytes(elem_count.to_bytes(4, byteorder='little') + binary_data)
+
+            return vector_start
+
+        table_field_count = 10
+        table_vtable      = numpy.zeros(2 + table_field_count, dtype='<u2')
+        table_vtable[0]   = 2 * len(table_vtable)
+        table_vtable[1]   = 4 + 4 * table_field_count
+        table_vtable[2:]  = 4 + 4 * numpy.arange(table_field_count)
+
+        table_vtable_pos = append_bytes(table_vtable.tobytes(), alignment=4)
+        table_pos        = append_bytes(bytes(int(table_vtable[1])), alignment=4)
+
+        table_fields    = numpy.zeros(table_field_count + 1, dtype='<i4')
+        table_fields[0] = table_pos - table_vtable_pos
+        table_fields[1] = skyhook.FormatTypes.SFT_FLATBUF_FLEX_ROW
+        table_fields[2] = __skyhook_version__
+        table_fields[3] = __skyhook_data_struct_version__
+        table_fields[4] = __skyhook_data_schema_version__
+
+        # each uoffset field is relative to its own position in the table
+        def field_pos(field_ndx): return table_pos + 4 * field_ndx
+
+        for field_ndx, str_val in ((5, skyhook_metadata.data_schema),
+                                   (6, skyhook_metadata.db_schema),
+                                   (7, skyhook_metadata.table_name)):
+            str_bytes = str_val.encode('utf-8')
+            str_pos   = append_vector(str_bytes + b'\0', len(str_bytes))
+
+            table_fields[field_ndx] = str_pos - field_pos(field_ndx)
+
+        delete_vector_pos = append_vector(bytes(num_rows), num_rows)
+        table_fields[8]   = delete_vector_pos - field_pos(8)
+
+        rows_vector_pos   = append_vector(bytes(4 * num_rows), num_rows)
+        table_fields[9]   = rows_vector_pos - field_pos(9)
+        table_fields[10]  = num_rows
+
+        header_data[table_pos:table_pos + table_fields.nbytes] = table_fields.tobytes()
+
+        record_vtable = numpy.array(
+            [10, record_table_size, record_rid_offset, record_nullbits_offset, record_data_offset],
+            dtype='<u2'
+        )
+
+        record_vtable_pos = append_bytes(record_vtable.tobytes(), alignment=2)
+        records_start     = aligned(len(header_data), 8)
+
+        # ------------------------------
+        # lay out the header and every Record in a single buffer
+        binary_data = numpy.zeros(records_start + num_rows * record_size, dtype=numpy.uint8)
+        binary_data[:len(header_data)] = numpy.frombuffer(header_data, dtype=numpy.uint8)
+        binary_data[:4].view('<u4')[0] = table_pos
+
+        record_positions = records_start + record_size * numpy.arange(num_rows, dtype=numpy.int64)
+        rows_vector      = binary_data[rows_vector_pos + 4:rows_vector_pos + 4 + 4 * num_rows]
+        rows_vector.view('<u4')[:] = (
+            record_positions - (rows_vector_pos + 4 + 4 * numpy.arange(num_rows))
+        )
+
+        records = binary_data[records_start:].reshape(num_rows, record_size)
+
+        def record_field(field_start, dtype, field_count=1):
+            field_width = numpy.dtype(dtype).itemsize * field_count
+            return records[:, field_start:field_start + field_width].view(dtype)
+
+        record_field(0, '<i4')[:, 0] = record_positions - record_vtable_pos
+        record_field(record_rid_offset, '<u8')[:, 0] = (
+            numpy.arange(num_rows, dtype=numpy.uint64) if rids is None else rids
+        )
+
+        # offsets to the lengths of the Nullbits and Data vectors, then the lengths
+        record_field(record_nullbits_offset, '<u4')[:] = (
+            record_nullbits_start - 4 - record_nullbits_offset
+        )
+        record_field(record_data_offset, '<u4')[:] = data_len_offset - record_data_offset
+
+        record_field(record_nullbits_start - 4, '<u4')[:] = num_nullbits
+        record_field(data_len_offset, '<u4')[:]           = flex_len
+
+        # FlexBuffer: vector length, element types, and the root
+        record_field(flex_start, f'<u{value_width}')[:] = num_cols
+
+        records[:, flex_start + types_start:flex_start + types_start + num_cols] = [
+            (flex_types_for_kind[col_kind] << 2) | (value_width.bit_length() - 1)
+            for col_kind in col_kinds
+        ]
+
+        record_field(flex_start + root_start, f'<u{root_width}')[:] = root_offset_val
+        records[:, flex_start + root_start + root_width]     = (
+            (flex_type_vector << 2) | (value_width.bit_length() - 1)
+        )
+        records[:, flex_start + root_start + root_width + 1] = root_width
+
+        # values, and null bits, of each column
+        nullbits = record_field(record_nullbits_start, '<u8', num_nullbits)
+        for col_ndx, (col_kind, table_column) in enumerate(zip(col_kinds, arrow_table.columns)):
+            if table_column.null_count:
+                is_null = table_column.is_null().to_numpy(zero_copy_only=False)
+                nullbits[:, col_ndx // 64] |= (
+                    is_null.astype(numpy.uint64) << numpy.uint64(col_ndx % 64)
+                )
+
+                table_column = table_column.fill_null(False if col_kind == 'b' else 0)
+
+            col_values = table_column.to_numpy(zero_copy_only=False)
+
+            value_type  = 'u' if col_kind == 'b' else col_kind
+            value_start = flex_start + value_width * (col_ndx + 1)
+
+            record_field(value_start, f'<{value_type}{value_width}')[:, 0] = col_values
+
+        return pyarrow.py_buffer(binary_data)
+
+    def __init__(self, flatbuffer_obj, flatbuffer_binary, **kwargs):
+        super().__init__(**kwargs)
+
+        self.fb_obj      = flatbuffer_obj
+        self.binary_data = numpy.frombuffer(flatbuffer_binary, dtype=numpy.uint8)
+
+        # positions of each Record, and of each Record's fields (see `_locate_records`)
+        self._record_positions = None
+        self._field_positions  = None
+
+    def get_skyhook_metadata(self):
+        def str_val(field_val): return field_val.decode('utf-8') if field_val else ''
+
+        return skyhook.SkyhookMetadata(
+            self.fb_obj.SkyhookVersion()              ,
+            self.fb_obj.DataSchemaVersion()           ,
+            self.fb_obj.DataStructureVersion()        ,
+            self.fb_obj.DataFormatType()              ,
+            str_val(self.fb_obj.DataSchema())         ,
+            str_val(self.fb_obj.DbSchema())           ,
+            str_val(self.fb_obj.TableName())          ,
+            self.get_num_rows()                       ,
+            skyhook.DataLayouts.DENSE
+        )
+
+    def get_num_rows(self):
+        return self.fb_obj.RowsLength()
+
+    def get_delete_vector(self):
+        """
+        Returns the table's delete vector (one uint8 per row) as a view, or None if it has none.
+        """
+
+        if self.fb_obj.DeleteVectorIsNone(): return None
+
+        return self.fb_obj.DeleteVectorAsNumpy()
+
+    def arrow_schema(self):
+        """
+        Returns the arrow schema (with skyhook metadata) of the table's data, without decoding
+        any rows.
+        """
+
+        skyhook_metadata = self.get_skyhook_metadata()
+
+        return pyarrow.schema(
+            [
+                (col_schema.col_name, arrow_types_for_skyhook[col_schema.type])
+                for col_schema in skyhook_metadata.column_schemas()
+            ],
+            metadata=skyhook_metadata.to_byte_coercible()
+        )
+
+    def _locate_records(self):
+        """
+        Finds the position of each Record and of each Record's fields (RID, Nullbits and Data,
+        or -1 if absent), for every row at once. Records usually share a single vtable, but any
+        number of vtables is supported.
+        """
+
+        if self._record_positions is not None: return
+
+        fb_table   = self.fb_obj._tab
+        num_rows   = self.get_num_rows()
+        rows_start = fb_table.Vector(fb_table.Offset(20)) if num_rows else 0
+
+        elem_positions   = rows_start + 4 * numpy.arange(num_rows, dtype=numpy.int64)
+        record_positions = elem_positions + gather_values(self.binary_data, elem_positions, '<u4')
+        vtable_positions = record_positions - gather_values(
+            self.binary_data, record_positions, '<i4'
+        )
+
+        unique_vtables, vtable_ndx = numpy.unique(vtable_positions, return_inverse=True)
+
+        # the offset of each field from its Record, for each vtable
+        vtable_fields = numpy.full((len(unique_vtables), 3), -1, dtype=numpy.int64)
+        for unique_ndx, vtable_pos in enumerate(unique_vtables):
+            vtable_size = int(gather_values(self.binary_data, vtable_pos, '<u2'))
+
+            for field_ndx, vtable_offset in enumerate(record_field_vtable_offsets):
+                if vtable_offset >= vtable_size: continue
+
+                field_offset = int(
+                    gather_values(self.binary_data, vtable_pos + vtable_offset, '<u2')
+                )
+
+                if field_offset: vtable_fields[unique_ndx, field_ndx] = field_offset
+
+        field_offsets = vtable_fields[vtable_ndx.ravel()]
+
+        self._record_positions = record_positions
+        self._field_positions  = numpy.where(
+            field_offsets < 0, -1, record_positions[:, None] + field_offsets
+        )
+
+    def _vector_positions(self, field_ndx):
+        """
+        Returns the position of the first element, and the length, of a vector field of each
+        Record. Records without the field have length 0.
+        """
+
+        field_positions = self._field_positions[:, field_ndx]
+        has_field       = field_positions >= 0
+        field_positions = numpy.where(has_field, field_positions, 0)
+
+        vector_positions = field_positions + gather_values(
+            self.binary_data, field_positions, '<u4'
+        )
+
+        vector_lengths = numpy.where(
+            has_field, gather_values(self.binary_data, vector_positions, '<u4'), 0
+        )
+
+        return vector_positions + 4, vector_lengths
+
+    def get_rids(self):
+        self._locate_records()
+
+        rid_positions = self._field_positions[:, 0]
+
+        return numpy.where(
+            rid_positions >= 0,
+            gather_values(self.binary_data, numpy.maximum(rid_positions, 0), '<u8'),
+            0
+        ).astype(numpy.uint64)
+
+    def get_nullbits(self):
+        """
+        Returns the null bits of every row, as an array of shape (rows, words). Rows with fewer
+        null bit words than others are padded with 0.
+        """
+
+        self._locate_records()
+
+        words_start, word_counts = self._vector_positions(1)
+        max_words                = int(word_counts.max(initial=0))
+
+        word_ndx = numpy.arange(max_words)
+        has_word = word_ndx < word_counts[:, None]
+
+        word_positions = numpy.where(has_word, words_start[:, None] + 8 * word_ndx, 0)
+
+        return numpy.where(has_word, gather_values(self.binary_data, word_positions, '<u8'), 0)
+
+    def _decode_values(self, flex_start, flex_len, column_groups):
+        """
+        Decodes the FlexBuffer vectors of rows that all have the same root type and root byte
+        width. `column_groups` is a list of (column indices, values) pairs, in which values is an
+        array of shape (rows, len(column indices)) with those columns' dtype.
+        """
+
+        num_cols = sum(len(col_ndx) for col_ndx, _ in column_groups)
+
+        flex_end    = flex_start + flex_len
+        root_width  = int(self.binary_data[flex_end[0] - 1])
+        root_type   = int(self.binary_data[flex_end[0] - 2])
+        value_width = 1 << (root_type & 3)
+
+        root_start  = flex_end - 2 - root_width
+        elem_start  = root_start - gather_values(self.binary_data, root_start, f'<u{root_width}')
+
+        vector_type = root_type >> 2
+        elem_counts = gather_values(self.binary_data, elem_start - value_width, f'<u{value_width}')
+
+        if (elem_counts != num_cols).any():
+            raise ValueError(f'Expected {num_cols} values in each row of flex rows')
+
+        elem_values = gather_rows(self.binary_data, elem_start, value_width * num_cols)
+
+        if vector_type == flex_type_vector:
+            elem_types = gather_rows(
+                self.binary_data, elem_start + value_width * num_cols, num_cols
+            ) >> 2
+
+        elif vector_type in flex_typed_vectors:
+            elem_types = numpy.full((1, num_cols), flex_typed_vectors[vector_type])
+
+        else:
+            raise ValueError(f'Unsupported FlexBuffer type for a row: {vector_type}')
+
+        # usually, each column has the same type in every row, so values are converted a column
+        # (or all columns of a dtype) at a time; otherwise, each value is converted by its own type
+        col_types = elem_types[0]
+        is_by_col = (elem_types == col_types).all()
+
+        for elem_type in numpy.unique(col_types if is_by_col else elem_types):
+            if elem_type not in kinds_for_flex_type:
+                raise ValueError(f'Unsupported FlexBuffer type for a value: {elem_type}')
+
+            typed_values = elem_values.view(f'<{kinds_for_flex_type[elem_type]}{value_width}')
+
+            for col_ndx, group_values in column_groups:
+                if is_by_col:
+                    is_type = col_types[col_ndx] == elem_type
+
+                    if is_type.all():
+                        group_values[:] = typed_values[:, col_ndx]
+
+                    elif is_type.any():
+                        group_values[:, is_type] = typed_values[:, col_ndx[is_type]]
+
+                else:
+                    is_type = elem_types[:, col_ndx] == elem_type
+                    group_values[is_type] = typed_values[:, col_ndx][is_type]
+
+    def get_data_as_arrow(self):
+        """
+        Returns the table's rows as a (columnar) arrow table, with skyhook metadata. Values of
+        every row are decoded together, into a (rows x columns) array for each dtype of the
+        columns (so that no value is converted to another column's type, e.g. int64 to float64),
+        laid out column-major so that each arrow column is a view of a contiguous column.
+        """
+
+        self._locate_records()
+
+        arrow_schema = self.arrow_schema()
+        num_rows     = self.get_num_rows()
+        num_cols     = len(arrow_schema)
+
+        columns_by_dtype = {}
+        for field_ndx, arrow_field in enumerate(arrow_schema):
+            columns_by_dtype.setdefault(
+                numpy.dtype(arrow_field.type.to_pandas_dtype()), []
+            ).append(field_ndx)
+
+        # decoded values are written column-major, so that each column is contiguous
+        column_groups = [
+            (
+                numpy.array(col_ndx),
+                numpy.zeros((num_rows, len(col_ndx)), dtype=col_dtype, order='F')
+            )
+            for col_dtype, col_ndx in columns_by_dtype.items()
+        ]
+
+        flex_start, flex_len = self._vector_positions(2)
+        if num_rows and num_cols:
+            flex_end    = flex_start + flex_len
+            root_format = (
+                self.binary_data[flex_end - 1].astype(numpy.int64) << 8
+                | self.binary_data[flex_end - 2]
+            )
+
+            unique_formats = numpy.unique(root_format)
+
+            if len(unique_formats) == 1:
+                self._decode_values(flex_start, flex_len, column_groups)
+
+            # rows with different root types (e.g. value byte widths) are decoded separately
+            else:
+                for unique_format in unique_formats:
+                    row_ndx    = numpy.flatnonzero(root_format == unique_format)
+                    row_groups = [
+                        (col_ndx, numpy.zeros((len(row_ndx), len(col_ndx)), dtype=values.dtype))
+                        for col_ndx, values in column_groups
+                    ]
+
+                    self._decode_values(flex_start[row_ndx], flex_len[row_ndx], row_groups)
+
+                    for (_, values), (_, row_values) in zip(column_groups, row_groups):
+                        values[row_ndx] = row_values
+
+        column_values = [None] * num_cols
+        for col_ndx, values in column_groups:
+            for group_ndx, field_ndx in enumerate(col_ndx):
+                column_values[field_ndx] = values[:, group_ndx]
+
+        nullbits = self.get_nullbits()
+        col_ndx  = numpy.arange(num_cols)
+        is_null  = numpy.zeros((num_rows, num_cols), dtype=bool)
+
+        if nullbits.any():
+            word_ndx = numpy.minimum(col_ndx // 64, nullbits.shape[1] - 1)
+            is_null  = (
+                (nullbits[:, word_ndx] >> (col_ndx % 64).astype(numpy.uint64)) & 1
+            ).astype(bool) & (col_ndx // 64 < nullbits.shape[1])
+
+        arrow_arrays = []
+        for field_ndx, arrow_field in enumerate(arrow_schema):
+            col_mask = is_null[:, field_ndx]
+            arrow_arrays.append(pyarrow.array(
+                column_values[field_ndx],
+                type=arrow_field.type,
+                mask=col_mask if col_mask.any() else None
+            ))
+
+        return pyarrow.Table.from_arrays(arrow_arrays, schema=arrow_schema)
@@ -13,8 +13,24 @@ skyhook_metadata_attributes = [
     'db_schema'             ,
     'table_name'            ,
     'num_rows'              ,
+    'data_layout'           ,
 ]
 
+# attributes of SkyhookMetadata that are serialized as 4-byte integers
+skyhook_metadata_int_attributes = (
+    'skyhook_version'       ,
+    'data_schema_version'   ,
+    'data_structure_version',
+    'data_format_type'      ,
+    'num_rows'              ,
+    'data_layout'           ,
+)
+
+# values for SkyhookMetadata attributes that may be missing from older metadata
+skyhook_metadata_defaults = {
+    'data_layout': 0,  # DataLayouts.DENSE
+}
+
 column_schema_attributes = [
     'col_id'     ,
     'type'       ,
@@ -23,10 +39,67 @@ column_schema_attributes = [
     'col_name'   ,
 ]
 
+partition_metadata_attributes = [
+    'partition_id',
+    'file_name'   ,
+    'file_format' ,
+    'column_start',
+    'column_end'  ,
+    'column_names',
+    'num_rows'    ,
+    'byte_size'   ,
+    'column_stats',
+]
+
+# values for PartitionMetadata attributes that may be missing from older manifests
+partition_metadata_defaults = {
+    'column_stats': None,
+}
+
+# statistics of a column of a partition (a "zone map"): min and max are None if the column has
+# no non-null values, and nonzero_count is None for non-numeric columns
+column_stats_attributes = [
+    'min'          ,
+    'max'          ,
+    'null_count'   ,
+    'nonzero_count',
+]
+
 
 # ------------------------------
 # Classes
 class SkyhookMetadata(namedtuple('SkyhookMetadata', skyhook_metadata_attributes)):
+    @classmethod
+    def from_byte_coercible(cls, schema_metadata):
+        """
+        Inverse of `to_byte_coercible`: parses skyhook metadata from a dictionary of bytes, such as
+        the metadata of an arrow schema.
+        """
+
+        def val_from_bytes(attr_name):
+            val = schema_metadata.get(attr_name.encode('utf-8'))
+
+            if val is None and attr_name in skyhook_metadata_defaults:
+                return skyhook_metadata_defaults[attr_name]
+
+            elif val is None:
+                raise KeyError(f'Skyhook metadata is missing attribute: {attr_name}')
+
+            if attr_name in skyhook_metadata_int_attributes:
+                return int.from_bytes(val, byteorder='little')
+
+            return val.decode('utf-8')
+
+        return cls(*[val_from_bytes(attr_name) for attr_name in skyhook_metadata_attributes])
+
+    def column_schemas(self, col_delim=';'):
+        if not self.data_schema: return []
+
+        return [
+            ColumnSchema.from_str(column_schema)
+            for column_schema in self.data_schema.split(col_delim)
+        ]
+
     def to_byte_coercible(self):
         def bytes_from_val(val):
             if type(val) is int:
@@ -44,10 +117,69 @@ class SkyhookMetadata(namedtuple('SkyhookMetadata', skyhook_metadata_attributes)
 
 
 class ColumnSchema(namedtuple('ColumnSchema', column_schema_attributes)):
+    @classmethod
+    def from_str(cls, column_schema):
+        """
+        Inverse of `__str__`. Only the column name (the last field) may contain spaces.
+        """
+
+        col_id, col_type, is_key, is_nullable, col_name = column_schema.split(' ', 4)
+
+        return cls(int(col_id), int(col_type), int(is_key), int(is_nullable), col_name)
+
     def __str__(self):
         return ' '.join([str(field_val) for field_name, field_val in self._asdict().items()])
 
 
+class ColumnStats(namedtuple('ColumnStats', column_stats_attributes)):
+    """
+    Statistics of a column of a partition, computed when the partition is written. Readers use
+    these to skip partitions whose values cannot satisfy a predicate.
+    """
+
+
+class PartitionMetadata(namedtuple('PartitionMetadata', partition_metadata_attributes)):
+    """
+    Describes a single partition of a partitioned table, as recorded in a partition manifest.
+    Columns of the partition are [column_start, column_end) in the full table, and
+    `column_stats`, if known, maps each column name to its ColumnStats.
+    """
+
+    @classmethod
+    def from_dict(cls, partition_metadata):
+        """
+        Inverse of `_asdict` (after a round trip through JSON), for manifests of any version.
+        """
+
+        partition_metadata = dict(partition_metadata_defaults, **partition_metadata)
+
+        if partition_metadata['column_stats'] is not None:
+            partition_metadata['column_stats'] = {
+                column_name: ColumnStats(*column_stats)
+                for column_name, column_stats in partition_metadata['column_stats'].items()
+            }
+
+        return cls(**partition_metadata)
+
+    @classmethod
+    def from_skyhook_metadata(cls, partition_id, file_name, file_format, skyhook_metadata,
+                              byte_size, column_stats=None):
+        column_schemas = skyhook_metadata.column_schemas()
+        column_ids     = [column_schema.col_id for column_schema in column_schemas]
+
+        return cls(
+            partition_id,
+            file_name,
+            file_format,
+            min(column_ids, default=0),
+            max(column_ids, default=-1) + 1,
+            [column_schema.col_name for column_schema in column_schemas],
+            skyhook_metadata.num_rows,
+            byte_size,
+            column_stats
+        )
+
+
 # Enums
 class EnumMetaClass(type):
 
@@ -122,3 +254,26 @@ class KeyColumn(SentinelType):
 class NullableColumn(SentinelType):
     NOT_NULLABLE = 0
     NULLABLE     = 1
+
+
+class DataLayouts(SentinelType):
+    """
+    Values of the `data_layout` attribute of SkyhookMetadata.
+
+    A dense table has one arrow column per column of data. A sparse (CSC) table stores only
+    non-zero values, as the columns `col_id`, `row_id` and `value`, sorted by column then row; the
+    dense columns are described by the metadata's `data_schema`.
+    """
+
+    DENSE      = 0
+    SPARSE_CSC = 1
+
+
+class CompressionTypes(SentinelType):
+    """
+    Values of the `BlobCompression` field of FB_Meta.
+    """
+
+    NONE = 0
+    LZ4  = 1
+    ZSTD = 2
@@ -1,6 +1,8 @@
+import re
 import sys
 import logging
 import argparse
+import collections
 
 import importlib
 
@@ -21,16 +23,54 @@ def normalize_str(str_or_bytes, byte_encoding='utf-8'):
     return str_or_bytes
 
 
-def batched_indices(element_count, batch_size):
-    for batch_id, batch_start in enumerate(range(0, element_count, batch_size), start=1):
+def batched_indices(element_count, batch_size, first_batch_id=1):
+    """
+    Generator that yields (batch id, start, end) for consecutive batches of `batch_size` elements.
+    Batch ids count up from `first_batch_id` (e.g. to continue the ids of an existing table).
+    """
 
-        batch_end = batch_id * batch_size
+    batch_starts = range(0, element_count, batch_size)
+    for batch_id, batch_start in enumerate(batch_starts, start=first_batch_id):
+
+        batch_end = batch_start + batch_size
         if batch_end > element_count:
             batch_end  = element_count
 
         yield batch_id, batch_start, batch_end
 
 
+def partition_id_from_filename(partition_filename, re_file_id_prefix=r'^(\d+)-'):
+    """
+    Returns the partition id embedded in the name of a partition file (e.g. '00012-<column>.arrow'
+    has partition id 12), or None if the filename does not follow that naming scheme.
+    """
+
+    re_match_obj = re.search(re_file_id_prefix, partition_filename)
+
+    if re_match_obj is None: return None
+
+    return int(re_match_obj.group(1))
+
+
+def bounded_ordered_map(executor, map_fn, iterable, max_in_flight):
+    """
+    Like `executor.map`, but only submits up to `max_in_flight` calls of `map_fn` at a time.
+    Results are yielded in the order of `iterable`, and a new call is only submitted once the
+    oldest result has been yielded, so at most `max_in_flight` results are held at once.
+    """
+
+    pending_futures = collections.deque()
+
+    for map_input in iterable:
+        if len(pending_futures) >= max_in_flight:
+            yield pending_futures.popleft().result()
+
+        pending_futures.append(executor.submit(map_fn, map_input))
+
+    while pending_futures:
+        yield pending_futures.popleft().result()
+
+
 def try_import(module_name, is_required=False, module_package=None):
     imported_module = None
 
@@ -275,6 +315,19 @@ class ArgparseBuilder(object):
 
         return self
 
+    def add_compression_arg(self, required=False, help_str=''):
+        self._arg_parser.add_argument(
+             '--compression'
+            ,dest='compression'
+            ,type=str
+            ,choices=['lz4', 'zstd']
+            ,default=None
+            ,required=required
+            ,help=(help_str or 'Codec to compress data with: <lz4 | zstd>')
+        )
+
+        return self
+
     def add_analysis_arg(self, required=False, help_str=''):
         self._arg_parser.add_argument(
              '--should-analyze'
@@ -308,5 +361,152 @@ class ArgparseBuilder(object):
 
         return self
 
+    def add_max_in_flight_arg(self, required=False, help_str='', default=64):
+        self._arg_parser.add_argument(
+             '--max-in-flight'
+            ,dest='max_in_flight'
+            ,type=int
+            ,default=default
+            ,required=required
+            ,help=(help_str or 'Maximum number of outstanding asynchronous operations')
+        )
+
+        return self
+
+    def add_local_cluster_args(self, required=False, help_str=''):
+        self._arg_parser.add_argument(
+             '--local-cluster-dir'
+            ,dest='local_cluster_dir'
+            ,type=str
+            ,required=required
+            ,help=(help_str or 'Path to a directory to use as a local stand-in for a Ceph cluster')
+        )
+
+        self._arg_parser.add_argument(
+             '--inject-latency-ms'
+            ,dest='inject_latency_ms'
+            ,type=float
+            ,default=0.0
+            ,required=False
+            ,help='Latency (in ms) to add to each operation on a local cluster'
+        )
+
+        self._arg_parser.add_argument(
+             '--inject-bandwidth-mbps'
+            ,dest='inject_bandwidth_mbps'
+            ,type=float
+            ,default=None
+            ,required=False
+            ,help='Bandwidth (in MB/s) of a local cluster, shared by all operations'
+        )
+
+        return self
+
+    def add_instrumentation_args(self, required=False, help_str=''):
+        self._arg_parser.add_argument(
+             '--instrument'
+            ,dest='instrument'
+            ,action='store_true'
+            ,required=required
+            ,help=(help_str or 'Print a summary of time spent and data processed, on exit')
+        )
+
+        self._arg_parser.add_argument(
+             '--instrument-output'
+            ,dest='instrument_output'
+            ,type=str
+            ,default=None
+            ,required=False
+            ,help='Path to write instrumentation measurements to, as JSON (implies --instrument)'
+        )
+
+        return self
+
+    def add_row_format_flag_arg(self, required=False, help_str=''):
+        self._arg_parser.add_argument(
+             '--row-format'
+            ,dest='flag_row_format'
+            ,action='store_true'
+            ,required=required
+            ,help=(help_str or "Whether to write data as SkyhookDM's row format (flex rows)")
+        )
+
+        return self
+
+    def add_append_flag_arg(self, required=False, help_str=''):
+        self._arg_parser.add_argument(
+             '--append'
+            ,dest='flag_append'
+            ,action='store_true'
+            ,required=required
+            ,help=(help_str or 'Append to an existing table instead of writing it from scratch')
+        )
+
+        return self
+
+    def add_schema_only_arg(self, required=False, help_str=''):
+        self._arg_parser.add_argument(
+             '--schema-only'
+            ,dest='schema_only'
+            ,action='store_true'
+            ,required=required
+            ,help=(help_str or 'Only read and print metadata and column schemas (not data)')
+        )
+
+        return self
+
+    def add_projection_arg(self, required=False, help_str=''):
+        self._arg_parser.add_argument(
+             '--project'
+            ,dest='projection_attrs'
+            ,type=str
+            ,default=None
+            ,required=required
+            ,help=(help_str or 'Comma-separated attributes to project')
+        )
+
+        return self
+
+    def add_run_query_object_args(self, required=False, help_str=''):
+        self._arg_parser.add_argument(
+             '--table-name'
+            ,dest='skyhook_table'
+            ,type=str
+            ,required=required
+            ,help=(help_str or 'Name of table to be used in SkyhookDM naming scheme')
+        )
+
+        self._arg_parser.add_argument(
+             '--oid-prefix'
+            ,dest='db_schema'
+            ,type=str
+            ,default='public'
+            ,required=False
+            ,help='Prefix of object names (the schema of the table)'
+        )
+
+        return self
+
+    def add_fan_out_args(self, required=False, help_str=''):
+        self._arg_parser.add_argument(
+             '--shard-size'
+            ,dest='shard_size'
+            ,type=int
+            ,default=None
+            ,required=required
+            ,help=(help_str or 'Number of objects scanned by each run-query invocation')
+        )
+
+        self._arg_parser.add_argument(
+             '--max-parallel'
+            ,dest='max_parallel'
+            ,type=int
+            ,default=4
+            ,required=False
+            ,help='Maximum number of concurrent run-query invocations'
+        )
+
+        return self
+
     def parse_args(self):
         return self._arg_parser.parse_known_args()
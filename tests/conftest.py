@@ -0,0 +1,81 @@
+import numpy
+import pyarrow
+import pytest
+
+from skyhookdm import skyhook
+from skyhookdm.dataformats import SkyhookDataWrapper
+
+
+class ExpressionMatrix(object):
+    """
+    Minimal stand-in for the domain datasets wrapped by `SkyhookDataWrapper` (e.g. gene
+    expression): a matrix of cells (columns) by genes (rows), with named columns.
+    """
+
+    def __init__(self, expression, column_names, **kwargs):
+        super().__init__(**kwargs)
+
+        self.expression   = expression
+        self.column_names = column_names
+
+    @property
+    def shape(self):
+        return self.expression.shape
+
+    def astype(self, dtype):
+        return self.__class__(self.expression.astype(dtype), self.column_names)
+
+    def columns(self, from_col=None, to_col=None):
+        return self.column_names[from_col:to_col]
+
+    def data_as_array(self, from_col=None, to_col=None):
+        return self.expression[:, from_col:to_col]
+
+
+@pytest.fixture
+def expression_matrix():
+    random_gen = numpy.random.default_rng(0)
+    expression = random_gen.integers(0, 100, size=(50, 25))
+
+    return ExpressionMatrix(expression, [f'cell_{col_ndx:03d}' for col_ndx in range(25)])
+
+
+@pytest.fixture
+def expression_wrapper(expression_matrix):
+    return SkyhookDataWrapper(
+        'expression', expression_matrix,
+        type_for_numpy=numpy.uint16,
+        type_for_arrow=pyarrow.uint16(),
+        type_for_skyhook=skyhook.DataTypes.SDT_UINT16
+    )
+
+
+@pytest.fixture
+def sparse_expression_wrapper(expression_matrix):
+    expression_matrix.expression[expression_matrix.expression < 90] = 0
+
+    return SkyhookDataWrapper(
+        'expression', expression_matrix,
+        type_for_numpy=numpy.uint16,
+        type_for_arrow=pyarrow.uint16(),
+        type_for_skyhook=skyhook.DataTypes.SDT_UINT16,
+        data_layout=skyhook.DataLayouts.SPARSE_CSC
+    )
+
+
+@pytest.fixture
+def annotation_wrapper():
+    random_gen = numpy.random.default_rng(0)
+
+    annotations = numpy.column_stack([
+        [f'barcode_{row_ndx:04d}' for row_ndx in range(100)],
+        random_gen.choice(['T cell', 'B cell', 'NK cell'], size=100),
+        random_gen.choice(['batch_1', 'batch_2'], size=100),
+    ])
+
+    return SkyhookDataWrapper(
+        'annotations', ExpressionMatrix(annotations, ['barcode', 'cell_type', 'batch']),
+        type_for_numpy=numpy.str_,
+        type_for_arrow=pyarrow.string(),
+        type_for_skyhook=skyhook.DataTypes.SDT_STRING
+    )
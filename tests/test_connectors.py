@@ -0,0 +1,234 @@
+import time
+import errno
+
+import pyarrow
+import pytest
+
+from skyhookdm.connectors import (ObjectReadError, RadosConnector, storage_obj_data,
+                                  storage_obj_name)
+from skyhookdm.dataformats import (SkyhookFlatbufferMeta, arrow_binary_from_table,
+                                   skyhook_metadata_from_schema)
+from skyhookdm.localrados import LocalRados
+
+
+@pytest.fixture
+def local_cluster(tmp_path):
+    with RadosConnector.connection_for_local(str(tmp_path / 'cluster')).connect() as cluster:
+        yield cluster
+
+
+def skyhook_object(arrow_table):
+    return storage_obj_data(SkyhookFlatbufferMeta.binary_from_arrow_binary(
+        arrow_binary_from_table(arrow_table)
+    ))
+
+
+def test_bulk_write_and_read(local_cluster, expression_wrapper):
+    tbl_parts = [tbl_part for _, tbl_part in expression_wrapper.batched_table_partitions(4)]
+
+    with local_cluster.context_for_pool('skyhook') as pool_context:
+        with pool_context.bulk_writer(max_in_flight=3) as bulk_writer:
+            for obj_id, tbl_part in enumerate(tbl_parts):
+                bulk_writer.write(storage_obj_name('expr', obj_id), skyhook_object(tbl_part))
+
+        assert bulk_writer.stats()['objects'] == len(tbl_parts)
+        assert bulk_writer.stats()['failed'] == 0
+
+        read_batches = dict(pool_context.read_table_batches(
+            'expr', num_objs=len(tbl_parts), max_in_flight=2
+        ))
+
+    assert sorted(read_batches) == list(range(len(tbl_parts)))
+    for obj_id, tbl_part in enumerate(tbl_parts):
+        assert read_batches[obj_id].equals(tbl_part.to_batches()[0])
+
+
+def test_read_missing_object(local_cluster):
+    with local_cluster.context_for_pool('skyhook') as pool_context:
+        with pytest.raises(ObjectReadError):
+            list(pool_context.read_table_batches('missing', num_objs=2))
+
+
+def test_read_invalid_size_xattr(local_cluster):
+    with local_cluster.context_for_pool('skyhook') as pool_context:
+        pool_context.write_data('obj', storage_obj_data(b'data'))
+        pool_context.flush()
+        pool_context.io_context.set_xattr('obj', 'size', b'invalid')
+
+        with pytest.raises(ObjectReadError):
+            list(pool_context.bulk_reader().read_objects(['obj']))
+
+
+def test_read_objects_closed_early(local_cluster, monkeypatch):
+    """
+    Closing the generator early waits for the reads still in flight.
+    """
+
+    with local_cluster.context_for_pool('skyhook') as pool_context:
+        obj_names = [storage_obj_name('expr', obj_id) for obj_id in range(8)]
+        for obj_name in obj_names:
+            pool_context.write_data(obj_name, storage_obj_data(b'data'))
+
+        pool_context.flush()
+
+        io_context, read_callbacks = pool_context.io_context, []
+        aio_read                   = io_context.aio_read
+
+        # later objects' reads complete later, so that some are in flight when the reader closes
+        def delayed_aio_read(obj_name, length, offset, oncomplete=None):
+            def delayed_oncomplete(*cb_args):
+                time.sleep(0.02 * obj_names.index(obj_name))
+                read_callbacks.append(obj_name)
+                oncomplete(*cb_args)
+
+            return aio_read(obj_name, length, offset, oncomplete=delayed_oncomplete)
+
+        monkeypatch.setattr(io_context, 'aio_read', delayed_aio_read)
+
+        obj_reads = pool_context.bulk_reader(max_in_flight=4).read_objects(obj_names)
+        next(obj_reads)
+        obj_reads.close()
+
+        assert sorted(read_callbacks) == obj_names[:4]
+
+
+def test_context_pool_reuse(local_cluster):
+    for _ in range(5):
+        with local_cluster.context_for_pool('skyhook') as pool_context:
+            pool_context.write_data('obj', b'data')
+
+    io_context_pool = local_cluster.io_context_pool('skyhook')
+
+    assert (io_context_pool.open_count, io_context_pool.lease_count) == (1, 5)
+
+
+def test_peek_table_objects(local_cluster, expression_wrapper):
+    tbl_parts = [tbl_part for _, tbl_part in expression_wrapper.batched_table_partitions(4)]
+
+    with local_cluster.context_for_pool('skyhook') as pool_context:
+        for obj_id, tbl_part in enumerate(tbl_parts):
+            pool_context.write_data(storage_obj_name('expr', obj_id), skyhook_object(tbl_part))
+
+        pool_context.flush()
+
+        peeked_objs = list(pool_context.peek_table_objects(
+            'expr', num_objs=len(tbl_parts), max_workers=2
+        ))
+
+    assert [obj_id for obj_id, _, _ in peeked_objs] == list(range(len(tbl_parts)))
+    for (_, skyhook_metadata, column_schemas), tbl_part in zip(peeked_objs, tbl_parts):
+        assert skyhook_metadata.table_name == expression_wrapper.table_name
+        assert [col.col_name for col in column_schemas] == tbl_part.column_names
+
+
+def test_delete_object_rows_and_blobs(local_cluster, expression_wrapper):
+    tbl_parts = [tbl_part for _, tbl_part in expression_wrapper.batched_table_partitions(4)]
+
+    with local_cluster.context_for_pool('skyhook') as pool_context:
+        for obj_id, tbl_part in enumerate(tbl_parts):
+            pool_context.write_data(storage_obj_name('expr', obj_id), skyhook_object(tbl_part))
+
+        pool_context.flush()
+
+        pool_context.delete_object_rows(storage_obj_name('expr', 0), [1, 3])
+        pool_context.delete_object_rows(storage_obj_name('expr', 0), [5])
+        pool_context.mark_object_deleted(storage_obj_name('expr', 1))
+
+        read_batches = {}
+        for obj_id, record_batch in pool_context.read_table_batches('expr', num_objs=3):
+            read_batches.setdefault(obj_id, []).append(record_batch)
+
+    assert sorted(read_batches) == [0, 2]
+    assert pyarrow.Table.from_batches(read_batches[0]).equals(
+        tbl_parts[0].filter(pyarrow.array([ndx not in (1, 3, 5) for ndx in range(50)]))
+    )
+    assert pyarrow.Table.from_batches(read_batches[2]).equals(tbl_parts[2])
+
+
+def test_delete_vectors_for_append(local_cluster, expression_wrapper, monkeypatch):
+    tbl_parts = [tbl_part for _, tbl_part in expression_wrapper.batched_table_partitions(4)]
+    tbl_cols  = [skyhook_metadata_from_schema(tbl_part.schema)[1] for tbl_part in tbl_parts]
+
+    with local_cluster.context_for_pool('skyhook') as pool_context:
+        # a table without objects has no deleted rows
+        assert pool_context.delete_vectors_for_append('expr', 0, tbl_cols[:1]) == [None]
+
+        for obj_id, tbl_part in enumerate(tbl_parts[:3]):
+            pool_context.write_data(storage_obj_name('expr', obj_id), skyhook_object(tbl_part))
+
+        pool_context.flush()
+
+        for obj_id in range(3):
+            pool_context.delete_object_rows(storage_obj_name('expr', obj_id), [1, 3, 5])
+
+        # only the last object is peeked, however many objects the table has
+        peeked_objs = []
+        peek_object = pool_context.peek_object
+        monkeypatch.setattr(pool_context, 'peek_object', lambda obj_name: (
+            peeked_objs.append(obj_name) or peek_object(obj_name)
+        ))
+
+        # continued column ids (appended columns) get the table's deleted rows; restarted ids
+        # (appended rows) start a row group without deleted rows
+        column_deletes, next_deletes, row_deletes = pool_context.delete_vectors_for_append(
+            'expr', 3, [tbl_cols[3], tbl_cols[4], tbl_cols[0]]
+        )
+
+    assert peeked_objs == [storage_obj_name('expr', 2)]
+    assert column_deletes.tolist() == [int(ndx in (1, 3, 5)) for ndx in range(50)]
+    assert next_deletes is column_deletes
+    assert row_deletes is None
+
+
+def test_bulk_write_submit_error(local_cluster, monkeypatch):
+    """
+    A submission that raises fails its write, rather than leaving `flush` waiting for it.
+    """
+
+    def failing_setxattr(*args, **kwargs):
+        raise OSError('submit failed')
+
+    with local_cluster.context_for_pool('skyhook') as pool_context:
+        monkeypatch.setattr(pool_context.io_context, 'aio_setxattr', failing_setxattr)
+
+        with pytest.raises(OSError):
+            with pool_context.bulk_writer() as bulk_writer:
+                bulk_writer.write(storage_obj_name('expr', 0), storage_obj_data(b'data'))
+
+    assert bulk_writer.stats()['failed'] == 1
+
+
+def test_local_completion_for_any_error(tmp_path):
+    local_cluster = LocalRados(str(tmp_path / 'cluster'))
+    local_cluster.connect()
+
+    def failing_op():
+        raise ValueError('operation failed')
+
+    completed  = []
+    completion = local_cluster.submit(
+        failing_op, oncomplete=lambda completion, data: completed.append(data)
+    )
+    completion.wait_for_complete()
+    local_cluster.shutdown()
+
+    assert completion.get_return_value() == -errno.EIO
+    assert completed == [None]
+
+
+def test_next_object_id_raises_other_errors(local_cluster, monkeypatch):
+    with local_cluster.context_for_pool('skyhook') as pool_context:
+        for obj_id in range(5):
+            pool_context.write_data(storage_obj_name('expr', obj_id), storage_obj_data(b'data'))
+
+        pool_context.flush()
+        assert pool_context.next_object_id('expr') == 5
+
+        # e.g. a timeout must not be mistaken for a missing object (and objects overwritten)
+        def failing_stat(obj_name):
+            raise TimeoutError(f'stat of {obj_name} timed out')
+
+        monkeypatch.setattr(pool_context.io_context, 'stat', failing_stat)
+
+        with pytest.raises(TimeoutError):
+            pool_context.next_object_id('expr')
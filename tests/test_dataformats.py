@@ -0,0 +1,276 @@
+import io
+import subprocess
+
+import numpy
+import pyarrow
+import pyarrow.parquet
+import pytest
+
+from skyhookdm.dataformats import (SkyhookFileReader, SkyhookFileWriter, SkyhookFlatbufferMeta,
+                                   SkyhookResultStreamReader, arrow_binary_from_table,
+                                   arrow_table_from_binary, blob_compression_types,
+                                   column_stats_from_schema, range_reader_for_file)
+
+
+@pytest.fixture
+def arrow_table():
+    return pyarrow.Table.from_arrays(
+        [pyarrow.array(range(10), type=pyarrow.uint16()) for _ in range(3)],
+        names=['cell_a', 'cell_b', 'cell_c']
+    )
+
+
+@pytest.fixture
+def skyhook_file(tmp_path, arrow_table):
+    binary_data = SkyhookFlatbufferMeta.binary_from_arrow_binary(
+        arrow_binary_from_table(arrow_table).to_pybytes()
+    )
+
+    path_to_file = tmp_path / 'example.skyhook'
+    path_to_file.write_bytes(len(binary_data).to_bytes(4, byteorder='little') + binary_data)
+
+    return str(path_to_file)
+
+
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_read_arrow_file(tmp_path, arrow_table, use_mmap):
+    path_to_file = tmp_path / 'example.arrow'
+    path_to_file.write_bytes(arrow_binary_from_table(arrow_table).to_pybytes())
+
+    data_table = SkyhookFileReader.read_data_file_as_arrow_table(
+        str(path_to_file), use_mmap=use_mmap
+    )
+
+    assert data_table.equals(arrow_table)
+
+
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_read_skyhook_file(skyhook_file, arrow_table, use_mmap):
+    data_size, skyhook_flatbuffer = SkyhookFileReader.read_skyhook_file(
+        skyhook_file, use_mmap=use_mmap
+    )
+
+    assert data_size == len(SkyhookFileReader.read_data_file_as_binary(skyhook_file)) - 4
+    assert skyhook_flatbuffer.get_data_as_arrow().equals(arrow_table)
+
+
+def test_read_binary_mmap_is_arrow_buffer(skyhook_file):
+    binary_data = SkyhookFileReader.read_data_file_as_binary(skyhook_file, use_mmap=True)
+
+    assert isinstance(binary_data, pyarrow.Buffer)
+    assert binary_data.to_pybytes() == SkyhookFileReader.read_data_file_as_binary(skyhook_file)
+
+
+def test_flatbuffer_blob_is_view(skyhook_file, arrow_table):
+    binary_data = SkyhookFileReader.read_data_file_as_binary(skyhook_file, use_mmap=True)
+    fb_meta     = SkyhookFlatbufferMeta.from_binary_flatbuffer(binary_data, offset=4)
+
+    data_blob = fb_meta.get_data_as_buffer()
+    blob_ndx  = binary_data.to_pybytes().index(data_blob.to_pybytes())
+
+    assert data_blob.size == fb_meta.get_size()
+    assert data_blob.address == binary_data.address + blob_ndx
+
+
+def test_flatbuffer_lazy_batches(skyhook_file, arrow_table):
+    data_size, fb_meta = SkyhookFileReader.read_skyhook_file(skyhook_file)
+    stream_reader      = fb_meta.get_data_as_arrow_batches()
+
+    assert stream_reader.schema.equals(arrow_table.schema)
+    assert pyarrow.Table.from_batches(list(stream_reader)).equals(arrow_table)
+
+
+@pytest.mark.parametrize('compression', [None, 'zstd'])
+@pytest.mark.parametrize('read_size', [16, 64 * 1024])
+def test_flatbuffer_read_arrow_schema(tmp_path, expression_wrapper, compression, read_size):
+    tbl_part = next(expression_wrapper.batched_table_partitions(batch_size=4))[1]
+
+    path_to_file = tmp_path / 'example.skyhook'
+    path_to_file.write_bytes(SkyhookFlatbufferMeta.binary_from_arrow_binary(
+        arrow_binary_from_table(tbl_part), compression=compression
+    ))
+
+    read_lengths = []
+    with open(path_to_file, 'rb') as input_handle:
+        file_reader = range_reader_for_file(input_handle)
+
+        def read_range(offset, length):
+            read_lengths.append(length)
+            return file_reader(offset, length)
+
+        arrow_schema = SkyhookFlatbufferMeta.read_arrow_schema(read_range, read_size=read_size)
+
+    assert arrow_schema.equals(tbl_part.schema, check_metadata=True)
+    if compression is None and read_size == 16:
+        assert sum(read_lengths) < path_to_file.stat().st_size
+
+
+def test_peek_skyhook_file(tmp_path, expression_wrapper):
+    tbl_part    = next(expression_wrapper.batched_table_partitions(batch_size=4))[1]
+    binary_data = SkyhookFlatbufferMeta.binary_from_arrow_binary(
+        arrow_binary_from_table(tbl_part)
+    )
+
+    path_to_file = tmp_path / 'example.skyhook'
+    path_to_file.write_bytes(len(binary_data).to_bytes(4, byteorder='little') + binary_data)
+
+    data_size, skyhook_metadata, column_schemas = SkyhookFileReader.peek_skyhook_file(
+        str(path_to_file)
+    )
+
+    assert data_size == len(binary_data)
+    assert skyhook_metadata.table_name == expression_wrapper.table_name
+    assert [col.col_name for col in column_schemas] == tbl_part.column_names
+
+
+def test_single_file_schema(tmp_path, annotation_wrapper):
+    path_to_outfile = str(tmp_path / 'annotations.parquet')
+    SkyhookFileWriter.write_to_parquet(annotation_wrapper, path_to_outfile)
+
+    # single files have neither the column statistics nor the dictionary encoding of partitions
+    file_schema = pyarrow.parquet.read_schema(path_to_outfile)
+    assert file_schema.types == [pyarrow.string()] * 3
+    assert b'column_stats' not in file_schema.metadata
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_read_partitions_in_order(tmp_path, expression_wrapper, max_workers):
+    SkyhookFileWriter.write_partitions_to_arrow(expression_wrapper, str(tmp_path), batch_size=4)
+
+    data_table = SkyhookFileReader.read_data_partitions_as_arrow_table(
+        str(tmp_path), max_workers=max_workers
+    )
+
+    assert data_table.column_names == expression_wrapper.domain_data.columns()
+    assert data_table.num_rows == expression_wrapper.domain_data.shape[0]
+    assert len(data_table.schema.metadata[b'data_schema'].split(b';')) == data_table.num_columns
+
+
+@pytest.mark.parametrize('write_partitions', [
+    SkyhookFileWriter.write_partitions_to_parquet, SkyhookFileWriter.write_partitions_to_flatbuffer
+])
+def test_read_non_arrow_partitions(tmp_path, expression_wrapper, write_partitions):
+    partition_manifest = write_partitions(expression_wrapper, str(tmp_path), batch_size=4)
+
+    data_table = SkyhookFileReader.read_data_partitions_as_arrow_table(
+        str(tmp_path), partition_manifest.file_ext
+    )
+
+    assert data_table.column_names == expression_wrapper.domain_data.columns()
+    assert data_table.num_rows == expression_wrapper.domain_data.shape[0]
+
+
+def test_read_sparse_row_partitions(tmp_path, sparse_expression_wrapper):
+    SkyhookFileWriter.write_partitions_to_arrow(
+        sparse_expression_wrapper, str(tmp_path), batch_size=10, row_batch_size=20
+    )
+
+    data_table = SkyhookFileReader.read_data_partitions_as_arrow_table(str(tmp_path))
+
+    assert data_table.column_names == sparse_expression_wrapper.domain_data.columns()
+    assert numpy.array_equal(
+        numpy.column_stack([column.to_numpy() for column in data_table.columns]),
+        sparse_expression_wrapper.domain_data.data_as_array()
+    )
+
+
+def test_iter_partitions_bounded(tmp_path, expression_wrapper):
+    SkyhookFileWriter.write_partitions_to_arrow(expression_wrapper, str(tmp_path), batch_size=4)
+
+    partition_ids = [
+        partition_id
+        for partition_id, tbl_part in SkyhookFileReader.iter_data_partitions(
+            str(tmp_path), max_workers=2, max_in_flight=1
+        )
+    ]
+
+    assert partition_ids == list(range(1, 8))
+
+
+def test_column_major_partitions_are_views(expression_wrapper):
+    expression_wrapper.layout_column_major()
+
+    column_major_data = expression_wrapper._column_major_data
+    data_range        = (
+        column_major_data.ctypes.data,
+        column_major_data.ctypes.data + column_major_data.nbytes
+    )
+
+    for _, tbl_part in expression_wrapper.batched_table_partitions(batch_size=4):
+        for arrow_column in tbl_part.columns:
+            data_buffer = arrow_column.chunk(0).buffers()[1]
+            assert data_range[0] <= data_buffer.address < data_range[1]
+
+    data_table = expression_wrapper.as_partitioned_arrow_table()
+    assert data_table.column(3).to_pylist() == list(column_major_data[:, 3])
+
+
+@pytest.mark.parametrize('compression', ['lz4', 'zstd'])
+def test_flatbuffer_blob_compression(arrow_table, compression):
+    arrow_binary = arrow_binary_from_table(arrow_table)
+    fb_meta      = SkyhookFlatbufferMeta.from_binary_flatbuffer(
+        SkyhookFlatbufferMeta.binary_from_arrow_binary(arrow_binary, compression=compression)
+    )
+
+    assert fb_meta.get_compression() == blob_compression_types[compression]
+    assert fb_meta.get_original_size() == arrow_binary.size
+    assert fb_meta.get_size() < arrow_binary.size
+    assert fb_meta.get_data_as_arrow().equals(arrow_table)
+
+
+def test_ipc_body_compression(arrow_table):
+    arrow_binary = arrow_binary_from_table(arrow_table, ipc_compression='zstd')
+
+    assert arrow_table_from_binary(arrow_binary).equals(arrow_table)
+
+
+@pytest.fixture
+def run_query_output(tmp_path, expression_wrapper):
+    path_to_output = tmp_path / 'query.binary'
+
+    with open(path_to_output, 'wb') as output_handle:
+        for _, tbl_part in expression_wrapper.batched_table_partitions(batch_size=4):
+            arrow_binary = arrow_binary_from_table(tbl_part)
+
+            output_handle.write(arrow_binary.size.to_bytes(8, byteorder='little'))
+            output_handle.write(arrow_binary)
+
+    return str(path_to_output)
+
+
+def test_result_stream_from_pipe(tmp_path, run_query_output, expression_wrapper):
+    path_to_debug = tmp_path / 'debug.binary'
+
+    with subprocess.Popen(['cat', run_query_output], stdout=subprocess.PIPE) as cat_proc:
+        with open(path_to_debug, 'wb') as debug_handle:
+            result_table = SkyhookResultStreamReader(
+                cat_proc.stdout, debug_stream=debug_handle
+            ).read_all()
+
+    assert result_table.equals(expression_wrapper.as_partitioned_arrow_table())
+    assert path_to_debug.read_bytes() == open(run_query_output, 'rb').read()
+
+
+def test_result_stream_truncated(run_query_output):
+    with open(run_query_output, 'rb') as output_handle:
+        truncated_stream = io.BytesIO(output_handle.read()[:-10])
+
+    with pytest.raises(EOFError):
+        list(SkyhookResultStreamReader(truncated_stream).iter_batches())
+
+
+@pytest.mark.parametrize('wrapper_name', ['expression_wrapper', 'sparse_expression_wrapper'])
+def test_partition_column_stats(request, wrapper_name):
+    data_wrapper = request.getfixturevalue(wrapper_name)
+    expression   = data_wrapper.domain_data.data_as_array()
+
+    column_stats = {}
+    for _, tbl_part in data_wrapper.batched_table_partitions(batch_size=4):
+        column_stats.update(column_stats_from_schema(tbl_part.schema))
+
+    assert list(column_stats) == data_wrapper.domain_data.columns()
+    for col_ndx, stats in enumerate(column_stats.values()):
+        assert stats == (
+            expression[:, col_ndx].min(), expression[:, col_ndx].max(),
+            0, numpy.count_nonzero(expression[:, col_ndx])
+        )
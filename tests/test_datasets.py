@@ -0,0 +1,360 @@
+import os
+
+import numpy
+import pyarrow
+import pytest
+
+from skyhookdm import skyhook
+from skyhookdm.datasets import SkyhookDataset
+from skyhookdm.dataformats import (SkyhookDataWrapper, SkyhookFileReader, SkyhookFileWriter,
+                                   SkyhookPartitionManifest, partition_file_exts,
+                                   path_for_delete_vector)
+
+from tests.conftest import ExpressionMatrix
+
+
+partition_writers = {
+    'arrow'     : SkyhookFileWriter.write_partitions_to_arrow,
+    'parquet'   : SkyhookFileWriter.write_partitions_to_parquet,
+    'flatbuffer': SkyhookFileWriter.write_partitions_to_flatbuffer,
+}
+
+
+def expression_slice(expression_matrix, rows=slice(None), cols=slice(None)):
+    return SkyhookDataWrapper(
+        'expression',
+        ExpressionMatrix(
+            expression_matrix.expression[rows, cols], expression_matrix.column_names[cols]
+        ),
+        type_for_numpy=numpy.uint16,
+        type_for_arrow=pyarrow.uint16(),
+        type_for_skyhook=skyhook.DataTypes.SDT_UINT16
+    )
+
+
+@pytest.mark.parametrize('file_format', list(partition_writers.keys()))
+def test_dataset_full_table(tmp_path, expression_wrapper, file_format):
+    partition_writers[file_format](expression_wrapper, str(tmp_path), batch_size=4)
+
+    dataset    = SkyhookDataset.from_directory(str(tmp_path), file_format=file_format)
+    data_table = dataset.to_table()
+
+    assert len(dataset.partitions) == 7
+    assert data_table.column_names == expression_wrapper.domain_data.columns()
+    assert dataset.column_names == expression_wrapper.domain_data.columns()
+
+
+@pytest.mark.parametrize('file_format', list(partition_writers.keys()))
+def test_dataset_projection_pushdown(tmp_path, expression_wrapper, file_format):
+    partition_writers[file_format](expression_wrapper, str(tmp_path), batch_size=4)
+
+    projection = ['cell_013', 'cell_001', 'cell_002']
+    dataset    = SkyhookDataset.from_directory(str(tmp_path), file_format=file_format)
+
+    projected_partitions = [
+        partition.path_to_partition
+        for partition, _ in dataset.partitions_for_columns(projection)
+    ]
+    assert len(projected_partitions) == 2
+
+    # partitions that don't hold projected columns must not be read
+    for partition in dataset.partitions:
+        if partition.path_to_partition not in projected_partitions:
+            os.remove(partition.path_to_partition)
+
+    data_table = dataset.to_table(columns=projection)
+
+    assert data_table.column_names == projection
+    assert data_table.schema.metadata[b'data_schema'].count(b';') == len(projection) - 1
+    assert (
+        data_table.column('cell_013').to_pylist()
+        == list(expression_wrapper.domain_data.data_as_array()[:, 13])
+    )
+
+
+def test_dataset_unknown_column(tmp_path, expression_wrapper):
+    SkyhookFileWriter.write_partitions_to_arrow(expression_wrapper, str(tmp_path), batch_size=4)
+
+    with pytest.raises(KeyError):
+        SkyhookDataset.from_directory(str(tmp_path)).to_table(columns=['not_a_cell'])
+
+
+@pytest.mark.parametrize('file_format', list(partition_writers.keys()))
+def test_partition_manifest(tmp_path, expression_wrapper, file_format):
+    partition_writers[file_format](expression_wrapper, str(tmp_path), batch_size=4)
+
+    partition_manifest = SkyhookPartitionManifest.from_directory(
+        str(tmp_path), partition_file_exts[file_format]
+    )
+
+    assert partition_manifest.table_name == 'expression'
+    assert partition_manifest.num_rows == 50
+    assert partition_manifest.column_names == expression_wrapper.domain_data.columns()
+
+    last_partition = partition_manifest.partitions[-1]
+    assert last_partition.partition_id == 7
+    assert (last_partition.column_start, last_partition.column_end) == (24, 25)
+    assert last_partition.byte_size == os.path.getsize(
+        os.path.join(str(tmp_path), last_partition.file_name)
+    )
+
+    # the manifest is replaced atomically, so no temporary file is left behind
+    assert not [file_name for file_name in os.listdir(str(tmp_path)) if file_name.endswith('.tmp')]
+
+
+def test_dataset_from_manifest_reads_no_schemas(tmp_path, expression_wrapper):
+    SkyhookFileWriter.write_partitions_to_arrow(expression_wrapper, str(tmp_path), batch_size=4)
+
+    dataset = SkyhookDataset.from_directory(str(tmp_path))
+    for partition in dataset.partitions[1:]:
+        os.remove(partition.path_to_partition)
+
+    assert dataset.column_names == expression_wrapper.domain_data.columns()
+    assert dataset.to_table(columns=['cell_000']).num_rows == 50
+
+
+@pytest.mark.parametrize('file_format', list(partition_writers.keys()))
+def test_parallel_writer_deterministic(tmp_path, expression_wrapper, file_format):
+    serial_dir, parallel_dir = tmp_path / 'serial', tmp_path / 'parallel'
+    serial_dir.mkdir()
+    parallel_dir.mkdir()
+
+    partition_writers[file_format](
+        expression_wrapper, str(serial_dir), batch_size=3, max_workers=1, max_in_flight=1
+    )
+    partition_writers[file_format](
+        expression_wrapper, str(parallel_dir), batch_size=3, max_workers=8, max_in_flight=4
+    )
+
+    serial_table   = SkyhookDataset.from_directory(str(serial_dir), file_format).to_table()
+    parallel_table = SkyhookDataset.from_directory(str(parallel_dir), file_format).to_table()
+
+    assert sorted(os.listdir(serial_dir)) == sorted(os.listdir(parallel_dir))
+    assert serial_table.equals(parallel_table)
+
+
+@pytest.mark.parametrize('file_format, compression, ipc_compression', [
+    ('flatbuffer', 'zstd', None  ),
+    ('flatbuffer', None  , 'lz4' ),
+    ('arrow'     , None  , 'zstd'),
+    ('parquet'   , 'zstd', None  ),
+])
+def test_compressed_partitions(tmp_path, expression_wrapper,
+                               file_format, compression, ipc_compression):
+    partition_writers[file_format](
+        expression_wrapper, str(tmp_path), batch_size=4,
+        compression=compression, ipc_compression=ipc_compression
+    )
+
+    data_table = SkyhookDataset.from_directory(str(tmp_path), file_format).to_table()
+
+    assert data_table.column_names == expression_wrapper.domain_data.columns()
+    assert (
+        data_table.column('cell_005').to_pylist()
+        == list(expression_wrapper.domain_data.data_as_array()[:, 5])
+    )
+
+
+@pytest.mark.parametrize('file_format', list(partition_writers.keys()))
+def test_sparse_partitions_round_trip(tmp_path, sparse_expression_wrapper, file_format):
+    partition_writers[file_format](sparse_expression_wrapper, str(tmp_path), batch_size=4)
+
+    expression = sparse_expression_wrapper.domain_data.data_as_array()
+    dataset    = SkyhookDataset.from_directory(str(tmp_path), file_format)
+
+    tbl_part = next(sparse_expression_wrapper.batched_table_partitions(batch_size=4))[1]
+    assert tbl_part.column_names == ['col_id', 'row_id', 'value']
+    assert tbl_part.num_rows == numpy.count_nonzero(expression[:, :4])
+
+    data_table = dataset.to_table()
+    assert data_table.column_names == sparse_expression_wrapper.domain_data.columns()
+    assert numpy.array_equal(
+        numpy.column_stack([column.to_numpy() for column in data_table.columns]),
+        expression
+    )
+
+    projected_table = dataset.to_table(columns=['cell_010'])
+    assert projected_table.column(0).to_pylist() == list(expression[:, 10])
+
+
+@pytest.mark.parametrize('file_format', list(partition_writers.keys()))
+def test_dictionary_encoded_annotations(tmp_path, annotation_wrapper, file_format):
+    partition_writers[file_format](annotation_wrapper, str(tmp_path), batch_size=2)
+
+    data_table = SkyhookDataset.from_directory(str(tmp_path), file_format).to_table()
+
+    assert pyarrow.types.is_string(data_table.schema.field(0).type)
+    assert pyarrow.types.is_dictionary(data_table.schema.field(1).type)
+    assert pyarrow.types.is_dictionary(data_table.schema.field(2).type)
+    assert (
+        data_table.column('cell_type').to_pylist()
+        == list(annotation_wrapper.domain_data.data_as_array()[:, 1])
+    )
+
+
+@pytest.mark.parametrize('file_format', list(partition_writers.keys()))
+def test_dataset_delete_rows(tmp_path, expression_wrapper, file_format):
+    partition_writers[file_format](expression_wrapper, str(tmp_path), batch_size=4)
+
+    partition_bytes = {
+        path_to_file.name: path_to_file.read_bytes() for path_to_file in tmp_path.iterdir()
+    }
+
+    dataset = SkyhookDataset.from_directory(str(tmp_path), file_format)
+    assert dataset.delete_rows([0, 7, 7, 49]) == 3
+
+    expression = numpy.delete(expression_wrapper.domain_data.data_as_array(), [0, 7, 49], axis=0)
+    data_table = dataset.to_table()
+
+    assert data_table.num_rows == 47
+    assert data_table.column('cell_013').to_pylist() == list(expression[:, 13])
+    assert dataset.to_table(columns=['cell_024']).column(0).to_pylist() == list(expression[:, 24])
+
+    # partitions are not rewritten
+    for file_name, file_bytes in partition_bytes.items():
+        assert (tmp_path / file_name).read_bytes() == file_bytes
+
+    with pytest.raises(IndexError):
+        dataset.delete_rows([50])
+
+
+@pytest.mark.parametrize('file_format', list(partition_writers.keys()))
+def test_delete_partition(tmp_path, expression_wrapper, file_format):
+    partition_writers[file_format](expression_wrapper, str(tmp_path), batch_size=4)
+
+    dataset   = SkyhookDataset.from_directory(str(tmp_path), file_format)
+    partition = dataset.partitions[0]
+
+    SkyhookFileWriter.delete_partition(partition.path_to_partition, file_format)
+
+    # a flatbuffer's BlobDeleted flag is set in place; other formats delete every row
+    has_deletes = os.path.exists(path_for_delete_vector(partition.path_to_partition))
+    assert has_deletes == (file_format != 'flatbuffer')
+
+    assert partition.count_rows() == 0
+
+    data_table = partition.read()
+    assert data_table.num_rows == 0
+    assert data_table.column_names == partition.column_names
+
+
+@pytest.mark.parametrize('file_format', list(partition_writers.keys()))
+def test_append_columns(tmp_path, expression_matrix, file_format):
+    table_wrapper    = expression_slice(expression_matrix, cols=slice(0, 10))
+    appended_wrapper = expression_slice(expression_matrix, cols=slice(10, 25))
+
+    partition_writers[file_format](table_wrapper, str(tmp_path), batch_size=4)
+
+    # appended columns must hold the table's rows in a single row group
+    with pytest.raises(ValueError):
+        partition_writers[file_format](
+            appended_wrapper, str(tmp_path), batch_size=4, append=True, row_batch_size=10
+        )
+
+    partition_manifest = partition_writers[file_format](
+        appended_wrapper, str(tmp_path), batch_size=4, append=True
+    )
+
+    # appending does not change the wrapper, so it still writes a table of its own
+    assert appended_wrapper.column_offset == 0
+
+    assert [part.partition_id for part in partition_manifest.partitions] == list(range(1, 8))
+    last_partition = partition_manifest.partitions[-1]
+    assert (last_partition.column_start, last_partition.column_end) == (22, 25)
+    assert partition_manifest.num_rows == 50
+
+    data_table = SkyhookDataset.from_directory(str(tmp_path), file_format).to_table()
+    assert data_table.column_names == expression_matrix.column_names
+    assert numpy.array_equal(
+        numpy.column_stack([column.to_numpy() for column in data_table.columns]),
+        expression_matrix.expression
+    )
+
+    # columns already in the table (but not all of them) cannot be appended
+    with pytest.raises(ValueError):
+        partition_writers[file_format](table_wrapper, str(tmp_path), batch_size=4, append=True)
+
+
+@pytest.mark.parametrize('file_format', list(partition_writers.keys()))
+def test_append_columns_with_deletes(tmp_path, expression_matrix, file_format):
+    partition_writers[file_format](
+        expression_slice(expression_matrix, cols=slice(0, 10)), str(tmp_path), batch_size=4
+    )
+    SkyhookDataset.from_directory(str(tmp_path), file_format).delete_rows([0, 1, 2])
+
+    partition_writers[file_format](
+        expression_slice(expression_matrix, cols=slice(10, 25)), str(tmp_path), batch_size=4,
+        append=True
+    )
+
+    # appended columns have the table's rows deleted
+    data_table = SkyhookDataset.from_directory(str(tmp_path), file_format).to_table()
+    assert data_table.num_rows == 47
+    assert data_table.column('cell_024').to_pylist() == list(expression_matrix.expression[3:, 24])
+
+
+@pytest.mark.parametrize('file_format', list(partition_writers.keys()))
+def test_write_row_partitions(tmp_path, expression_matrix, file_format):
+    partition_manifest = partition_writers[file_format](
+        expression_slice(expression_matrix), str(tmp_path), batch_size=10, row_batch_size=20
+    )
+
+    # each batch of rows is written as the same column partitions (a row group)
+    row_groups = partition_manifest.row_groups()
+    assert [len(row_group) for row_group in row_groups] == [3, 3, 3]
+    assert [row_group[0].num_rows for row_group in row_groups] == [20, 20, 10]
+    assert partition_manifest.num_rows == 50
+
+    for data_table in (
+            SkyhookDataset.from_directory(str(tmp_path), file_format).to_table(),
+            SkyhookFileReader.read_data_partitions_as_arrow_table(
+                str(tmp_path), partition_file_exts[file_format]
+            )):
+        assert data_table.column_names == expression_matrix.column_names
+        assert numpy.array_equal(
+            numpy.column_stack([column.to_numpy() for column in data_table.columns]),
+            expression_matrix.expression
+        )
+
+
+@pytest.mark.parametrize('file_format', list(partition_writers.keys()))
+def test_append_rows(tmp_path, expression_matrix, file_format):
+    for rows in (slice(0, 30), slice(30, 50)):
+        partition_writers[file_format](
+            expression_slice(expression_matrix, rows=rows), str(tmp_path), batch_size=10,
+            append=True
+        )
+
+    partition_manifest = SkyhookPartitionManifest.from_directory(
+        str(tmp_path), partition_file_exts[file_format]
+    )
+    assert [len(row_group) for row_group in partition_manifest.row_groups()] == [3, 3]
+    assert partition_manifest.num_rows == 50
+
+    expression = expression_matrix.expression
+    dataset    = SkyhookDataset.from_directory(str(tmp_path), file_format)
+
+    assert dataset.to_table().column('cell_024').to_pylist() == list(expression[:, 24])
+    assert (
+        dataset.to_table(columns=['cell_013']).column(0).to_pylist() == list(expression[:, 13])
+    )
+
+    dataset.delete_rows([29, 30])
+    assert dataset.to_table().num_rows == 48
+
+
+def test_iter_batches_by_row_group(tmp_path, expression_matrix):
+    for rows in (slice(0, 30), slice(30, 50)):
+        SkyhookFileWriter.write_partitions_to_arrow(
+            expression_slice(expression_matrix, rows=rows), str(tmp_path), batch_size=10,
+            append=True
+        )
+
+    dataset    = SkyhookDataset.from_directory(str(tmp_path))
+    projection = ['cell_024', 'cell_003']
+
+    record_batches = list(dataset.iter_batches(columns=projection, batch_rows=8))
+
+    # batches never span row groups, and slice the columns of a row group's partitions
+    assert [record_batch.num_rows for record_batch in record_batches] == [8, 8, 8, 6, 8, 8, 4]
+    assert pyarrow.Table.from_batches(record_batches).equals(dataset.to_table(columns=projection))
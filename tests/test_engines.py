@@ -0,0 +1,422 @@
+import os
+import sys
+
+import numpy
+import pyarrow.compute
+import pytest
+
+from skyhookdm import skyhook
+from skyhookdm.connectors import RadosConnector, storage_obj_data, storage_obj_name
+from skyhookdm.dataformats import (SkyhookDataWrapper, SkyhookFileReader, SkyhookFileWriter,
+                                   SkyhookFlatbufferMeta,
+                                   arrow_binary_from_table, column_stats_from_arrays,
+                                   column_stats_from_matrix, merge_column_stats)
+from skyhookdm.datasets import SkyhookDataset
+from skyhookdm.engines import (FanOutQueryEngine, LocalQueryEngine, QueryPlanner,
+                               predicate_may_match)
+from skyhookdm.parsers import QueryParser
+
+from tests.conftest import ExpressionMatrix
+
+
+path_to_local_run_query = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'toolbox', 'local-run-query'
+)
+
+
+def expected_result(expression_wrapper, filter_col, projection):
+    data_table = expression_wrapper.as_partitioned_arrow_table()
+    col_vals   = data_table.column(filter_col)
+
+    row_mask   = pyarrow.compute.and_(
+        pyarrow.compute.greater(col_vals, 20),
+        pyarrow.compute.less_equal(col_vals, 80)
+    )
+
+    return data_table.filter(row_mask).select(projection)
+
+
+def test_local_query_over_dataset(tmp_path, expression_wrapper):
+    SkyhookFileWriter.write_partitions_to_arrow(expression_wrapper, str(tmp_path), batch_size=4)
+
+    query_engine = LocalQueryEngine.for_query_str(
+        'SELECT cell_003, cell_021 FROM expression WHERE cell_010 > 20 AND cell_010 <= 80',
+        batch_rows=7
+    )
+    result_table = query_engine.execute(SkyhookDataset.from_directory(str(tmp_path)))
+
+    expected_table = expected_result(expression_wrapper, 'cell_010', ['cell_003', 'cell_021'])
+    assert result_table.to_pydict() == expected_table.to_pydict()
+
+
+@pytest.fixture
+def expression_cluster_dir(tmp_path, expression_wrapper):
+    """
+    A local cluster with the expression matrix written as 7 objects, each a column partition.
+    """
+
+    path_to_cluster = str(tmp_path / 'cluster')
+
+    with RadosConnector.connection_for_local(path_to_cluster).connect() as cluster:
+        with cluster.context_for_pool('skyhook') as pool_context:
+            tbl_parts = expression_wrapper.batched_table_partitions(batch_size=4)
+
+            for obj_id, (_, tbl_part) in enumerate(tbl_parts):
+                pool_context.write_data(
+                    storage_obj_name('expression', obj_id),
+                    storage_obj_data(SkyhookFlatbufferMeta.binary_from_arrow_binary(
+                        arrow_binary_from_table(tbl_part)
+                    ))
+                )
+
+    return path_to_cluster
+
+
+def test_local_query_over_objects(expression_cluster_dir, expression_wrapper):
+    with RadosConnector.connection_for_local(expression_cluster_dir).connect() as cluster:
+        with cluster.context_for_pool('skyhook') as pool_context:
+            query_engine = LocalQueryEngine.for_query_str(
+                'SELECT cell_000 FROM expression WHERE cell_024 BETWEEN 21 AND 80'
+            )
+            result_table = query_engine.table_from_batches(
+                query_engine.execute_object_batches(pool_context, 'expression', num_objs=7)
+            )
+
+    expected_table = expected_result(expression_wrapper, 'cell_024', ['cell_000'])
+    assert result_table.to_pydict() == expected_table.to_pydict()
+
+
+def test_plan_shards():
+    query_shards = QueryPlanner.plan(
+        {'projection': ['a'], 'relations': ['t'], 'predicates': None},
+        'run-query', 'skyhook', start_obj=3, num_objs=10, shard_size=4
+    )
+
+    assert [(shard.start_obj, shard.num_objs) for shard in query_shards] == [(3, 4), (7, 4),
+                                                                             (11, 2)]
+    assert query_shards[0].command_args[-2:] == ['--project', 'a']
+
+
+@pytest.mark.parametrize('shard_size', [1, 3, 7])
+def test_fan_out_query(monkeypatch, expression_cluster_dir, expression_wrapper, shard_size):
+    monkeypatch.setenv('PYTHONPATH', os.path.dirname(os.path.dirname(__file__)))
+
+    query_shards = QueryPlanner.plan(
+        QueryParser.parse('SELECT cell_000, cell_023 FROM expression WHERE cell_024 > 20'),
+        [sys.executable, path_to_local_run_query],
+        'skyhook',
+        num_objs=7,
+        shard_size=shard_size,
+        extra_args=['--local-cluster-dir', expression_cluster_dir]
+    )
+
+    query_engine = FanOutQueryEngine(max_parallel=2)
+    result_table = query_engine.execute(query_shards, QueryParser.parse(
+        'SELECT cell_000, cell_023 FROM expression WHERE cell_024 > 20'
+    ))
+
+    expected_table = expression_wrapper.as_partitioned_arrow_table()
+    expected_table = expected_table.filter(
+        pyarrow.compute.greater(expected_table.column('cell_024'), 20)
+    ).select(['cell_000', 'cell_023'])
+
+    assert result_table.to_pydict() == expected_table.to_pydict()
+    assert [shard_timing.shard_id for shard_timing in query_engine.shard_timings] == list(
+        range(len(query_shards))
+    )
+
+
+@pytest.mark.parametrize('query_str', [
+    'SELECT SUM(*), COUNT_NONZERO(*), COUNT(*) FROM expression',
+    'SELECT SUM(*), COUNT_NONZERO(*), COUNT(*) FROM expression WHERE cell_001 >= 0',
+])
+def test_aggregate_dataset(tmp_path, expression_wrapper, query_str):
+    SkyhookFileWriter.write_partitions_to_arrow(expression_wrapper, str(tmp_path), batch_size=4)
+
+    result_table = LocalQueryEngine.for_query_str(query_str, batch_rows=16).execute(
+        SkyhookDataset.from_directory(str(tmp_path))
+    )
+
+    expression  = expression_wrapper.domain_data.expression
+    cell_names  = expression_wrapper.domain_data.columns()
+    result_vals = result_table.to_pydict()
+
+    assert result_table.num_rows == 1
+    assert [result_vals[f'sum({cell_name})'][0] for cell_name in cell_names] == (
+        expression.sum(axis=0).tolist()
+    )
+    assert [result_vals[f'count_nonzero({cell_name})'][0] for cell_name in cell_names] == (
+        (expression != 0).sum(axis=0).tolist()
+    )
+    assert result_vals['count(*)'] == [expression.shape[0]]
+
+
+@pytest.mark.parametrize('write_partitions', [
+    SkyhookFileWriter.write_partitions_to_arrow,
+    SkyhookFileWriter.write_partitions_to_parquet,
+    SkyhookFileWriter.write_partitions_to_flatbuffer,
+])
+def test_count_rows_from_metadata(monkeypatch, tmp_path, expression_wrapper, write_partitions):
+    partition_manifest = write_partitions(expression_wrapper, str(tmp_path), batch_size=4)
+
+    skyhook_dataset = SkyhookDataset.from_directory(
+        str(tmp_path), partition_manifest.file_format, partition_manifest.file_ext
+    )
+    skyhook_dataset.delete_rows([3, 40])
+
+    # COUNT(*) alone reads no partition data
+    def read_partition(*args, **kwargs): raise AssertionError('partition data was read')
+    monkeypatch.setattr(SkyhookFileReader, 'read_partition_as_arrow_table', read_partition)
+
+    result_table = LocalQueryEngine.for_query_str('SELECT COUNT(*) FROM expression').execute(
+        skyhook_dataset
+    )
+
+    assert result_table.to_pydict() == {'count(*)': [expression_wrapper.domain_data.shape[0] - 2]}
+
+
+def test_aggregate_objects(expression_cluster_dir, expression_wrapper):
+    with RadosConnector.connection_for_local(expression_cluster_dir).connect() as cluster:
+        with cluster.context_for_pool('skyhook') as pool_context:
+            result_table = LocalQueryEngine.for_query_str(
+                'SELECT MIN(cell_003), MAX(cell_020), AVG(cell_011), COUNT(*) FROM expression'
+            ).execute_object_aggregates(pool_context, 'expression', num_objs=7)
+
+    expression = expression_wrapper.domain_data.expression
+    assert result_table.to_pydict() == {
+        'min(cell_003)': [expression[:, 3].min()],
+        'max(cell_020)': [expression[:, 20].max()],
+        'avg(cell_011)': [expression[:, 11].mean()],
+        'count(*)'     : [expression.shape[0]],
+    }
+
+
+def test_aggregate_group_by(annotation_wrapper):
+    annotation_table = annotation_wrapper.as_partitioned_arrow_table()
+    qc_table         = annotation_table.append_column(
+        'total_counts', pyarrow.array(range(annotation_table.num_rows), type=pyarrow.uint16())
+    )
+
+    result_table = LocalQueryEngine.for_query_str(
+        'SELECT cell_type, COUNT(*), SUM(total_counts), AVG(total_counts) FROM qc '
+        "WHERE batch = 'batch_1' GROUP BY cell_type",
+        batch_rows=10
+    ).aggregate_table(qc_table)
+
+    expected_frame = qc_table.to_pandas()
+    expected_frame = expected_frame[expected_frame['batch'] == 'batch_1'].groupby(
+        'cell_type', observed=True
+    )['total_counts'].agg(['count', 'sum', 'mean'])
+
+    result_vals = {
+        cell_type: (row_count, counts_sum, counts_avg)
+        for cell_type, row_count, counts_sum, counts_avg in zip(*result_table.to_pydict().values())
+    }
+
+    assert result_vals == {
+        cell_type: (group_stats['count'], group_stats['sum'], group_stats['mean'])
+        for cell_type, group_stats in expected_frame.iterrows()
+    }
+
+
+def test_pruned_query_over_row_groups(tmp_path, expression_matrix):
+    # two batches of rows, each written as column partitions; values of the second are larger
+    row_batches = [expression_matrix.expression[:20], expression_matrix.expression[20:] + 1000]
+
+    partitions = []
+    for batch_ndx, row_batch in enumerate(row_batches):
+        path_to_batch = tmp_path / f'batch_{batch_ndx}'
+        path_to_batch.mkdir()
+
+        batch_wrapper = SkyhookDataWrapper(
+            'expression', ExpressionMatrix(row_batch, expression_matrix.column_names),
+            type_for_numpy=numpy.uint16,
+            type_for_arrow=pyarrow.uint16(),
+            type_for_skyhook=skyhook.DataTypes.SDT_UINT16
+        )
+        SkyhookFileWriter.write_partitions_to_arrow(batch_wrapper, str(path_to_batch), 10)
+
+        partitions.extend(SkyhookDataset.from_directory(str(path_to_batch)).partitions)
+
+    skyhook_dataset = SkyhookDataset(partitions)
+    assert [len(row_group) for row_group in skyhook_dataset.row_groups()] == [3, 3]
+
+    query_engine = LocalQueryEngine.for_query_str(
+        'SELECT cell_003 FROM expression WHERE cell_012 >= 1050'
+    )
+    assert query_engine.prune_dataset(skyhook_dataset).partitions == partitions[3:]
+
+    result_table = query_engine.execute(skyhook_dataset)
+    assert result_table.column('cell_003').to_pylist() == [
+        cell_val + 1000
+        for cell_val, filter_val in zip(
+            expression_matrix.expression[20:, 3], expression_matrix.expression[20:, 12]
+        )
+        if filter_val >= 50
+    ]
+
+    # no partition can satisfy the predicate, so nothing is read
+    query_engine = LocalQueryEngine.for_query_str(
+        'SELECT cell_003 FROM expression WHERE cell_012 > 1100 OR cell_012 IS NULL'
+    )
+    assert query_engine.prune_dataset(skyhook_dataset).partitions == []
+    assert query_engine.execute(skyhook_dataset) is None
+
+
+def test_pruned_query_over_row_partitions(tmp_path, expression_matrix, monkeypatch):
+    # rows sorted by the filtered column (as for a table clustered on it), written in one pass
+    expression = expression_matrix.expression[
+        numpy.argsort(expression_matrix.expression[:, 12], kind='stable')
+    ]
+    sorted_wrapper = SkyhookDataWrapper(
+        'expression', ExpressionMatrix(expression, expression_matrix.column_names),
+        type_for_numpy=numpy.uint16,
+        type_for_arrow=pyarrow.uint16(),
+        type_for_skyhook=skyhook.DataTypes.SDT_UINT16
+    )
+
+    path_to_table = tmp_path / 'table'
+    path_to_table.mkdir()
+    SkyhookFileWriter.write_partitions_to_arrow(
+        sorted_wrapper, str(path_to_table), batch_size=10, row_batch_size=10
+    )
+
+    # cell_012 is in the second column partition of each row partition, which decides for all 3
+    kept_groups = [
+        row_start // 10
+        for row_start in range(0, 50, 10)
+        if expression[row_start:row_start + 10, 12].max() >= 80
+    ]
+    assert 0 < len(kept_groups) < 5
+
+    query_engine = LocalQueryEngine.for_query_str(
+        'SELECT cell_003 FROM expression WHERE cell_012 >= 80'
+    )
+    expected_vals = list(expression[expression[:, 12] >= 80, 3])
+
+    skyhook_dataset = SkyhookDataset.from_directory(str(path_to_table))
+    assert query_engine.prune_dataset(skyhook_dataset).partitions == [
+        partition
+        for partition in skyhook_dataset.partitions
+        if (partition.partition_id - 1) // 3 in kept_groups
+    ]
+    assert query_engine.execute(skyhook_dataset).column(0).to_pylist() == expected_vals
+
+    data_table = SkyhookFileReader.read_data_partitions_as_arrow_table(
+        str(path_to_table),
+        stats_predicate=lambda column_stats: predicate_may_match(
+            query_engine.predicates, column_stats
+        )
+    )
+    assert data_table.num_rows == 10 * len(kept_groups)
+    assert query_engine.table_from_batches(
+        query_engine.batches_for_table(data_table)
+    ).column(0).to_pylist() == expected_vals
+
+    # the same partitions, as objects in partition order
+    path_to_cluster = str(tmp_path / 'cluster')
+    with RadosConnector.connection_for_local(path_to_cluster).connect() as cluster:
+        with cluster.context_for_pool('skyhook') as pool_context:
+            for obj_id, partition in enumerate(skyhook_dataset.partitions):
+                pool_context.write_data(
+                    storage_obj_name('expression', obj_id),
+                    storage_obj_data(SkyhookFlatbufferMeta.binary_from_arrow_binary(
+                        arrow_binary_from_table(partition.read())
+                    ))
+                )
+
+            read_obj_ids       = []
+            read_table_batches = pool_context.read_table_batches
+
+            def recorded_read(*args, obj_ids=None, **kwargs):
+                read_obj_ids.extend(obj_ids)
+                return read_table_batches(*args, obj_ids=obj_ids, **kwargs)
+
+            monkeypatch.setattr(pool_context, 'read_table_batches', recorded_read)
+
+            result_table = query_engine.table_from_batches(
+                query_engine.execute_object_batches(pool_context, 'expression', num_objs=15)
+            )
+            assert result_table.column(0).to_pylist() == expected_vals
+
+            count_table = LocalQueryEngine.for_query_str(
+                'SELECT COUNT(*) FROM expression WHERE cell_012 >= 80'
+            ).execute_object_aggregates(pool_context, 'expression', num_objs=15)
+            assert count_table.column(0).to_pylist() == [len(expected_vals)]
+
+    assert read_obj_ids == 2 * [
+        obj_id for obj_id in range(15) if obj_id // 3 in kept_groups
+    ]
+
+
+@pytest.mark.parametrize('where_clause', ['score > 5', 'score = 10.0', 'score != 1.0'])
+def test_pruning_with_nan(where_clause):
+    score_vals   = numpy.array([[1.0], [numpy.nan], [10.0]])
+    query_engine = LocalQueryEngine.for_query_str(f'SELECT score FROM t WHERE {where_clause}')
+
+    for column_stats in (
+            column_stats_from_matrix(['score'], score_vals),
+            column_stats_from_arrays(['score'], [pyarrow.array(score_vals[:, 0])]),
+            merge_column_stats([
+                column_stats_from_matrix(['score'], score_vals[:1]),
+                column_stats_from_matrix(['score'], score_vals[1:]),
+            ])):
+        assert predicate_may_match(query_engine.predicates, column_stats)
+
+    matching_rows = query_engine.table_from_batches(query_engine.filter_batches([
+        pyarrow.RecordBatch.from_arrays([pyarrow.array(score_vals[:, 0])], names=['score'])
+    ]))
+    assert matching_rows.num_rows > 0
+
+
+def test_aggregate_appended_rows(tmp_path, expression_matrix):
+    path_to_table = tmp_path / 'expression'
+    path_to_table.mkdir()
+
+    expression = expression_matrix.expression
+
+    for rows in (slice(0, 30), slice(30, 50)):
+        SkyhookFileWriter.write_partitions_to_arrow(
+            SkyhookDataWrapper(
+                'expression', ExpressionMatrix(expression[rows], expression_matrix.column_names),
+                type_for_numpy=numpy.uint16,
+                type_for_arrow=pyarrow.uint16(),
+                type_for_skyhook=skyhook.DataTypes.SDT_UINT16
+            ),
+            str(path_to_table), batch_size=10, append=True
+        )
+
+    query_str = 'SELECT SUM(cell_003), COUNT(*) FROM expression'
+    expected  = {'sum(cell_003)': [expression[:, 3].sum()], 'count(*)': [expression.shape[0]]}
+
+    skyhook_dataset = SkyhookDataset.from_directory(str(path_to_table))
+    assert LocalQueryEngine.for_query_str(query_str).execute(skyhook_dataset).to_pydict() == (
+        expected
+    )
+
+    # each partition as an object, in partition order (as `rados-write` writes them)
+    with RadosConnector.connection_for_local(str(tmp_path / 'cluster')).connect() as cluster:
+        with cluster.context_for_pool('skyhook') as pool_context:
+            assert pool_context.next_object_id('expression') == 0
+
+            for obj_id, partition in enumerate(skyhook_dataset.partitions):
+                pool_context.write_data(
+                    storage_obj_name('expression', obj_id),
+                    storage_obj_data(SkyhookFlatbufferMeta.binary_from_arrow_binary(
+                        arrow_binary_from_table(partition.read())
+                    ))
+                )
+
+            pool_context.flush()
+            assert pool_context.next_object_id('expression') == 6
+
+            assert LocalQueryEngine.for_query_str(query_str).execute_object_aggregates(
+                pool_context, 'expression', num_objs=6
+            ).to_pydict() == expected
+
+            query_engine = LocalQueryEngine.for_query_str('SELECT cell_024 FROM expression')
+            result_table = query_engine.table_from_batches(
+                query_engine.execute_object_batches(pool_context, 'expression', num_objs=6)
+            )
+
+    assert result_table.column('cell_024').to_pylist() == list(expression[:, 24])
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from skyhookdm import instrumentation
+from skyhookdm.dataformats import SkyhookFileWriter
+from skyhookdm.datasets import SkyhookDataset
+
+
+@pytest.fixture
+def enabled_instrumentation():
+    instrumentation.enable()
+    yield instrumentation
+    instrumentation.disable()
+
+
+def test_disabled_records_nothing():
+    instrumentation.reset()
+
+    with instrumentation.span('disabled'):
+        instrumentation.count('disabled_counter')
+
+    assert instrumentation.span('disabled') is instrumentation.null_span
+    assert instrumentation.as_dict()['spans'] == {}
+    assert instrumentation.as_dict()['counters'] == {}
+
+
+def test_write_and_read_partitions(tmp_path, expression_wrapper, enabled_instrumentation):
+    partition_manifest = SkyhookFileWriter.write_partitions_to_flatbuffer(
+        expression_wrapper, str(tmp_path), batch_size=4, compression='zstd'
+    )
+    SkyhookDataset.from_directory(str(tmp_path), file_format='flatbuffer').to_table()
+
+    path_to_json = tmp_path / 'instrumentation.json'
+    instrumentation.write_json(str(path_to_json))
+    run_data = json.loads(path_to_json.read_text())
+
+    assert run_data['counters']['partitions_written'] == 7
+    assert run_data['counters']['partitions_read'] == 7
+    assert run_data['counters']['bytes_written'] == partition_manifest.byte_size
+    assert run_data['counters']['rows_decoded'] == 7 * expression_wrapper.domain_data.shape[0]
+
+    assert run_data['spans']['writer.write_partition_file']['count'] == 7
+    assert run_data['spans']['flatbuffer.decompress']['count'] == 7
+    assert 'reader.read_partition' in instrumentation.summary()
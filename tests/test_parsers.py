@@ -0,0 +1,58 @@
+import pytest
+
+from skyhookdm.parsers import (Aggregate, Attribute, Between, BooleanOp, Comparison, InList,
+                               IsNull, Literal, Not, QueryParser, predicate_attributes)
+
+
+def test_parse_without_where():
+    parsed_query = QueryParser.parse('SELECT * FROM expression')
+
+    assert parsed_query['projection'] == []
+    assert parsed_query['relations'] == ['expression']
+    assert parsed_query['predicates'] is None
+
+
+def test_parse_where_precedence():
+    parsed_query = QueryParser.parse(
+        "select a, b from t where a >= 1.5 and b <> 'it''s' or not c between -1 and 3 "
+        "and d not in (1, 2) and e is null"
+    )
+
+    assert parsed_query['projection'] == ['a', 'b']
+    assert parsed_query['predicates'] == BooleanOp('OR', [
+        BooleanOp('AND', [
+            Comparison('>=', Attribute('a'), Literal(1.5)),
+            Comparison('!=', Attribute('b'), Literal("it's")),
+        ]),
+        BooleanOp('AND', [
+            Not(Between(Attribute('c'), Literal(-1), Literal(3), False)),
+            InList(Attribute('d'), [Literal(1), Literal(2)], True),
+            IsNull(Attribute('e'), False),
+        ]),
+    ])
+    assert predicate_attributes(parsed_query['predicates']) == ['a', 'b', 'c', 'd', 'e']
+
+
+@pytest.mark.parametrize('query_str', [
+    'SELECT a FROM t WHERE a >',
+    'SELECT a FROM t WHERE (a = 1',
+    'SELECT a FROM t WHERE a = 1 b',
+])
+def test_parse_invalid_where(query_str):
+    with pytest.raises(ValueError):
+        QueryParser.parse(query_str)
+
+
+def test_parse_aggregates():
+    parsed_query = QueryParser.parse(
+        'SELECT cell_type, COUNT(*), avg(total_counts) FROM qc GROUP BY cell_type'
+    )
+
+    assert parsed_query['projection'] == ['cell_type']
+    assert parsed_query['aggregates'] == [
+        Aggregate('COUNT', '*'), Aggregate('AVG', 'total_counts')
+    ]
+    assert parsed_query['group_by'] == ['cell_type']
+
+    with pytest.raises(ValueError):
+        QueryParser.parse('SELECT barcode, SUM(total_counts) FROM qc GROUP BY cell_type')
@@ -0,0 +1,162 @@
+import flatbuffers
+import numpy
+import pyarrow
+import pytest
+
+from skyhookdm import skyhook
+from skyhookdm.Tables import Record, Table
+from skyhookdm.dataformats import SkyhookFlatbufferMeta, range_reader_for_file
+from skyhookdm.rowformats import SkyhookFlexRows
+
+
+def data_schema(column_types):
+    return ';'.join(
+        str(skyhook.ColumnSchema(col_id, col_type, 0, 1, col_name))
+        for col_id, (col_name, col_type) in enumerate(column_types)
+    )
+
+
+@pytest.fixture
+def mixed_table():
+    column_types = [
+        ('count', skyhook.DataTypes.SDT_UINT16),
+        ('score', skyhook.DataTypes.SDT_DOUBLE),
+        ('delta', skyhook.DataTypes.SDT_INT8)  ,
+        ('valid', skyhook.DataTypes.SDT_BOOL)  ,
+    ]
+
+    skyhook_metadata = skyhook.SkyhookMetadata(
+        1, 1, 1, skyhook.FormatTypes.SFT_ARROW, data_schema(column_types), 'public', 'mixed', 5, 0
+    )
+
+    return pyarrow.table(
+        {
+            'count': pyarrow.array([1, 2, None, 4, 65535], type=pyarrow.uint16()),
+            'score': pyarrow.array([0.5, 1.5, 2.5, None, 4.5]),
+            'delta': pyarrow.array([-1, 2, -3, 4, -5], type=pyarrow.int8()),
+            'valid': pyarrow.array([True, False, True, None, False]),
+        },
+        metadata=skyhook_metadata.to_byte_coercible()
+    )
+
+
+def test_flex_rows_round_trip(mixed_table):
+    rids      = numpy.arange(100, 105, dtype=numpy.uint64)
+    flex_rows = SkyhookFlexRows.from_binary_flatbuffer(
+        SkyhookFlexRows.binary_from_arrow_table(mixed_table, rids=rids)
+    )
+
+    data_table = flex_rows.get_data_as_arrow()
+
+    assert data_table.to_pydict() == mixed_table.to_pydict()
+    assert flex_rows.get_skyhook_metadata().table_name == 'mixed'
+    assert flex_rows.get_rids().tolist() == rids.tolist()
+    assert flex_rows.get_nullbits()[:, 0].tolist() == [0, 0, 0b1, 0b1010, 0]
+
+    # the generated accessors read the same rows
+    record = flex_rows.fb_obj.Rows(3)
+    assert (record.RID(), record.NullbitsAsNumpy().tolist()) == (103, [0b1010])
+
+
+def test_flex_rows_wide_integers():
+    """
+    64-bit integers beside floats and unsigned integers are decoded exactly (not as float64).
+    """
+
+    column_types = [
+        ('big'     , skyhook.DataTypes.SDT_INT64) ,
+        ('ratio'   , skyhook.DataTypes.SDT_FLOAT) ,
+        ('unsigned', skyhook.DataTypes.SDT_UINT64),
+        ('score'   , skyhook.DataTypes.SDT_DOUBLE),
+    ]
+
+    skyhook_metadata = skyhook.SkyhookMetadata(
+        1, 1, 1, skyhook.FormatTypes.SFT_ARROW, data_schema(column_types), 'public', 'wide', 3, 0
+    )
+
+    wide_table = pyarrow.table(
+        {
+            'big'     : pyarrow.array([2**60 + 1, -(2**62) - 3, 2**53 + 1], type=pyarrow.int64()),
+            'ratio'   : pyarrow.array([0.5, None, -1.25], type=pyarrow.float32()),
+            'unsigned': pyarrow.array([2**63 + 5, 2**64 - 1, 7], type=pyarrow.uint64()),
+            'score'   : pyarrow.array([1e300, 2.5, None]),
+        },
+        metadata=skyhook_metadata.to_byte_coercible()
+    )
+
+    flex_rows = SkyhookFlexRows.from_binary_flatbuffer(
+        SkyhookFlexRows.binary_from_arrow_table(wide_table)
+    )
+
+    assert flex_rows.get_data_as_arrow().to_pydict() == wide_table.to_pydict()
+
+
+def test_flex_rows_from_builder():
+    """
+    Rows built one at a time (as SkyhookDM does), with FlexBuffers of different byte widths.
+    """
+
+    flexbuffers = pytest.importorskip('flatbuffers.flexbuffers')
+
+    row_values   = [[1, 2.5, -3], [70000, 1e30, 5], [3, 0.25, -100000]]
+    column_types = [
+        ('a', skyhook.DataTypes.SDT_UINT32),
+        ('b', skyhook.DataTypes.SDT_DOUBLE),
+        ('c', skyhook.DataTypes.SDT_INT64) ,
+    ]
+
+    builder, records = flatbuffers.Builder(0), []
+    for rid, row in enumerate(row_values):
+        row_data = builder.CreateByteVector(flexbuffers.Dumps(row))
+
+        Record.RecordStartNullbitsVector(builder, 2)
+        builder.PrependUint64(0)
+        builder.PrependUint64(0b100 if rid == 2 else 0)
+        row_nullbits = builder.EndVector()
+
+        Record.RecordStart(builder)
+        Record.RecordAddRID(builder, rid)
+        Record.RecordAddNullbits(builder, row_nullbits)
+        Record.RecordAddData(builder, row_data)
+        records.append(Record.RecordEnd(builder))
+
+    Table.TableStartRowsVector(builder, len(records))
+    for record in reversed(records): builder.PrependUOffsetTRelative(record)
+    table_rows = builder.EndVector()
+
+    table_schema = builder.CreateString(data_schema(column_types))
+
+    Table.TableStart(builder)
+    Table.TableAddDataFormatType(builder, skyhook.FormatTypes.SFT_FLATBUF_FLEX_ROW)
+    Table.TableAddDataSchema(builder, table_schema)
+    Table.TableAddRows(builder, table_rows)
+    Table.TableAddNrows(builder, len(records))
+    builder.Finish(Table.TableEnd(builder))
+
+    data_table = SkyhookFlexRows.from_binary_flatbuffer(builder.Output()).get_data_as_arrow()
+
+    assert data_table.to_pydict() == {
+        'a': [1, 70000, 3], 'b': [2.5, 1e30, 0.25], 'c': [-3, 5, None]
+    }
+
+
+def test_flatbuffer_meta_flex_rows(tmp_path, expression_wrapper):
+    tbl_part = next(expression_wrapper.batched_table_partitions(batch_size=4))[1]
+
+    path_to_file = tmp_path / 'example.skyhook'
+    path_to_file.write_bytes(SkyhookFlatbufferMeta.binary_from_flex_rows(tbl_part))
+
+    fb_meta = SkyhookFlatbufferMeta.from_binary_flatbuffer(path_to_file.read_bytes())
+    assert fb_meta.get_data_format() == skyhook.FormatTypes.SFT_FLATBUF_FLEX_ROW
+    assert fb_meta.get_data_as_arrow().to_pydict() == tbl_part.to_pydict()
+
+    delete_vector = numpy.arange(tbl_part.num_rows) % 2 == 0
+    assert (
+        fb_meta.get_data_as_arrow(delete_vector=delete_vector.astype(numpy.uint8)).to_pydict()
+        == tbl_part.filter(pyarrow.array(~delete_vector)).to_pydict()
+    )
+
+    with open(path_to_file, 'rb') as input_handle:
+        arrow_schema = SkyhookFlatbufferMeta.read_arrow_schema(range_reader_for_file(input_handle))
+
+    assert arrow_schema.names == tbl_part.column_names